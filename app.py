@@ -1,196 +1,175 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 import sqlite3
 import json
+import logging
 import requests
 from datetime import datetime
 import re
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from dotenv import load_dotenv
-from openai import OpenAI
+import dart_cache
+import financial_store
+import database
+import company_stats
+import http_cache
+import http_encoding
+import industry_peers
+import metrics
+import ratio_engine
+from financial_statements import FinancialStatements, history_fetch_years, merge_history
+import report_cache
+from report_jobs import ReportJobQueue, QueueFull
+from company_search import (ensure_search_index, ensure_list_index, search_companies, count_companies,
+                            list_companies_after, search_companies_after)
+from company_autocomplete import AutocompleteIndex
+import singleflight
+from dart_client import DartClient, DART_API_BASE_URL, DART_STATUS_CODES
+from rate_limiter import TokenBucket, RateLimitExceeded
 
-# 환경 변수 로드
-print("=== 환경 변수 로딩 시작 ===", flush=True)
-print("현재 작업 디렉토리:", os.getcwd(), flush=True)
-print("Python 실행 환경:", os.environ.get('PYTHON_VERSION', 'Unknown'), flush=True)
-
-# 로컬 개발환경에서만 .env 파일 로드
+# 로컬 개발환경에서만 .env 파일 로드 (배포 환경은 시스템 환경 변수 사용)
 if os.path.exists('.env'):
     load_dotenv(override=True)
-    print("✅ .env 파일을 로드했습니다 (로컬 개발환경)", flush=True)
-else:
-    print("ℹ️ .env 파일이 없습니다. 시스템 환경 변수를 사용합니다 (Render 배포환경)", flush=True)
-
-# 환경 변수 직접 확인
-print("\n=== 중요 환경 변수 확인 ===", flush=True)
-
-# 1. OpenAI API 키 관련 환경 변수들 확인
-openai_keys_to_check = [
-    'OPENAI_API_KEY',
-    'OPENAPI_KEY', 
-    'OPEN_AI_API_KEY',
-    'OPENAI_KEY',
-    'OPENAI_SECRET_KEY'
-]
-
-print("OpenAI 관련 환경 변수 검사:", flush=True)
-found_openai_key = None
-for key_name in openai_keys_to_check:
-    value = os.environ.get(key_name)
-    if value:
-        print(f"  ✅ {key_name}: 발견됨 (길이: {len(value)}, 시작: {value[:15]}...)", flush=True)
-        if not found_openai_key:  # 첫 번째로 발견된 키 사용
-            found_openai_key = value
-    else:
-        print(f"  ❌ {key_name}: 없음", flush=True)
-
-# 2. 모든 환경 변수 중 API/KEY 포함된 것들 확인
-print("\n모든 API/KEY 관련 환경 변수:", flush=True)
-api_env_vars = {k: v for k, v in os.environ.items() if any(keyword in k.upper() for keyword in ['API', 'KEY', 'SECRET', 'TOKEN'])}
-for key, value in api_env_vars.items():
-    if value:
-        # 보안을 위해 값의 일부만 표시
-        masked_value = f"{value[:10]}...{value[-4:]}" if len(value) > 14 else f"{value[:6]}..."
-        print(f"  {key}: {masked_value}", flush=True)
-    else:
-        print(f"  {key}: (빈 값)", flush=True)
 
-print("=== 환경 변수 로딩 완료 ===\n", flush=True)
+# 로그 수준 (LOG_LEVEL, 기본 INFO), 요청마다 남는 조회 과정은 DEBUG
+logging.basicConfig(level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+                    format='%(asctime)s %(levelname)s [%(process)d] %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+metrics.init_app(app)  # 응답 압축 시간까지 재도록 http_encoding보다 먼저 등록
+http_encoding.init_app(app)
 
-# OpenAI API 설정 - 발견된 키 사용
-OPENAI_API_KEY = found_openai_key or os.getenv('OPENAI_API_KEY')
-print("=== OpenAI API 키 설정 ===", flush=True)
-print("OPENAI_API_KEY 존재 여부:", OPENAI_API_KEY is not None, flush=True)
-if OPENAI_API_KEY:
-    print("OPENAI_API_KEY 길이:", len(OPENAI_API_KEY), flush=True)
-    print("OPENAI_API_KEY 형식 확인:", flush=True)
-    if OPENAI_API_KEY.startswith('sk-'):
-        print("  ✅ 올바른 OpenAI API 키 형식 (sk-로 시작)", flush=True)
-    elif OPENAI_API_KEY.startswith('sk-proj-'):
-        print("  ✅ 올바른 OpenAI 프로젝트 API 키 형식 (sk-proj-로 시작)", flush=True)
-    else:
-        print("  ⚠️ 비정상적인 API 키 형식 (sk- 또는 sk-proj-로 시작하지 않음)", flush=True)
-    print("OPENAI_API_KEY 시작 부분:", OPENAI_API_KEY[:15] + "..." if len(OPENAI_API_KEY) > 15 else OPENAI_API_KEY, flush=True)
-else:
-    print("❌ OPENAI_API_KEY를 찾을 수 없습니다!", flush=True)
-    print("Render 대시보드에서 Environment Variables 설정을 확인해주세요.", flush=True)
-print("========================\n", flush=True)
-
-# OpenAI 클라이언트 초기화
-print("=== OpenAI 클라이언트 초기화 ===", flush=True)
-
-# OpenAI 라이브러리 버전 확인
-try:
-    import openai
-    openai_version = getattr(openai, '__version__', 'Unknown')
-    print(f"📦 OpenAI 라이브러리 버전: {openai_version}", flush=True)
-except Exception as ve:
-    print(f"⚠️ OpenAI 라이브러리 버전 확인 실패: {str(ve)}", flush=True)
-
-openai_client = None
-
-if OPENAI_API_KEY and len(OPENAI_API_KEY.strip()) > 0:
-    try:
-        print(f"🔄 OpenAI 클라이언트 초기화 시도 중...", flush=True)
-        print(f"   API 키 길이: {len(OPENAI_API_KEY)}", flush=True)
-        print(f"   API 키 형식: {OPENAI_API_KEY[:20]}...", flush=True)
-        
-        # OpenAI 클라이언트 생성
-        try:
-            # 기본적인 방식으로 클라이언트 생성 (최대 호환성)
-            openai_client = OpenAI(api_key=OPENAI_API_KEY.strip())
-            print("✅ OpenAI 클라이언트 객체 생성 성공", flush=True)
-        except TypeError as te:
-            # 구버전 호환성을 위한 대체 방식
-            print(f"⚠️ 기본 방식 실패, 호환성 모드로 재시도: {str(te)}", flush=True)
-            try:
-                import openai
-                openai.api_key = OPENAI_API_KEY.strip()
-                # 구버전 방식으로 설정
-                print("✅ OpenAI 클라이언트 호환성 모드로 설정 완료", flush=True)
-                # 새로운 방식으로 다시 시도
-                openai_client = OpenAI(api_key=OPENAI_API_KEY.strip())
-                print("✅ OpenAI 클라이언트 객체 생성 성공 (호환성 모드)", flush=True)
-            except Exception as ce:
-                print(f"❌ 호환성 모드도 실패: {str(ce)}", flush=True)
-                raise ce
-        
-        # API 연결 테스트 (간단한 모델 목록 조회)
-        try:
-            print("🔄 OpenAI API 연결 테스트 중...", flush=True)
-            models_response = openai_client.models.list()
-            if models_response and hasattr(models_response, 'data'):
-                available_models = [model.id for model in models_response.data[:3]]  # 처음 3개만
-                print(f"✅ OpenAI API 연결 테스트 성공! 사용 가능한 모델: {available_models}", flush=True)
-            else:
-                print("✅ OpenAI API 연결 성공 (모델 목록 확인 불가)", flush=True)
-        except Exception as test_e:
-            print(f"⚠️ OpenAI API 연결 테스트 실패: {str(test_e)}", flush=True)
-            print("   클라이언트는 생성되었지만 API 호출에 문제가 있을 수 있습니다.", flush=True)
-            # API 테스트 실패해도 클라이언트는 유지 (실제 사용 시 재시도 가능)
-            
-    except Exception as e:
-        print(f"❌ OpenAI 클라이언트 초기화 실패: {str(e)}", flush=True)
-        print(f"   오류 타입: {type(e).__name__}", flush=True)
-        openai_client = None
-        
-        # 일반적인 오류 원인 안내
-        if "api_key" in str(e).lower():
-            print("   💡 API 키 관련 오류입니다. 키 형식을 확인해주세요.", flush=True)
-        elif "network" in str(e).lower() or "connection" in str(e).lower():
-            print("   💡 네트워크 연결 오류입니다. 인터넷 연결을 확인해주세요.", flush=True)
-        else:
-            print("   💡 예상치 못한 오류입니다. OpenAI 서비스 상태를 확인해주세요.", flush=True)
-            
-else:
-    print("❌ OpenAI API 키가 없거나 비어있어 클라이언트를 초기화하지 않습니다.", flush=True)
-    print("   Render 환경 변수 'OPENAI_API_KEY'를 확인해주세요.", flush=True)
-
-# 최종 상태 출력
-if openai_client:
-    print("🎉 OpenAI 클라이언트 준비 완료! AI 분석 보고서 기능이 활성화됩니다.", flush=True)
-else:
-    print("💔 OpenAI 클라이언트 초기화 실패. AI 분석 보고서 기능이 비활성화됩니다.", flush=True)
+# OpenAI API 키 (여러 이름 중 처음 발견된 값 사용), 클라이언트는 처음 사용할 때 생성
+OPENAI_KEY_ENV_NAMES = ('OPENAI_API_KEY', 'OPENAPI_KEY', 'OPEN_AI_API_KEY', 'OPENAI_KEY', 'OPENAI_SECRET_KEY')
+OPENAI_API_KEY = next((os.environ[name].strip() for name in OPENAI_KEY_ENV_NAMES
+                       if os.environ.get(name, '').strip()), None)
 
-print("=== OpenAI 클라이언트 초기화 완료 ===\n", flush=True)
+_openai = {'client': None, 'error': None}
+_openai_lock = threading.Lock()
 
 # DART Open API 설정
 DART_API_KEY = os.getenv('DART_API_KEY')
-print("DART_API_KEY 존재 여부:", DART_API_KEY is not None, flush=True)
-print("DART_API_KEY 길이:", len(DART_API_KEY) if DART_API_KEY else 0, flush=True)
-if not DART_API_KEY:
-    print("Warning: DART_API_KEY not found in environment variables", flush=True)
-DART_API_BASE_URL = "https://opendart.fss.or.kr/api"
-
-# API 응답 상태 코드
-DART_STATUS_CODES = {
-    '000': '정상',
-    '010': '등록되지 않은 키입니다.',
-    '011': '사용할 수 없는 키입니다.',
-    '012': '접근할 수 없는 IP입니다.',
-    '013': '조회된 데이터가 없습니다.',
-    '014': '파일이 존재하지 않습니다.',
-    '020': '요청 제한을 초과하였습니다.',
-    '100': '필드의 부적절한 값입니다.',
-    '800': '시스템 점검 중입니다.',
-    '900': '정의되지 않은 오류가 발생하였습니다.'
-}
+
+STARTED_AT = time.time()
+
+# 워커 간 공유 호출 제한 (토큰 버킷 + 일일 한도)
+dart_rate_limiter = TokenBucket('dart')
+
+# 워커 프로세스별 연결 풀을 공유하는 DART 클라이언트
+dart_client = DartClient(DART_API_KEY, DART_API_BASE_URL, rate_limiter=dart_rate_limiter)
+
+# 여러 회사 재무요약 일괄 조회 설정
+BATCH_MAX_COMPANIES = int(os.getenv('BATCH_MAX_COMPANIES', '200'))  # 요청당 최대 회사 수
+BATCH_CONCURRENCY = int(os.getenv('BATCH_CONCURRENCY', '8'))  # 워커 프로세스당 동시 DART 조회 수
+BATCH_TIMEOUT = float(os.getenv('BATCH_TIMEOUT', '20'))  # 요청 전체 대기 시간(초), 넘은 회사는 timeout
+
+# 다년도 재무 이력 설정 (get_chart_data의 주요 계정)
+HISTORY_ACCOUNTS = ('매출액', '영업이익', '당기순이익', '자산총계', '부채총계', '자본총계')
+HISTORY_DEFAULT_YEARS = 10
+HISTORY_MAX_YEARS = 20
+
+# /api/financial 응답 항목 (fields 파라미터로 선택)
+FINANCIAL_FIELDS = ('financial_ratios', 'chart_data', 'table_data', 'raw_data', 'peer_percentiles', 'ai_report')
+# 보고서가 같아도 바뀌는 항목 (업종 백분위는 다른 회사 보고서가 저장될 때, AI 보고서 상태는 설정에 따라)
+FINANCIAL_VOLATILE_FIELDS = ('peer_percentiles', 'ai_report')
+
+# 스크리너 설정
+SCREENER_MAX_LIMIT = 500
+SCREENER_DEFAULT_FIELDS = ('operating_margin', 'net_margin', 'roe', 'roa', 'debt_ratio', 'current_ratio', 'revenue_growth')
+
+_batch_executor = None
+_batch_executor_pid = None
+_batch_executor_lock = threading.Lock()
+
+# AI 보고서 생성 설정 (보고서 캐시 키에 포함)
+REPORT_MODEL = "gpt-3.5-turbo"  # 더 안정적인 모델 사용
+REPORT_TEMPERATURE = 0.7
 
 def get_db_connection():
-    """데이터베이스 연결"""
-    db_path = os.path.join(os.getenv('DATA_PATH', ''), 'companies.db')
-    if not os.path.exists(db_path):
-        # 데이터베이스 파일이 없으면 현재 디렉토리의 파일을 복사
-        import shutil
-        current_db = 'companies.db'
-        if os.path.exists(current_db):
-            os.makedirs(os.path.dirname(db_path), exist_ok=True)
-            shutil.copy2(current_db, db_path)
-    
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """데이터베이스 연결 (워커별 읽기 전용 연결 풀에서 빌림, close() 시 반환)"""
+    return database.get_connection()
+
+def bootstrap_company_database():
+    """시작 시 한 번 DB 준비 (데이터 디렉터리 복사, WAL 전환, 회사명/전문 검색 인덱스와 통계 스냅샷 생성)
+
+    요청 처리 연결은 읽기 전용이므로 인덱스는 여기서 별도의 쓰기 연결로 만든다.
+    전문 검색 사용 가능 여부를 반환한다.
+    """
+    if not database.bootstrap_database():
+        return False
+    conn = sqlite3.connect(database.get_db_path(), timeout=database.BUSY_TIMEOUT)
+    try:
+        ensure_list_index(conn)
+        company_stats.ensure_stats(conn)
+        return ensure_search_index(conn)
+    except sqlite3.Error as e:
+        logger.warning("전문 검색 인덱스 확인 실패 (LIKE 검색 사용): %s", e)
+        return False
+    finally:
+        conn.close()
+
+# 워커의 첫 요청에서 한 번 준비 (import 시에는 DB를 열지 않음)
+company_search_fts_ready = False
+_company_database_ready = False
+_company_database_lock = threading.Lock()
+
+# 회사명 자동완성 인덱스 (회사 DB 준비 후 백그라운드에서 한 번 구성)
+company_autocomplete = AutocompleteIndex()
+_autocomplete_build_lock = threading.Lock()
+
+def ensure_company_database():
+    """회사 DB 준비(bootstrap_company_database)를 워커에서 처음 필요할 때 한 번 실행하고 자동완성 인덱스 구성 시작"""
+    global company_search_fts_ready, _company_database_ready
+    if _company_database_ready:
+        return
+    with _company_database_lock:
+        if _company_database_ready:
+            return
+        company_search_fts_ready = bootstrap_company_database()
+        _company_database_ready = True
+    threading.Thread(target=ensure_autocomplete_index, name='autocomplete-build', daemon=True).start()
+
+def ensure_autocomplete_index():
+    """자동완성 인덱스가 없으면 구성 (동시에 여러 번 만들지 않도록 잠금)"""
+    with _autocomplete_build_lock:
+        if company_autocomplete.ready:
+            return True
+        try:
+            conn = get_db_connection()
+            try:
+                count = company_autocomplete.build(conn)
+            finally:
+                conn.close()
+            logger.info(f"자동완성 인덱스 구성 완료: {count:,}개 회사, {company_autocomplete.build_seconds:.2f}초")
+        except sqlite3.Error as e:
+            logger.warning("자동완성 인덱스 구성 실패: %s", e)
+        return company_autocomplete.ready
+
+def get_openai_client():
+    """OpenAI 클라이언트 (처음 사용할 때 생성, 키가 없거나 생성에 실패하면 None)
+
+    openai 패키지는 import만 수백 ms가 걸려 여기서 불러온다. 연결 확인용 호출은 하지 않으므로
+    키 오류나 네트워크 문제는 실제 보고서 생성 요청에서 드러난다.
+    """
+    if _openai['client'] is not None or not OPENAI_API_KEY:
+        return _openai['client']
+    with _openai_lock:
+        if _openai['client'] is None and _openai['error'] is None:
+            try:
+                from openai import OpenAI
+                _openai['client'] = OpenAI(api_key=OPENAI_API_KEY)
+                logger.info("OpenAI 클라이언트 생성 완료")
+            except Exception as e:
+                _openai['error'] = f"{type(e).__name__}: {e}"
+                logger.error("OpenAI 클라이언트 생성 실패: %s", _openai['error'])
+    return _openai['client']
+
+def openai_available():
+    """AI 보고서 사용 가능 여부 (키가 있고 클라이언트 생성에 실패하지 않았으면 True, 클라이언트는 만들지 않음)"""
+    return bool(OPENAI_API_KEY) and _openai['error'] is None
 
 def clean_number(value):
     """숫자 데이터 정리 (콤마 제거 및 float 변환)"""
@@ -216,64 +195,98 @@ def format_amount(amount):
     except:
         return str(amount)
 
-def get_financial_data(corp_code, bsns_year="2023", reprt_code="11011"):
-    """DART API에서 재무정보 가져오기"""
-    if not DART_API_KEY:
-        print("DART API 키가 없습니다!", flush=True)
-        return {
-            'status': 'error',
-            'message': 'DART API 키가 설정되지 않았습니다.',
-            'data': []
-        }
+def fetch_financial_statements(corp_code, bsns_year, reprt_code):
+    """DART 단일회사 주요계정 API 호출 후 정상 응답은 캐시에 저장"""
+    # DART API 호출 (연결 풀 재사용, 일시적 오류 재시도)
+    logger.debug("DART API 요청: 기업코드 %s, 사업연도 %s, 보고서 코드 %s", corp_code, bsns_year, reprt_code)
+    result = dart_client.get('fnlttSinglAcnt.json', {
+        'corp_code': corp_code,
+        'bsns_year': bsns_year,
+        'reprt_code': reprt_code
+    })
+    data = result.data
+    
+    logger.debug("API 응답: %s - %s (%.0fms)", result.status, result.message, result.latency * 1000)
+    
+    # 정상 응답만 캐시하고 로컬 재무제표 저장소에 저장 (오류/데이터 없음은 다음 요청에서 재시도)
+    if data.get('status') == '000':
+        dart_cache.put(corp_code, bsns_year, reprt_code, data)
+        try:
+            financial_store.save_report(corp_code, bsns_year, reprt_code, data)
+        except sqlite3.Error as e:
+            logger.warning("재무제표 저장 실패: %s", e)
+        else:
+            industry_peers.schedule_refresh(bsns_year, reprt_code)
+    return data
 
+def get_peer_percentiles(corp_code, bsns_year, reprt_code):
+    """미리 계산한 업종 내 백분위 (계산 전이거나 조회 실패 시 None)"""
     try:
-        # DART API 엔드포인트 직접 호출
-        url = "https://opendart.fss.or.kr/api/fnlttSinglAcnt.json"
-        params = {
-            'crtfc_key': DART_API_KEY,
-            'corp_code': corp_code,
-            'bsns_year': bsns_year,
-            'reprt_code': reprt_code
-        }
-        
-        print("\n=== DART API 요청 정보 ===", flush=True)
-        print(f"URL: {url}", flush=True)
-        print(f"API Key: {DART_API_KEY}", flush=True)
-        print(f"기업코드: {corp_code}", flush=True)
-        print(f"사업연도: {bsns_year}", flush=True)
-        print(f"보고서 코드: {reprt_code}", flush=True)
-        
-        # 실제 요청 URL 출력 (디버깅용)
-        full_url = f"{url}?crtfc_key={DART_API_KEY}&corp_code={corp_code}&bsns_year={bsns_year}&reprt_code={reprt_code}"
-        print(f"전체 URL: {full_url}", flush=True)
-        print("========================\n", flush=True)
-        
-        response = requests.get(url, params=params, timeout=10)
-        print(f"응답 상태 코드: {response.status_code}", flush=True)
-        print(f"실제 요청 URL: {response.url}", flush=True)
-        
-        response.raise_for_status()
-        data = response.json()
-        
-        print(f"API 응답: {data.get('status')} - {DART_STATUS_CODES.get(data.get('status'), '알 수 없는 상태')}", flush=True)
+        return industry_peers.get_percentiles(corp_code, bsns_year, reprt_code)
+    except sqlite3.Error as e:
+        logger.warning("업종 백분위 조회 실패: %s", e)
+        return None
+
+def financial_etag(corp_code, bsns_year, reprt_code, peers, fields):
+    """재무정보 응답의 (ETag, Last-Modified), 저장소에 유효한 보고서가 없으면 (None, None)
+
+    요청 항목, 보고서 저장 시각, 업종 백분위 계산 시각, AI 보고서 사용 가능 여부가 같으면 응답도 같다.
+    """
+    try:
+        loaded_at = financial_store.report_loaded_at(corp_code, bsns_year, reprt_code)
+    except sqlite3.Error as e:
+        logger.warning("재무제표 저장소 조회 오류: %s", e)
+        return None, None
+    if loaded_at is None or not financial_store.is_fresh(bsns_year, loaded_at):
+        return None, None
+    peers_at = peers['computed_at'] if peers else None
+    etag = http_cache.make_etag('financial', corp_code, bsns_year, reprt_code, fields, loaded_at, peers_at,
+                                openai_available())
+    return etag, max(loaded_at, peers_at or 0)
+
+def load_local_financial_statements(corp_code, bsns_year, reprt_code):
+    """로컬 저장소의 재무제표 (DART 응답 형식), 없으면 None"""
+    try:
+        return financial_store.load_report(corp_code, bsns_year, reprt_code)
+    except sqlite3.Error as e:
+        logger.warning("재무제표 저장소 조회 오류: %s", e)
+        return None
+
+def get_financial_data(corp_code, bsns_year="2023", reprt_code="11011", cached_only=False):
+    """재무정보 가져오기 (캐시/로컬 저장소에 없으면 DART API 호출)
+
+    cached_only이면 DART를 호출하지 않고, 캐시/로컬 저장소에 없을 때 None을 반환한다.
+    """
+    try:
+        # 캐시 확인 (메모리 → SQLite → 로컬 재무제표 저장소)
+        data = dart_cache.get(corp_code, bsns_year, reprt_code)
+        if data is not None:
+            logger.debug("DART 캐시 적중: %s %s %s", corp_code, bsns_year, reprt_code)
+        else:
+            data = load_local_financial_statements(corp_code, bsns_year, reprt_code)
+            metrics.inc('cache_requests_total', cache='financial_store', result='miss' if data is None else 'hit')
+            if data is not None:
+                logger.debug("로컬 재무제표 사용: %s %s %s", corp_code, bsns_year, reprt_code)
+        if data is None and cached_only:
+            return None
+        if data is None:
+            if not DART_API_KEY:
+                logger.error("DART API 키가 없습니다.")
+                return {
+                    'status': 'error',
+                    'message': 'DART API 키가 설정되지 않았습니다.',
+                    'data': []
+                }
+            # 동시에 들어온 같은 요청은 DART를 한 번만 호출하고 결과 공유 (워커 간 포함)
+            data = singleflight.do(
+                f"dart:fnlttSinglAcnt:{corp_code}:{bsns_year}:{reprt_code}",
+                lambda: fetch_financial_statements(corp_code, bsns_year, reprt_code)
+            )
         
         status = data.get('status')
         if status == '000':
-            # 연결재무제표와 개별재무제표 분리
-            cfs_data = [item for item in data.get('list', []) if item.get('fs_div') == 'CFS']
-            ofs_data = [item for item in data.get('list', []) if item.get('fs_div') == 'OFS']
-            
-            # 재무상태표와 손익계산서 분리
-            financial_data = {
-                'cfs': {
-                    'bs': [item for item in cfs_data if item.get('sj_div') == 'BS'],
-                    'is': [item for item in cfs_data if item.get('sj_div') == 'IS']
-                },
-                'ofs': {
-                    'bs': [item for item in ofs_data if item.get('sj_div') == 'BS'],
-                    'is': [item for item in ofs_data if item.get('sj_div') == 'IS']
-                }
-            }
+            # 연결/개별, 재무상태표/손익계산서 구분별 계정 색인 (한 번만 훑어 생성)
+            financial_data = FinancialStatements.from_dart(data)
             
             return {
                 'status': 'success',
@@ -282,66 +295,56 @@ def get_financial_data(corp_code, bsns_year="2023", reprt_code="11011"):
             }
         else:
             error_message = DART_STATUS_CODES.get(status, '알 수 없는 오류')
-            print(f"DART API 오류 ({status}): {error_message}", flush=True)
+            logger.info("DART API 오류 (%s): %s", status, error_message)
             return {
                 'status': 'error',
                 'message': f"DART API 오류: {error_message}",
                 'data': []
             }
             
+    except RateLimitExceeded:
+        # 호출 한도 초과는 라우트 공통 핸들러에서 429로 응답
+        raise
     except requests.exceptions.Timeout:
-        print("DART API 요청 시간 초과", flush=True)
+        logger.warning("DART API 요청 시간 초과")
         return {
             'status': 'error',
             'message': 'DART API 요청 시간이 초과되었습니다.',
             'data': []
         }
     except requests.exceptions.RequestException as e:
-        print(f"DART API 요청 오류: {e}", flush=True)
+        logger.warning("DART API 요청 오류: %s", e)
         return {
             'status': 'error',
             'message': 'DART API 요청 중 오류가 발생했습니다.',
             'data': []
         }
     except Exception as e:
-        print(f"재무정보 조회 오류: {e}", flush=True)
+        logger.exception("재무정보 조회 오류: %s", e)
         return {
             'status': 'error',
             'message': '재무정보를 처리하는 중 오류가 발생했습니다.',
             'data': []
         }
 
+@metrics.timed('ratio_compute_duration_seconds', kind='single')
 def calculate_financial_ratios(financial_data):
     """재무비율 계산"""
     ratios = {}
     
     try:
-        # 연결재무제표 데이터 사용
-        bs_data = financial_data['cfs']['bs']
-        is_data = financial_data['cfs']['is']
-        
-        # 주요 계정 찾기
-        def find_account(data, account_name):
-            for item in data:
-                if item.get('account_nm') == account_name:
-                    return {
-                        'current': clean_number(item.get('thstrm_amount', 0)),
-                        'previous': clean_number(item.get('frmtrm_amount', 0)),
-                        'previous2': clean_number(item.get('bfefrmtrm_amount', 0))
-                    }
-            return {'current': 0, 'previous': 0, 'previous2': 0}
-        
+        # 연결재무제표 데이터 사용 (financial_data.amounts 기본값 CFS)
         # 재무상태표 계정
-        assets = find_account(bs_data, '자산총계')
-        liabilities = find_account(bs_data, '부채총계')
-        equity = find_account(bs_data, '자본총계')
-        current_assets = find_account(bs_data, '유동자산')
-        current_liabilities = find_account(bs_data, '유동부채')
+        assets = financial_data.amounts('자산총계')
+        liabilities = financial_data.amounts('부채총계')
+        equity = financial_data.amounts('자본총계')
+        current_assets = financial_data.amounts('유동자산')
+        current_liabilities = financial_data.amounts('유동부채')
         
         # 손익계산서 계정
-        revenue = find_account(is_data, '매출액')
-        operating_profit = find_account(is_data, '영업이익')
-        net_income = find_account(is_data, '당기순이익')
+        revenue = financial_data.amounts('매출액')
+        operating_profit = financial_data.amounts('영업이익')
+        net_income = financial_data.amounts('당기순이익')
         
         # 수익성 비율 계산
         if revenue['current'] > 0:
@@ -369,7 +372,7 @@ def calculate_financial_ratios(financial_data):
         ratios['total_equity_formatted'] = format_amount(equity['current'])
             
     except Exception as e:
-        print(f"재무비율 계산 오류: {e}", flush=True)
+        logger.exception("재무비율 계산 오류: %s", e)
     
     return ratios
 
@@ -379,23 +382,10 @@ def get_chart_data(financial_data):
     
     try:
         # 연결재무제표 데이터 사용
-        bs_data = financial_data['cfs']['bs']
-        is_data = financial_data['cfs']['is']
-        
-        def find_account(data, account_name):
-            for item in data:
-                if item.get('account_nm') == account_name:
-                    return {
-                        'current': clean_number(item.get('thstrm_amount', 0)),
-                        'previous': clean_number(item.get('frmtrm_amount', 0)),
-                        'previous2': clean_number(item.get('bfefrmtrm_amount', 0))
-                    }
-            return {'current': 0, 'previous': 0, 'previous2': 0}
-        
         # 재무상태표 데이터 (조원 단위)
-        assets = find_account(bs_data, '자산총계')
-        liabilities = find_account(bs_data, '부채총계')
-        equity = find_account(bs_data, '자본총계')
+        assets = financial_data.amounts('자산총계')
+        liabilities = financial_data.amounts('부채총계')
+        equity = financial_data.amounts('자본총계')
         
         chart_data['balance'] = {
             'labels': ['자산총계', '부채총계', '자본총계'],
@@ -407,7 +397,7 @@ def get_chart_data(financial_data):
         }
         
         # 매출액 추이 (조원 단위)
-        revenue = find_account(is_data, '매출액')
+        revenue = financial_data.amounts('매출액')
         chart_data['revenue_trend'] = {
             'labels': ['전전기', '전기', '당기'],
             'data': [
@@ -418,8 +408,8 @@ def get_chart_data(financial_data):
         }
         
         # 이익 추이 (조원 단위)
-        operating_profit = find_account(is_data, '영업이익')
-        net_income = find_account(is_data, '당기순이익')
+        operating_profit = financial_data.amounts('영업이익')
+        net_income = financial_data.amounts('당기순이익')
         
         chart_data['profit_trend'] = {
             'labels': ['전전기', '전기', '당기'],
@@ -436,23 +426,16 @@ def get_chart_data(financial_data):
         }
         
     except Exception as e:
-        print(f"차트 데이터 생성 오류: {e}", flush=True)
+        logger.exception("차트 데이터 생성 오류: %s", e)
     
     return chart_data
 
 def get_enhanced_company_info(corp_code):
     """기업 정보를 상세히 조회하고 분석용 데이터를 준비"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM companies WHERE corp_code = ?', (corp_code,))
-        company = cursor.fetchone()
-        conn.close()
-        
-        if not company:
+        company_dict = database.get_company(corp_code)
+        if not company_dict:
             return None
-            
-        company_dict = dict(company)
         
         # 기업 규모 분류 (자본금 기준)
         capital = clean_number(company_dict.get('capital', 0))
@@ -468,23 +451,8 @@ def get_enhanced_company_info(corp_code):
         # 상장 여부 확인
         listing_status = "상장기업" if company_dict.get('stock_code') and company_dict.get('stock_code').strip() else "비상장기업"
         
-        # 업종 정보 정리
-        industry = company_dict.get('industry', '정보 없음')
-        if industry == '정보 없음' or not industry:
-            # 회사명에서 업종 추정 시도
-            corp_name = company_dict.get('corp_name', '')
-            if any(keyword in corp_name for keyword in ['전자', '반도체', 'IT', '소프트웨어']):
-                industry = "IT/전자"
-            elif any(keyword in corp_name for keyword in ['건설', '건축', '토목']):
-                industry = "건설업"
-            elif any(keyword in corp_name for keyword in ['금융', '은행', '증권', '보험']):
-                industry = "금융업"
-            elif any(keyword in corp_name for keyword in ['제약', '바이오', '의료']):
-                industry = "제약/바이오"
-            elif any(keyword in corp_name for keyword in ['화학', '석유', '정유']):
-                industry = "화학/석유"
-            else:
-                industry = "기타 업종"
+        # 업종 정보 정리 (없으면 회사명에서 추정)
+        industry = industry_peers.classify_industry(company_dict)
         
         # 설립연도 계산
         est_date = company_dict.get('est_date', '')
@@ -512,38 +480,53 @@ def get_enhanced_company_info(corp_code):
         return enhanced_info
         
     except Exception as e:
-        print(f"기업 정보 조회 오류: {e}", flush=True)
+        logger.exception("기업 정보 조회 오류: %s", e)
         return None
 
-def generate_financial_report(company_info, financial_data, ratios):
-    """AI를 사용하여 재무 보고서 생성"""
-    try:
-        if not openai_client:
-            print("OpenAI 클라이언트가 초기화되지 않았습니다.", flush=True)
-            return {
-                'status': 'error',
-                'message': 'OpenAI API 키가 설정되지 않았거나 유효하지 않습니다.'
-            }
+PEER_PROMPT_FIELDS = (
+    ('operating_margin', '영업이익률'),
+    ('net_margin', '순이익률'),
+    ('roe', 'ROE'),
+    ('roa', 'ROA'),
+    ('debt_ratio', '부채비율'),
+    ('current_ratio', '유동비율'),
+    ('revenue_growth', '매출액 증가율')
+)
 
-        # 업종별 특성 분석을 위한 추가 정보
-        industry_context = ""
-        industry = company_info.get('industry_classified', '기타')
-        
-        if "IT" in industry or "전자" in industry:
-            industry_context = "IT/전자 업종은 기술 혁신과 R&D 투자가 중요하며, 빠른 시장 변화에 대응력이 핵심입니다."
-        elif "건설" in industry:
-            industry_context = "건설업은 경기 민감도가 높고, 프로젝트 기반 매출로 인한 변동성이 큰 특징이 있습니다."
-        elif "금융" in industry:
-            industry_context = "금융업은 금리 변동과 경제 상황에 민감하며, 자본 적정성과 리스크 관리가 중요합니다."
-        elif "제약" in industry or "바이오" in industry:
-            industry_context = "제약/바이오 업종은 높은 R&D 비용과 긴 개발 기간, 규제 리스크가 특징입니다."
-        elif "화학" in industry or "석유" in industry:
-            industry_context = "화학/석유 업종은 원자재 가격 변동과 환경 규제에 민감한 특성을 가집니다."
-        else:
-            industry_context = "해당 업종의 특성을 고려한 분석이 필요합니다."
+def format_peer_section(peers):
+    """AI 프롬프트의 업종 내 위치 항목 (백분위가 없거나 업종 회사 수가 너무 적으면 빈 문자열)"""
+    if not peers or peers['group_size'] < industry_peers.MIN_GROUP_SIZE:
+        return ""
+    lines = [f"=== 업종 내 위치 ({peers['group']}, {peers['group_size']}개 회사, 백분위는 값이 클수록 100에 가까움) ==="]
+    for field, label in PEER_PROMPT_FIELDS:
+        percentile = peers['percentiles'].get(field)
+        median = peers['distribution'].get(field, {}).get('p50')
+        if percentile is None or median is None:
+            continue
+        lines.append(f"• {label}: 백분위 {percentile:.0f} (업종 중앙값 {median}%)")
+    return "\n".join(lines) + "\n" if len(lines) > 1 else ""
 
-        # 강화된 프롬프트 구성
-        prompt = f"""
+def build_report_messages(company_info, ratios):
+    """AI 재무 보고서 요청 메시지 구성"""
+    # 업종별 특성 분석을 위한 추가 정보
+    industry_context = ""
+    industry = company_info.get('industry_classified', '기타')
+    
+    if "IT" in industry or "전자" in industry:
+        industry_context = "IT/전자 업종은 기술 혁신과 R&D 투자가 중요하며, 빠른 시장 변화에 대응력이 핵심입니다."
+    elif "건설" in industry:
+        industry_context = "건설업은 경기 민감도가 높고, 프로젝트 기반 매출로 인한 변동성이 큰 특징이 있습니다."
+    elif "금융" in industry:
+        industry_context = "금융업은 금리 변동과 경제 상황에 민감하며, 자본 적정성과 리스크 관리가 중요합니다."
+    elif "제약" in industry or "바이오" in industry:
+        industry_context = "제약/바이오 업종은 높은 R&D 비용과 긴 개발 기간, 규제 리스크가 특징입니다."
+    elif "화학" in industry or "석유" in industry:
+        industry_context = "화학/석유 업종은 원자재 가격 변동과 환경 규제에 민감한 특성을 가집니다."
+    else:
+        industry_context = "해당 업종의 특성을 고려한 분석이 필요합니다."
+
+    # 강화된 프롬프트 구성
+    prompt = f"""
 === 기업 기본 정보 ===
 • 회사명: {company_info['corp_name']}
 • 기업코드: {company_info['corp_code']}
@@ -574,6 +557,7 @@ def generate_financial_report(company_info, financial_data, ratios):
 • 자기자본비율: {ratios.get('equity_ratio', '정보 없음')}%
 • 유동비율: {ratios.get('current_ratio', '정보 없음')}%
 
+{format_peer_section(company_info.get('peer_percentiles'))}
 위 정보를 바탕으로 다음 내용을 포함하는 전문적인 재무 분석 보고서를 작성해주세요:
 
 1. **기업 개요 및 사업 특성**
@@ -599,38 +583,237 @@ def generate_financial_report(company_info, financial_data, ratios):
 보고서는 구체적인 수치를 인용하며 객관적이고 전문적인 톤으로 작성해주세요.
 """
 
-        print("\n=== OpenAI SDK 요청 정보 ===", flush=True)
-        print(f"클라이언트 상태: {'초기화됨' if openai_client else '초기화 안됨'}", flush=True)
-        print(f"모델: gpt-3.5-turbo", flush=True)
-        print("========================\n", flush=True)
-
-        # OpenAI SDK 사용
-        response = openai_client.chat.completions.create(
-            model="gpt-3.5-turbo",  # 더 안정적인 모델 사용
-            messages=[
-                {"role": "system", "content": "당신은 전문 재무분석가입니다. 주어진 재무정보를 바탕으로 객관적이고 통찰력 있는 분석 보고서를 작성해주세요."},
-                {"role": "user", "content": prompt}
-            ],
-            temperature=0.7,
-            max_tokens=2000,
-            timeout=60  # 타임아웃을 60초로 증가
-        )
-        
-        print("OpenAI API 호출 성공", flush=True)
-        
-        report = response.choices[0].message.content
+    messages = [
+        {"role": "system", "content": "당신은 전문 재무분석가입니다. 주어진 재무정보를 바탕으로 객관적이고 통찰력 있는 분석 보고서를 작성해주세요."},
+        {"role": "user", "content": prompt}
+    ]
+    return messages
+
+def record_openai_call(mode, outcome, seconds, usage=None):
+    """OpenAI 호출 시간(mode: complete/stream)과 사용 토큰 기록"""
+    metrics.observe('openai_request_duration_seconds', seconds, model=REPORT_MODEL, mode=mode, outcome=outcome)
+    for kind in ('prompt', 'completion'):
+        metrics.inc('openai_tokens_total', (usage or {}).get(f'{kind}_tokens') or 0, model=REPORT_MODEL, type=kind)
+
+def get_cached_report(cache_key):
+    """저장된 AI 보고서 조회 (없으면 None)"""
+    cached = report_cache.get(cache_key)
+    if not cached:
+        return None
+    logger.debug("AI 보고서 캐시 적중: %s (%s)", cached['corp_code'], cache_key[:12])
+    return {
+        'report': cached['report'],
+        'cached': True,
+        'generated_at': datetime.fromtimestamp(cached['created_at']).isoformat(timespec='seconds')
+    }
+
+def generate_financial_report(company_info, financial_data, ratios, refresh=False):
+    """AI를 사용하여 재무 보고서 생성 (같은 입력의 보고서는 캐시에서 반환)"""
+    try:
+        messages = build_report_messages(company_info, ratios)
+        cache_key = report_cache.make_key(REPORT_MODEL, REPORT_TEMPERATURE, messages)
+
+        # 입력이 같으면 저장된 보고서 재사용 (refresh=True면 강제 재생성)
+        if not refresh:
+            cached = get_cached_report(cache_key)
+            if cached:
+                return {'status': 'success', **cached}
+
+        openai_client = get_openai_client()
+        if not openai_client:
+            logger.warning("OpenAI 클라이언트가 초기화되지 않았습니다.")
+            return {
+                'status': 'error',
+                'message': 'OpenAI API 키가 설정되지 않았거나 유효하지 않습니다.'
+            }
+
+        logger.info("OpenAI 보고서 요청: %s (모델 %s)", company_info['corp_code'], REPORT_MODEL)
+
+        def create_report():
+            # OpenAI SDK 사용
+            started = time.perf_counter()
+            try:
+                response = openai_client.chat.completions.create(
+                    model=REPORT_MODEL,
+                    messages=messages,
+                    temperature=REPORT_TEMPERATURE,
+                    max_tokens=2000,
+                    timeout=60  # 타임아웃을 60초로 증가
+                )
+            except Exception:
+                record_openai_call('complete', 'error', time.perf_counter() - started)
+                raise
+            usage = response.usage
+            result = {
+                'report': response.choices[0].message.content,
+                'usage': {
+                    'prompt_tokens': getattr(usage, 'prompt_tokens', None),
+                    'completion_tokens': getattr(usage, 'completion_tokens', None),
+                    'total_tokens': getattr(usage, 'total_tokens', None)
+                }
+            }
+            record_openai_call('complete', 'success', time.perf_counter() - started, result['usage'])
+            return result
+
+        # 같은 프롬프트로 동시에 들어온 요청은 OpenAI를 한 번만 호출
+        result = singleflight.do(f"openai:{cache_key}", create_report)
+        report_cache.put(cache_key, company_info['corp_code'], REPORT_MODEL, REPORT_TEMPERATURE,
+                         result['report'], result['usage'])
         return {
             'status': 'success',
-            'report': report
+            'report': result['report'],
+            'cached': False,
+            'generated_at': datetime.now().isoformat(timespec='seconds')
         }
             
     except Exception as e:
-        print(f"AI 보고서 생성 오류: {e}", flush=True)
+        logger.exception("AI 보고서 생성 오류: %s", e)
         return {
             'status': 'error',
             'message': f'AI 보고서 생성 중 오류가 발생했습니다: {str(e)}'
         }
 
+def stream_financial_report(company_info, ratios, refresh=False):
+    """AI 재무 보고서를 스트리밍으로 생성, (이벤트, 데이터)를 순서대로 반환"""
+    messages = build_report_messages(company_info, ratios)
+    cache_key = report_cache.make_key(REPORT_MODEL, REPORT_TEMPERATURE, messages)
+
+    if not refresh:
+        cached = get_cached_report(cache_key)
+        if cached:
+            yield 'token', {'text': cached['report']}
+            yield 'done', {'cached': True, 'generated_at': cached['generated_at']}
+            return
+
+    openai_client = get_openai_client()
+    if not openai_client:
+        yield 'error', {'message': 'OpenAI API 키가 설정되지 않았거나 유효하지 않습니다.'}
+        return
+
+    parts = []
+    usage = {}
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        stream = openai_client.chat.completions.create(
+            model=REPORT_MODEL,
+            messages=messages,
+            temperature=REPORT_TEMPERATURE,
+            max_tokens=2000,
+            timeout=60,
+            stream=True,
+            stream_options={'include_usage': True}
+        )
+        # 클라이언트가 끊으면 OpenAI 연결도 바로 닫아 남은 토큰을 생성하지 않게 함
+        with stream:
+            for chunk in stream:
+                if chunk.choices:
+                    text = chunk.choices[0].delta.content
+                    if text:
+                        parts.append(text)
+                        yield 'token', {'text': text}
+                if getattr(chunk, 'usage', None):
+                    usage = {
+                        'prompt_tokens': chunk.usage.prompt_tokens,
+                        'completion_tokens': chunk.usage.completion_tokens,
+                        'total_tokens': chunk.usage.total_tokens
+                    }
+        outcome = 'success'
+    except GeneratorExit:
+        outcome = 'cancelled'  # 클라이언트가 스트리밍 도중 연결을 끊음
+        raise
+    finally:
+        record_openai_call('stream', outcome, time.perf_counter() - started, usage)
+
+    # 스트리밍이 끝까지 완료된 보고서만 저장
+    report = ''.join(parts)
+    logger.info("AI 분석 보고서 스트리밍 완료 (길이: %d자)", len(report))
+    report_cache.put(cache_key, company_info['corp_code'], REPORT_MODEL, REPORT_TEMPERATURE, report, usage)
+    yield 'done', {'cached': False, 'generated_at': datetime.now().isoformat(timespec='seconds')}
+
+def format_sse(event, data):
+    """Server-Sent Events 메시지 형식으로 변환"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def load_report_inputs(corp_code, year, report_type):
+    """AI 보고서용 기업 정보와 재무비율 조회, ((기업정보, 재무데이터, 재무비율), 오류) 반환
+
+    오류는 (메시지, HTTP 상태 코드) 튜플이다.
+    """
+    # 강화된 회사 정보 조회
+    logger.debug("기업 정보 조회 시작: %s", corp_code)
+    enhanced_company_info = get_enhanced_company_info(corp_code)
+    
+    if not enhanced_company_info:
+        return None, ('회사를 찾을 수 없습니다.', 404)
+    
+    logger.debug("기업 정보 조회 완료: %s (%s)", enhanced_company_info['corp_name'],
+                 enhanced_company_info.get('industry_classified', '업종 미분류'))
+    
+    # 비상장회사 체크
+    if not enhanced_company_info['stock_code'] or not enhanced_company_info['stock_code'].strip():
+        return None, ('비상장회사는 AI 분석 보고서를 제공하지 않습니다.', 400)
+    
+    logger.debug("재무데이터 조회 시작: %s년 %s 보고서", year, report_type)
+    
+    # 재무데이터 조회
+    financial_result = get_financial_data(corp_code, year, report_type)
+    if financial_result['status'] == 'error':
+        return None, (f'재무정보 조회 실패: {financial_result["message"]}', 400)
+        
+    financial_data = financial_result['data']
+    ratios = calculate_financial_ratios(financial_data)
+    enhanced_company_info['peer_percentiles'] = get_peer_percentiles(corp_code, year, report_type)
+    
+    logger.debug("재무비율 계산 완료: 매출액 %s, 영업이익률 %s%%", ratios.get('revenue_formatted', 'N/A'),
+                 ratios.get('operating_margin', 'N/A'))
+    return (enhanced_company_info, financial_data, ratios), None
+
+def run_report_job(corp_code, year, report_type, refresh, progress=None):
+    """작업 큐에서 실행되는 AI 보고서 생성 (스트리밍으로 받은 보고서를 progress로 넘겨 상태 조회에 표시)"""
+    try:
+        inputs, error = load_report_inputs(corp_code, year, report_type)
+    except RateLimitExceeded as e:
+        return {'status': 'error', 'message': e.message, 'retry_after': int(e.retry_after) + 1}
+    if error:
+        return {'status': 'error', 'message': error[0]}
+    enhanced_company_info, _, ratios = inputs
+
+    parts = []
+    for event, data in stream_financial_report(enhanced_company_info, ratios, refresh=refresh):
+        if event == 'token':
+            parts.append(data['text'])
+            if progress:
+                progress(''.join(parts))
+        elif event == 'error':
+            return {'status': 'error', 'message': data['message']}
+        elif event == 'done':
+            return {'status': 'success', 'report': ''.join(parts), **data}
+    return {'status': 'error', 'message': 'AI 보고서 생성이 완료되지 않았습니다.'}
+
+# AI 보고서 작업 큐 (웹 워커는 작업 등록 후 바로 응답)
+report_job_queue = ReportJobQueue(run_report_job)
+
+@app.before_request
+def prepare_worker():
+    """워커의 첫 요청에서 회사 DB 준비 (생존 확인과 지표 수집은 제외)"""
+    if request.endpoint not in ('healthz', 'metrics'):
+        ensure_company_database()
+
+@app.errorhandler(RateLimitExceeded)
+def handle_rate_limit(e):
+    """DART 호출 한도 초과 응답"""
+    logger.warning("DART 호출 한도 초과: %s (재시도 가능: %.1f초 후)", e.message, e.retry_after)
+    response = jsonify({
+        'status': 'error',
+        'error': e.message,
+        'message': e.message,
+        'retry_after': int(e.retry_after) + 1
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(int(e.retry_after) + 1)
+    return response
+
 @app.route('/')
 def index():
     """메인 페이지"""
@@ -639,13 +822,8 @@ def index():
 @app.route('/company/<corp_code>')
 def company_detail(corp_code):
     """회사 상세 페이지"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
     # 회사 기본 정보 조회
-    cursor.execute('SELECT * FROM companies WHERE corp_code = ?', (corp_code,))
-    company = cursor.fetchone()
-    conn.close()
+    company = database.get_company(corp_code)
     
     if not company:
         return "회사를 찾을 수 없습니다.", 404
@@ -653,193 +831,471 @@ def company_detail(corp_code):
     # 주식코드가 없는 회사는 재무정보 접근 불가
     if not company['stock_code'] or not company['stock_code'].strip():
         return render_template('company_detail.html', 
-                             company=dict(company), 
+                             company=company, 
                              is_unlisted=True)
     
     return render_template('company_detail.html', 
-                         company=dict(company), 
+                         company=company, 
                          is_unlisted=False)
 
 @app.route('/api/financial/<corp_code>')
 def get_company_financial(corp_code):
-    """회사 재무정보 API"""
+    """회사 재무정보 API
+
+    fields=financial_ratios,chart_data처럼 필요한 항목만 요청하면 나머지 항목은 계산하지 않는다.
+    """
     # 주식코드 확인
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM companies WHERE corp_code = ?', (corp_code,))
-    company = cursor.fetchone()
-    conn.close()
+    company = database.get_company(corp_code)
     
     if not company or not company['stock_code'] or not company['stock_code'].strip():
         return jsonify({'error': '비상장회사는 재무정보를 제공하지 않습니다.'}), 400
     
     year = request.args.get('year', '2023')
     report_type = request.args.get('report_type', '11011')  # 사업보고서
+    try:
+        fields = parse_financial_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e), 'fields': list(FINANCIAL_FIELDS)}), 400
+    peers = get_peer_percentiles(corp_code, year, report_type) if 'peer_percentiles' in fields else None
+    static = not any(field in FINANCIAL_VOLATILE_FIELDS for field in fields)
+    cache_control = http_cache.financial_cache_control(year, static=static)
+    
+    # 저장소에 있는 보고서는 저장 시각으로 ETag를 만들어 재무데이터를 읽기 전에 재검증
+    etag, last_modified = financial_etag(corp_code, year, report_type, peers, fields)
+    if etag is not None:
+        response = http_cache.not_modified(etag, last_modified, cache_control)
+        if response is not None:
+            return response
     
     # DART API에서 재무데이터 조회
     financial_result = get_financial_data(corp_code, year, report_type)
     
     if financial_result['status'] == 'error':
-        return jsonify({
-            'error': financial_result['message'],
+        error_sections = {
             'financial_ratios': {},
             'chart_data': {},
             'table_data': [],
             'raw_data': [],
+            'peer_percentiles': None,
             'ai_report': {
                 'status': 'error',
                 'message': '재무정보를 불러올 수 없어 AI 분석을 수행할 수 없습니다.'
             }
+        }
+        return jsonify({
+            'error': financial_result['message'],
+            **{field: error_sections[field] for field in fields}
         })
 
     financial_data = financial_result['data']
     
-    # 재무비율 계산
-    ratios = calculate_financial_ratios(financial_data)
-    
-    # 차트용 데이터 생성
-    chart_data = get_chart_data(financial_data)
-    
-    # 재무제표 테이블용 데이터
+    # 요청한 항목만 계산
+    sections = {
+        'financial_ratios': lambda: calculate_financial_ratios(financial_data),
+        'chart_data': lambda: get_chart_data(financial_data),
+        'table_data': lambda: get_table_data(financial_data),
+        'raw_data': lambda: financial_data.items('CFS', 'BS')[:10],  # 상위 10개만
+        'peer_percentiles': lambda: peers,
+        'ai_report': get_ai_report_status
+    }
+    payload = {field: sections[field]() for field in fields}
+    if etag is None:
+        # 방금 DART에서 받아 저장했으면 저장 시각, 저장소에 없는 보고서는 본문 내용으로 ETag 생성
+        etag, last_modified = financial_etag(corp_code, year, report_type, peers, fields)
+        if etag is None:
+            etag = http_cache.make_etag('financial', payload)
+    return http_cache.json_response(payload, etag, last_modified, cache_control)
+
+def parse_financial_fields(value):
+    """fields 파라미터(쉼표 구분)를 응답 항목 튜플로 변환, 없으면 전체 (알 수 없는 항목은 ValueError)"""
+    if not value or not value.strip():
+        return FINANCIAL_FIELDS
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip()))
+    unknown = [field for field in fields if field not in FINANCIAL_FIELDS]
+    if unknown:
+        raise ValueError(f"알 수 없는 항목입니다: {', '.join(unknown)}")
+    return fields
+
+def get_table_data(financial_data):
+    """재무제표 테이블용 데이터 (주요 계정의 세 기간 금액)"""
     table_data = []
     key_accounts = ['매출액', '영업이익', '당기순이익', '자산총계', '부채총계', '자본총계']
     
-    # 재무상태표와 손익계산서 모두에서 찾기
-    all_items = financial_data['cfs']['bs'] + financial_data['cfs']['is']
-    
+    # 재무상태표와 손익계산서 색인에서 찾기 (동의어 계정명 포함)
     for account in key_accounts:
-        for item in all_items:
-            if item.get('account_nm') == account:
-                table_data.append({
-                    'account_nm': item.get('account_nm'),
-                    'thstrm_amount': format_amount(clean_number(item.get('thstrm_amount', 0))),
-                    'frmtrm_amount': format_amount(clean_number(item.get('frmtrm_amount', 0))),
-                    'bfefrmtrm_amount': format_amount(clean_number(item.get('bfefrmtrm_amount', 0)))
-                })
-                break
-    
-    # AI 보고서 상태 확인
-    ai_report_status = {
+        if financial_data.find(account) is None:
+            continue
+        amounts = financial_data.amounts(account)
+        table_data.append({
+            'account_nm': account,
+            'thstrm_amount': format_amount(amounts['current']),
+            'frmtrm_amount': format_amount(amounts['previous']),
+            'bfefrmtrm_amount': format_amount(amounts['previous2'])
+        })
+    return table_data
+
+def get_ai_report_status():
+    """AI 보고서 사용 가능 여부"""
+    if openai_available():
+        return {
+            'status': 'enabled',
+            'message': 'AI 분석 보고서를 사용할 수 있습니다.'
+        }
+    return {
         'status': 'disabled',
         'message': 'AI 분석 보고서 기능이 현재 비활성화되어 있습니다. OpenAI API 키를 설정해주세요.'
     }
-    
-    if openai_client:
-        ai_report_status = {
-            'status': 'enabled',
-            'message': 'AI 분석 보고서를 사용할 수 있습니다.'
+
+def get_batch_executor():
+    """현재 프로세스의 일괄/다년도 조회용 스레드 풀 (gunicorn fork 이후에는 새로 생성)"""
+    global _batch_executor, _batch_executor_pid
+    pid = os.getpid()
+    if _batch_executor is None or _batch_executor_pid != pid:
+        with _batch_executor_lock:
+            if _batch_executor is None or _batch_executor_pid != pid:
+                _batch_executor = ThreadPoolExecutor(max_workers=BATCH_CONCURRENCY, thread_name_prefix='batch-financial')
+                _batch_executor_pid = pid
+    return _batch_executor
+
+def batch_item(corp_code, company, status, message=None, ratios=None, **extra):
+    """일괄 조회 결과 항목"""
+    item = {
+        'corp_code': corp_code,
+        'corp_name': company['corp_name'] if company else None,
+        'stock_code': company['stock_code'] if company else None,
+        'status': status
+    }
+    if message:
+        item['message'] = message
+    if ratios is not None:
+        item['financial_ratios'] = ratios
+    item.update(extra)
+    return item
+
+def batch_result_item(corp_code, company, financial_result):
+    """get_financial_data 결과를 일괄 조회 항목으로 변환"""
+    if financial_result['status'] == 'error':
+        return batch_item(corp_code, company, 'error', financial_result['message'])
+    return batch_item(corp_code, company, 'ok', ratios=calculate_financial_ratios(financial_result['data']))
+
+@app.route('/api/financial/batch', methods=['POST'])
+def get_financial_batch():
+    """여러 회사 재무비율 일괄 조회 API
+
+    요청 본문: {"corp_codes": [...], "year": "2023", "report_type": "11011"}
+    회사 정보는 IN 쿼리 한 번으로 읽고, 캐시/로컬 저장소에 없는 회사만 스레드 풀에서 동시에 DART를 조회한다.
+    각 항목은 자신의 status(ok, error, not_found, unlisted, timeout, rate_limited)를 가지며
+    일부 회사의 실패나 지연이 전체 응답을 실패시키지 않는다.
+    """
+    payload = request.get_json(silent=True) or {}
+    corp_codes = payload.get('corp_codes')
+    if not isinstance(corp_codes, list) or not corp_codes:
+        return jsonify({'error': 'corp_codes 목록이 필요합니다.'}), 400
+    corp_codes = list(dict.fromkeys(str(code).strip() for code in corp_codes if str(code).strip()))
+    if len(corp_codes) > BATCH_MAX_COMPANIES:
+        return jsonify({'error': f'한 번에 최대 {BATCH_MAX_COMPANIES}개 회사까지 조회할 수 있습니다.'}), 400
+
+    year = str(payload.get('year', '2023'))
+    report_type = str(payload.get('report_type', '11011'))
+    started = time.perf_counter()
+
+    companies = database.get_companies(corp_codes)
+    results = {}
+    to_fetch = []
+    for corp_code in corp_codes:
+        company = companies.get(corp_code)
+        if company is None:
+            results[corp_code] = batch_item(corp_code, None, 'not_found', '회사를 찾을 수 없습니다.')
+        elif not (company['stock_code'] or '').strip():
+            results[corp_code] = batch_item(corp_code, company, 'unlisted', '비상장회사는 재무정보를 제공하지 않습니다.')
+        else:
+            # 캐시/로컬 저장소에 있으면 바로 계산, 없으면 DART 조회 대상
+            cached = get_financial_data(corp_code, year, report_type, cached_only=True)
+            if cached is None:
+                to_fetch.append(corp_code)
+            else:
+                results[corp_code] = batch_result_item(corp_code, company, cached)
+
+    if to_fetch:
+        executor = get_batch_executor()
+        futures = {
+            executor.submit(get_financial_data, corp_code, year, report_type): corp_code
+            for corp_code in to_fetch
         }
-    
+        done, not_done = wait(futures, timeout=BATCH_TIMEOUT)
+        for future in done:
+            corp_code = futures[future]
+            company = companies[corp_code]
+            try:
+                results[corp_code] = batch_result_item(corp_code, company, future.result())
+            except RateLimitExceeded as e:
+                results[corp_code] = batch_item(corp_code, company, 'rate_limited', e.message,
+                                                retry_after=int(e.retry_after) + 1)
+            except Exception as e:
+                logger.warning("일괄 조회 오류 (%s): %s", corp_code, e)
+                results[corp_code] = batch_item(corp_code, company, 'error', '재무정보를 처리하는 중 오류가 발생했습니다.')
+        for future in not_done:
+            # 아직 시작하지 않은 조회는 취소 (진행 중인 조회는 끝나면 캐시에 남아 다음 요청에서 사용)
+            future.cancel()
+            corp_code = futures[future]
+            results[corp_code] = batch_item(corp_code, companies[corp_code], 'timeout',
+                                            f'{BATCH_TIMEOUT:g}초 안에 재무정보를 가져오지 못했습니다.')
+
+    items = [results[corp_code] for corp_code in corp_codes]
+    counts = {}
+    for item in items:
+        counts[item['status']] = counts.get(item['status'], 0) + 1
     return jsonify({
-        'financial_ratios': ratios,
-        'chart_data': chart_data,
-        'table_data': table_data,
-        'raw_data': financial_data['cfs']['bs'][:10],  # 상위 10개만
-        'ai_report': ai_report_status
+        'year': year,
+        'report_type': report_type,
+        'count': len(items),
+        'status_counts': counts,
+        'fetched': len(to_fetch),
+        'results': items,
+        'took_ms': round((time.perf_counter() - started) * 1000, 1)
+    })
+
+def fetch_history_reports(corp_code, bsns_years, report_type):
+    """여러 사업연도 보고서를 동시에 조회, ({사업연도: FinancialStatements}, {사업연도: 오류 메시지}, 한도 초과 예외)"""
+    executor = get_batch_executor()
+    futures = {
+        executor.submit(get_financial_data, corp_code, str(year), report_type): year
+        for year in bsns_years
+    }
+    statements = {}
+    errors = {}
+    rate_limited = None
+    for future, year in futures.items():
+        try:
+            result = future.result()
+        except RateLimitExceeded as e:
+            rate_limited = e
+            errors[year] = e.message
+            continue
+        if result['status'] == 'success':
+            statements[year] = result['data']
+        else:
+            errors[year] = result['message']
+    return statements, errors, rate_limited
+
+@app.route('/api/financial/<corp_code>/history')
+def get_financial_history(corp_code):
+    """다년도 재무 이력 API (주요 계정의 연도별 금액, 기본 10년)
+
+    보고서 하나가 3년(당기·전기·전전기)을 포함하므로 3년 간격의 사업연도만 동시에 조회하고,
+    빠진 연도가 있으면(미제출 보고서 등) 한 번 더 보충 조회한다.
+    같은 연도가 여러 보고서에 있으면 가장 최근 보고서의 재작성 값을 사용한다.
+    """
+    company = database.get_company(corp_code)
+    if not company or not company['stock_code'] or not company['stock_code'].strip():
+        return jsonify({'error': '비상장회사는 재무정보를 제공하지 않습니다.'}), 400
+
+    try:
+        end_year = int(request.args.get('year', '2023'))
+    except ValueError:
+        return jsonify({'error': 'year는 사업연도(숫자)여야 합니다.'}), 400
+    years = max(1, min(HISTORY_MAX_YEARS, request.args.get('years', HISTORY_DEFAULT_YEARS, type=int)))
+    report_type = request.args.get('report_type', '11011')
+    started = time.perf_counter()
+
+    fetch_years = history_fetch_years(end_year, years)
+    statements, errors, rate_limited = fetch_history_reports(corp_code, fetch_years, report_type)
+
+    # 받지 못한 보고서가 채웠어야 할 연도는 그 이전 사업연도 보고서로 보충
+    covered = set(errors)
+    for year in statements:
+        covered.update(range(year - 2, year + 1))
+    retry_years = [year for year in history_fetch_years(end_year, years, covered) if year not in fetch_years]
+    if retry_years and rate_limited is None:
+        more_statements, more_errors, rate_limited = fetch_history_reports(corp_code, retry_years, report_type)
+        statements.update(more_statements)
+        errors.update(more_errors)
+
+    if not statements and rate_limited is not None:
+        raise rate_limited
+
+    merged = merge_history(statements, HISTORY_ACCOUNTS)
+    year_range = list(range(end_year - years + 1, end_year + 1))
+    series = {}
+    sources = {}
+    for account, values in merged.items():
+        series[account] = [values[year][0] if year in values else None for year in year_range]
+        sources[account] = [values[year][1] if year in values else None for year in year_range]
+
+    requested = sorted(fetch_years + retry_years, reverse=True)
+    return jsonify({
+        'corp_code': corp_code,
+        'corp_name': company['corp_name'],
+        'report_type': report_type,
+        'unit': 'KRW',
+        'years': year_range,
+        'series': series,
+        'sources': sources,
+        'reports': {str(year): 'ok' if year in statements else errors.get(year) for year in requested},
+        'took_ms': round((time.perf_counter() - started) * 1000, 1)
     })
 
 @app.route('/api/financial/<corp_code>/ai_report')
 def get_ai_report(corp_code):
     """AI 분석 보고서 생성 API"""
     try:
-        # 강화된 회사 정보 조회
-        print(f"🔍 기업 정보 조회 시작: {corp_code}", flush=True)
-        enhanced_company_info = get_enhanced_company_info(corp_code)
-        
-        if not enhanced_company_info:
-            return jsonify({
-                'status': 'error',
-                'message': '회사를 찾을 수 없습니다.'
-            }), 404
-        
-        print(f"✅ 기업 정보 조회 완료: {enhanced_company_info['corp_name']} ({enhanced_company_info.get('industry_classified', '업종 미분류')})", flush=True)
-        
-        # 비상장회사 체크
-        if not enhanced_company_info['stock_code'] or not enhanced_company_info['stock_code'].strip():
-            return jsonify({
-                'status': 'error',
-                'message': '비상장회사는 AI 분석 보고서를 제공하지 않습니다.'
-            }), 400
-        
         year = request.args.get('year', '2023')
         report_type = request.args.get('report_type', '11011')
         
-        print(f"📊 재무데이터 조회 시작: {year}년 {report_type} 보고서", flush=True)
-        
-        # 재무데이터 조회
-        financial_result = get_financial_data(corp_code, year, report_type)
-        if financial_result['status'] == 'error':
+        inputs, error = load_report_inputs(corp_code, year, report_type)
+        if error:
+            message, status_code = error
             return jsonify({
                 'status': 'error',
-                'message': f'재무정보 조회 실패: {financial_result["message"]}'
-            }), 400
-            
-        financial_data = financial_result['data']
-        ratios = calculate_financial_ratios(financial_data)
-        
-        print(f"💰 재무비율 계산 완료: 매출액 {ratios.get('revenue_formatted', 'N/A')}, 영업이익률 {ratios.get('operating_margin', 'N/A')}%", flush=True)
+                'message': message
+            }), status_code
+        enhanced_company_info, financial_data, ratios = inputs
         
         # 강화된 기업 정보로 AI 보고서 생성
-        print(f"🤖 AI 분석 보고서 생성 시작...", flush=True)
-        ai_report = generate_financial_report(enhanced_company_info, financial_data, ratios)
+        logger.debug("AI 분석 보고서 생성 시작: %s", corp_code)
+        refresh = request.args.get('refresh') == '1'
+        ai_report = generate_financial_report(enhanced_company_info, financial_data, ratios, refresh=refresh)
         
         if ai_report['status'] == 'success':
-            print(f"✅ AI 분석 보고서 생성 완료 (길이: {len(ai_report.get('report', ''))}자)", flush=True)
+            logger.info("AI 분석 보고서 생성 완료 (길이: %d자)", len(ai_report.get('report', '')))
         else:
-            print(f"❌ AI 분석 보고서 생성 실패: {ai_report.get('message', 'Unknown error')}", flush=True)
+            logger.warning("AI 분석 보고서 생성 실패: %s", ai_report.get('message', 'Unknown error'))
         
         return jsonify(ai_report)
         
+    except RateLimitExceeded:
+        raise
     except Exception as e:
-        print(f"AI 보고서 API 오류: {e}", flush=True)
+        logger.exception("AI 보고서 API 오류: %s", e)
         return jsonify({
             'status': 'error',
             'message': 'AI 보고서 생성 중 서버 오류가 발생했습니다.'
         }), 500
 
+@app.route('/api/financial/<corp_code>/ai_report', methods=['POST'])
+def submit_ai_report_job(corp_code):
+    """AI 분석 보고서 생성 작업 등록 API"""
+    params = request.get_json(silent=True) or {}
+    year = str(params.get('year') or request.args.get('year', '2023'))
+    report_type = str(params.get('report_type') or request.args.get('report_type', '11011'))
+    refresh = params.get('refresh') in (True, 1, '1') or request.args.get('refresh') == '1'
+    
+    try:
+        job = report_job_queue.submit(corp_code, year, report_type, refresh=refresh)
+    except QueueFull as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 503
+    
+    logger.info("AI 보고서 작업 등록: %s (%s, %s년 %s)", job['job_id'], corp_code, year, report_type)
+    response = jsonify({
+        **job,
+        'poll_url': f"/api/financial/{corp_code}/ai_report/{job['job_id']}"
+    })
+    response.status_code = 202
+    return response
+
+@app.route('/api/financial/<corp_code>/ai_report/<job_id>')
+def get_ai_report_job(corp_code, job_id):
+    """AI 분석 보고서 작업 상태 조회 API"""
+    job = report_job_queue.get(job_id)
+    if not job or job['corp_code'] != corp_code:
+        return jsonify({'status': 'error', 'message': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify(job)
+
+@app.route('/api/financial/<corp_code>/ai_report/stream')
+def stream_ai_report(corp_code):
+    """AI 분석 보고서 스트리밍 API (Server-Sent Events)"""
+    year = request.args.get('year', '2023')
+    report_type = request.args.get('report_type', '11011')
+    refresh = request.args.get('refresh') == '1'
+
+    def generate():
+        # 첫 이벤트를 바로 보내 재무데이터 조회 중에도 연결이 열려 있음을 알림
+        yield format_sse('status', {'message': '재무정보를 불러오고 있습니다...'})
+        try:
+            inputs, error = load_report_inputs(corp_code, year, report_type)
+            if error:
+                yield format_sse('error', {'message': error[0]})
+                return
+            enhanced_company_info, _, ratios = inputs
+
+            yield format_sse('status', {'message': 'AI 분석 보고서를 생성하고 있습니다...'})
+            for event, data in stream_financial_report(enhanced_company_info, ratios, refresh=refresh):
+                yield format_sse(event, data)
+        except RateLimitExceeded as e:
+            yield format_sse('error', {'message': e.message, 'retry_after': int(e.retry_after) + 1})
+        except Exception as e:
+            logger.exception("AI 보고서 스트리밍 오류: %s", e)
+            yield format_sse('error', {'message': f'AI 보고서 생성 중 오류가 발생했습니다: {str(e)}'})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/api/companies')
 def get_companies():
-    """회사 목록 API"""
+    """회사 목록 API
+
+    cursor 파라미터가 있으면 키셋 페이지네이션(next_cursor 반환, 전체 개수는 include_total=1일 때만),
+    없으면 page 번호 기반 페이지네이션을 사용한다.
+    """
     page = int(request.args.get('page', 1))
     per_page = int(request.args.get('per_page', 20))
     search = request.args.get('search', '')
+    cursor_param = request.args.get('cursor')
     
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 검색 조건에 따라 전체 개수 먼저 조회
-    if search:
-        # 전체 검색 결과 수
-        count_query = '''
-        SELECT COUNT(*) FROM companies 
-        WHERE corp_name LIKE ? OR corp_code LIKE ? OR stock_code LIKE ?
-        '''
-        search_term = f'%{search}%'
-        cursor.execute(count_query, (search_term, search_term, search_term))
-        total = cursor.fetchone()[0]
-        
-        # 페이지네이션된 검색 결과
-        query = '''
-        SELECT * FROM companies 
-        WHERE corp_name LIKE ? OR corp_code LIKE ? OR stock_code LIKE ?
-        ORDER BY corp_name
-        LIMIT ? OFFSET ?
-        '''
-        cursor.execute(query, (search_term, search_term, search_term, per_page, (page-1)*per_page))
-    else:
-        # 전체 회사 수
-        cursor.execute('SELECT COUNT(*) FROM companies')
-        total = cursor.fetchone()[0]
-        
-        # 페이지네이션된 전체 결과
-        query = 'SELECT * FROM companies ORDER BY corp_name LIMIT ? OFFSET ?'
-        cursor.execute(query, (per_page, (page-1)*per_page))
+    # 회사 목록은 회사 정보를 적재할 때(통계 스냅샷 버전이 바뀔 때)만 달라짐
+    stats = company_stats.get_stats(get_db_connection)
+    etag = None
+    if stats.get('version') is not None:
+        etag = http_cache.make_etag('companies', stats['version'], company_search_fts_ready,
+                                    sorted(request.args.items(multi=True)))
+        response = http_cache.not_modified(etag, stats['refreshed_at'])
+        if response is not None:
+            return response
     
-    companies = [dict(row) for row in cursor.fetchall()]
+    def companies_response(payload):
+        return http_cache.json_response(payload, etag or http_cache.make_etag('companies', payload),
+                                        stats.get('refreshed_at'))
     
-    conn.close()
+    conn = get_db_connection()
+    use_fts = company_search_fts_ready
     
-    return jsonify({
+    try:
+        if cursor_param is not None:
+            # 키셋 페이지네이션: (회사명, 기업코드) 커서 이후부터 조회
+            try:
+                if search:
+                    companies, next_cursor = search_companies_after(conn, search, per_page, cursor_param, use_fts=use_fts)
+                else:
+                    companies, next_cursor = list_companies_after(conn, per_page, cursor_param)
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            result = {
+                'companies': companies,
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }
+            if request.args.get('include_total') == '1':
+                result['total'] = count_companies(conn, search, use_fts)
+            return companies_response(result)
+        
+        if search:
+            # 전문 검색 인덱스(FTS5 trigram)로 검색, 정확/접두 일치 우선 정렬
+            companies, total = search_companies(conn, search, per_page, (page-1)*per_page, use_fts=use_fts)
+        else:
+            # 전체 회사 수 (워커별 캐시)
+            total = count_companies(conn)
+            
+            # 페이지네이션된 전체 결과
+            query = 'SELECT * FROM companies ORDER BY corp_name, corp_code LIMIT ? OFFSET ?'
+            with metrics.timer('db_query_duration_seconds', db='companies', operation='list_companies'):
+                companies = [dict(row) for row in conn.execute(query, (per_page, (page-1)*per_page)).fetchall()]
+    finally:
+        conn.close()
+    
+    return companies_response({
         'companies': companies,
         'total': total,
         'page': page,
@@ -847,69 +1303,152 @@ def get_companies():
         'total_pages': (total + per_page - 1) // per_page
     })
 
+@app.route('/api/companies/autocomplete')
+def autocomplete_companies():
+    """회사명 자동완성 API (회사명/초성/영문명/주식코드 접두어, 상장사 우선)"""
+    query = request.args.get('q', '').strip()
+    limit = request.args.get('limit', 10, type=int)
+    if not query:
+        return jsonify({'query': query, 'suggestions': []})
+    
+    if not ensure_autocomplete_index():
+        return jsonify({'error': '자동완성 인덱스를 준비하지 못했습니다.'}), 503
+    
+    started = time.perf_counter()
+    suggestions = company_autocomplete.suggest(query, limit)
+    return jsonify({
+        'query': query,
+        'suggestions': suggestions,
+        'took_ms': round((time.perf_counter() - started) * 1000, 3)
+    })
+
 @app.route('/api/company/<corp_code>')
 def get_company(corp_code):
     """특정 회사 정보 API"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM companies WHERE corp_code = ?', (corp_code,))
-    company = cursor.fetchone()
-    
-    conn.close()
+    company = database.get_company(corp_code)
     
     if company:
-        return jsonify(dict(company))
+        # 회사 정보는 DART 변경일(modify_date)이 바뀔 때만 달라짐
+        etag = http_cache.make_etag('company', corp_code, company.get('modify_date'))
+        return http_cache.json_response(company, etag, http_cache.modify_date_timestamp(company.get('modify_date')))
     else:
         return jsonify({'error': '회사를 찾을 수 없습니다'}), 404
 
 @app.route('/api/stats')
 def get_stats():
-    """통계 정보 API"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # 전체 회사 수
-    cursor.execute('SELECT COUNT(*) FROM companies')
-    total_companies = cursor.fetchone()[0]
-    
-    # 실제 상장회사 수 (주식코드가 있는 회사)
-    cursor.execute("SELECT COUNT(*) FROM companies WHERE LENGTH(TRIM(COALESCE(stock_code, ''))) > 0")
-    listed_companies = cursor.fetchone()[0]
-    
-    # 비상장회사 수
-    unlisted_companies = total_companies - listed_companies
-    
-    # 최근 수정된 회사들
-    cursor.execute('''
-    SELECT corp_name, modify_date 
-    FROM companies 
-    WHERE modify_date IS NOT NULL 
-    ORDER BY modify_date DESC 
-    LIMIT 10
-    ''')
-    recent_updates = [dict(row) for row in cursor.fetchall()]
-    
-    # 주요 상장회사 샘플
-    cursor.execute('''
-    SELECT corp_name, stock_code 
-    FROM companies 
-    WHERE LENGTH(TRIM(COALESCE(stock_code, ''))) > 0
-    ORDER BY corp_name
-    LIMIT 10
-    ''')
-    sample_listed = [dict(row) for row in cursor.fetchall()]
-    
-    conn.close()
-    
+    """통계 정보 API (회사 정보 적재 시 갱신되는 스냅샷, 워커별 캐시)"""
+    stats = company_stats.get_stats(get_db_connection)
+    # 스냅샷이 없어 직접 계산한 통계는 버전이 없으므로 내용으로 ETag 생성
+    etag = http_cache.make_etag('stats', stats.get('version') or stats)
+    return http_cache.json_response(stats, etag, stats.get('refreshed_at'))
+
+def load_listed_corp_codes():
+    """상장사 기업코드 집합 (스크리너 대상)"""
+    with get_db_connection() as conn:
+        return {row[0] for row in conn.execute('SELECT corp_code FROM companies WHERE is_listed = 1')}
+
+@app.route('/api/screener')
+def screen_companies():
+    """상장사 재무비율 스크리너 API
+
+    ?filter=roe>15 AND debt_ratio<100&sort=-roe&limit=50&offset=0&year=2023&report_type=11011
+    로컬 재무제표 저장소에 있는 상장사 전체를 대상으로 하며, 비율은 워커별로 캐시한 배열에서 계산한다.
+    """
+    year = request.args.get('year', '2023')
+    report_type = request.args.get('report_type', '11011')
+    sort = request.args.get('sort', '').strip() or None
+    limit = max(1, min(SCREENER_MAX_LIMIT, request.args.get('limit', 50, type=int)))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    started = time.perf_counter()
+
+    try:
+        conditions = ratio_engine.parse_filter(request.args.get('filter', ''))
+        table = ratio_engine.get_table(year, report_type, universe=load_listed_corp_codes)
+        positions, total = table.screen(conditions, sort, limit, offset)
+    except ratio_engine.ScreenerError as e:
+        return jsonify({'error': str(e), 'fields': ratio_engine.field_names()}), 400
+
+    # 기본 비율 + 조건/정렬에 쓴 필드
+    fields = list(dict.fromkeys(
+        [*SCREENER_DEFAULT_FIELDS, *(field for field, _, _ in conditions), *([sort.lstrip('-+')] if sort else [])]
+    ))
+    corp_codes = [table.corp_codes[position] for position in positions]
+    companies = database.get_companies(corp_codes)
+    results = []
+    for corp_code, position in zip(corp_codes, positions):
+        company = companies.get(corp_code) or {}
+        results.append({
+            'corp_code': corp_code,
+            'corp_name': company.get('corp_name'),
+            'stock_code': company.get('stock_code'),
+            **table.row(position, fields)
+        })
+
     return jsonify({
-        'total_companies': total_companies,
-        'listed_companies': listed_companies,
-        'unlisted_companies': unlisted_companies,
-        'recent_updates': recent_updates,
-        'sample_listed': sample_listed
+        'year': year,
+        'report_type': report_type,
+        'filter': request.args.get('filter', ''),
+        'sort': sort,
+        'universe': len(table),
+        'total': total,
+        'offset': offset,
+        'limit': limit,
+        'results': results,
+        'took_ms': round((time.perf_counter() - started) * 1000, 2)
     })
 
+@app.route('/api/dart/quota')
+def get_dart_quota():
+    """DART 호출 한도 및 응답 시간 API"""
+    return jsonify({
+        'quota': dart_rate_limiter.status(),
+        'latency': dart_client.latency_stats()
+    })
+
+@app.route('/healthz')
+def healthz():
+    """생존 확인 (의존성을 확인하지 않고 바로 응답)"""
+    response = jsonify({'status': 'ok', 'pid': os.getpid(), 'uptime': round(time.time() - STARTED_AT, 1)})
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.route('/readyz')
+def readyz():
+    """준비 상태 확인 (회사 DB는 필수, DART/OpenAI/자동완성은 상태만 보고, 외부 API는 호출하지 않음)"""
+    checks = {}
+    try:
+        conn = get_db_connection()
+        try:
+            conn.execute('SELECT 1 FROM companies LIMIT 1').fetchone()
+        finally:
+            conn.close()
+        checks['database'] = {'status': 'ok', 'search_fts': company_search_fts_ready}
+    except sqlite3.Error as e:
+        checks['database'] = {'status': 'error', 'error': str(e)}
+
+    checks['autocomplete'] = {'status': 'ok' if company_autocomplete.ready else 'building'}
+
+    dart = {'status': 'ok' if DART_API_KEY else 'missing_key'}
+    try:
+        dart['quota'] = dart_rate_limiter.status()
+    except sqlite3.Error as e:
+        dart.update(status='error', error=str(e))
+    checks['dart'] = dart
+
+    if not OPENAI_API_KEY:
+        checks['openai'] = {'status': 'missing_key'}
+    elif _openai['error']:
+        checks['openai'] = {'status': 'error', 'error': _openai['error']}
+    else:
+        # 클라이언트는 첫 AI 보고서 요청에서 생성
+        checks['openai'] = {'status': 'ok' if _openai['client'] else 'not_initialized'}
+
+    ready = checks['database']['status'] == 'ok'
+    response = jsonify({'status': 'ready' if ready else 'not_ready', 'checks': checks})
+    response.status_code = 200 if ready else 503
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
     app.run(host='0.0.0.0', port=port) 
\ No newline at end of file
@@ -0,0 +1,314 @@
+"""재무제표 일괄 적재 (DART 다중회사 주요계정 API, 한 번에 최대 100개 회사)
+
+companies.db의 회사를 100개씩 묶어 fnlttMultiAcnt를 병렬로 호출하고, 결과를 회사별로 나눠
+재무제표 로컬 저장소(financials.db)에 저장한다. 호출은 앱과 같은 토큰 버킷(dart_quota.db)을 사용해
+DART 호출 한도를 함께 지킨다.
+
+사업연도마다 새로 저장한 회사가 있으면 업종 백분위(industry_peers)도 갱신한다.
+처리한 회사는 backfill_progress 테이블에 기록하므로 중단되어도 다시 실행하면 남은 회사부터 이어서 적재한다.
+--record로 DART 응답을 파일로 남기고 --replay로 그 파일만 사용해 DART 없이 같은 적재를 재현할 수 있다.
+
+사용법:
+    python backfill_financials.py --years 2023 2022                 # 상장사, 사업보고서
+    python backfill_financials.py --years 2023 --record fixtures/   # 응답 기록
+    python backfill_financials.py --years 2023 --replay fixtures/   # 기록된 응답으로 재현 (DART 호출 없음)
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+import financial_store
+import industry_peers
+from dart_client import DART_API_BASE_URL, DART_STATUS_CODES, DartClient, DartResult
+from database import get_db_path
+from rate_limiter import RateLimitExceeded, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+MULTI_ACCOUNT_ENDPOINT = 'fnlttMultiAcnt.json'
+MAX_CORPS_PER_CALL = 100  # DART 다중회사 API의 corp_code 최대 개수
+DEFAULT_WORKERS = 4
+RATE_WAIT = 60  # 토큰 대기 최대 시간(초), 앱 요청과 달리 일괄 적재는 기다려도 됨
+
+REPORT_CODES = {
+    '11011': '사업보고서',
+    '11012': '반기보고서',
+    '11013': '1분기보고서',
+    '11014': '3분기보고서'
+}
+
+# 응답은 있었지만 이 회사 데이터가 없었음 (다시 요청하지 않음)
+STATUS_SAVED = 'saved'
+STATUS_NO_DATA = 'nodata'
+
+
+class ReplayMissing(Exception):
+    """--replay 디렉터리에 해당 요청의 기록이 없음"""
+
+
+class ResponseRecorder:
+    """DART 응답을 요청별 JSON 파일로 기록하거나 (record) 기록된 파일로 응답 (replay)
+
+    파일 이름은 엔드포인트와 파라미터(인증키 제외)로 정해지므로 같은 요청은 항상 같은 파일을 사용한다.
+    """
+
+    def __init__(self, directory, client=None):
+        self.directory = directory
+        self.client = client  # None이면 replay
+        if client is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, endpoint, params):
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+        name = endpoint.replace('.json', '')
+        return os.path.join(self.directory, f"{name}_{params.get('bsns_year')}_{params.get('reprt_code')}_{digest}.json")
+
+    def get(self, endpoint, params):
+        path = self._path(endpoint, params)
+        if self.client is None:
+            if not os.path.exists(path):
+                raise ReplayMissing(f'기록된 응답이 없습니다: {path}')
+            with open(path, encoding='utf-8') as f:
+                recorded = json.load(f)
+            return DartResult(recorded['response'], 0.0, 1, 200)
+
+        result = self.client.get(endpoint, params)
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'endpoint': endpoint, 'params': params, 'response': result.data},
+                      f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return result
+
+
+def _connect_progress():
+    """진행 기록 테이블 (financials.db 안에 저장)"""
+    conn = sqlite3.connect(financial_store.get_store_path(), timeout=10)
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS backfill_progress (
+        bsns_year TEXT NOT NULL,
+        reprt_code TEXT NOT NULL,
+        corp_code TEXT NOT NULL,
+        status TEXT NOT NULL,
+        finished_at REAL NOT NULL,
+        PRIMARY KEY (bsns_year, reprt_code, corp_code)
+    ) WITHOUT ROWID
+    ''')
+    conn.commit()
+    return conn
+
+
+def load_companies(db_path, listed_only=True, corp_codes=None):
+    """적재 대상 회사 {corp_code: stock_code} (기업코드 순)"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        query = 'SELECT corp_code, stock_code FROM companies'
+        conditions = []
+        params = []
+        if listed_only:
+            conditions.append('is_listed = 1')
+        if corp_codes:
+            conditions.append(f"corp_code IN ({','.join('?' * len(corp_codes))})")
+            params.extend(corp_codes)
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        rows = conn.execute(query + ' ORDER BY corp_code', params).fetchall()
+    finally:
+        conn.close()
+    return {corp_code: (stock_code or '').strip() for corp_code, stock_code in rows}
+
+
+def pending_companies(progress_conn, companies, bsns_year, reprt_code):
+    """아직 처리하지 않은 회사 목록"""
+    done = {row[0] for row in progress_conn.execute(
+        'SELECT corp_code FROM backfill_progress WHERE bsns_year = ? AND reprt_code = ?',
+        (bsns_year, reprt_code)
+    )}
+    return [corp_code for corp_code in companies if corp_code not in done]
+
+
+def split_by_company(items, companies, corp_codes):
+    """다중회사 응답 항목을 회사별로 나눔 (corp_code가 없는 항목은 stock_code로 찾음)"""
+    by_stock = {companies[corp_code]: corp_code for corp_code in corp_codes if companies.get(corp_code)}
+    grouped = {corp_code: [] for corp_code in corp_codes}
+    for item in items:
+        corp_code = item.get('corp_code') or by_stock.get((item.get('stock_code') or '').strip())
+        if corp_code in grouped:
+            grouped[corp_code].append(item)
+    return grouped
+
+
+def fetch_chunk(client, corp_codes, bsns_year, reprt_code):
+    """회사 묶음 하나의 다중회사 주요계정 조회"""
+    return client.get(MULTI_ACCOUNT_ENDPOINT, {
+        'corp_code': ','.join(corp_codes),
+        'bsns_year': bsns_year,
+        'reprt_code': reprt_code
+    })
+
+
+def save_chunk(progress_conn, result, companies, corp_codes, bsns_year, reprt_code):
+    """응답을 회사별로 저장하고 진행 기록, (저장한 회사 수, 데이터 없는 회사 수) 반환"""
+    grouped = split_by_company(result.data.get('list', []) if result.status == '000' else [],
+                               companies, corp_codes)
+    saved = 0
+    progress = []
+    now = time.time()
+    for corp_code, items in grouped.items():
+        if items:
+            financial_store.save_report(corp_code, bsns_year, reprt_code,
+                                        {'status': '000', 'message': '정상', 'list': items})
+            saved += 1
+        progress.append((bsns_year, reprt_code, corp_code, STATUS_SAVED if items else STATUS_NO_DATA, now))
+
+    progress_conn.executemany('INSERT OR REPLACE INTO backfill_progress VALUES (?, ?, ?, ?, ?)', progress)
+    progress_conn.commit()
+    return saved, len(corp_codes) - saved
+
+
+def backfill(client, companies, bsns_year, reprt_code, workers=DEFAULT_WORKERS,
+             chunk_size=MAX_CORPS_PER_CALL, progress_conn=None):
+    """한 사업연도·보고서의 남은 회사를 적재, 결과 요약 반환
+
+    묶음별 조회는 스레드 풀에서 병렬로 하고, 저장과 진행 기록은 호출한 스레드에서만 한다.
+    일일 호출 한도를 넘으면 남은 묶음을 취소하고 지금까지의 진행을 남긴 채 멈춘다.
+    """
+    own_conn = progress_conn is None
+    progress_conn = progress_conn or _connect_progress()
+    started = time.perf_counter()
+    summary = {'bsns_year': bsns_year, 'reprt_code': reprt_code, 'calls': 0, 'saved': 0,
+               'no_data': 0, 'failed': 0, 'stopped': None}
+    try:
+        pending = pending_companies(progress_conn, companies, bsns_year, reprt_code)
+        summary['pending'] = len(pending)
+        chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+        cancel = threading.Event()
+
+        def run(corp_codes):
+            if cancel.is_set():
+                return None
+            return fetch_chunk(client, corp_codes, bsns_year, reprt_code)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run, chunk): chunk for chunk in chunks}
+            for future in as_completed(futures):
+                corp_codes = futures[future]
+                try:
+                    result = future.result()
+                except RateLimitExceeded as e:
+                    if not cancel.is_set():
+                        cancel.set()
+                        summary['stopped'] = e.message
+                    summary['failed'] += len(corp_codes)
+                    continue
+                except Exception as e:
+                    logger.warning("묶음 조회 실패 (%s~%s): %s: %s", corp_codes[0], corp_codes[-1], type(e).__name__, e)
+                    summary['failed'] += len(corp_codes)
+                    continue
+                if result is None:
+                    summary['failed'] += len(corp_codes)
+                    continue
+
+                summary['calls'] += 1
+                if result.status not in ('000', '013'):
+                    # 요청 제한/점검 등은 진행 기록을 남기지 않아 다음 실행에서 다시 시도
+                    logger.warning("DART 상태 %s (%s): %s~%s", result.status,
+                                   DART_STATUS_CODES.get(result.status, '알 수 없는 상태'), corp_codes[0], corp_codes[-1])
+                    summary['failed'] += len(corp_codes)
+                    continue
+
+                saved, no_data = save_chunk(progress_conn, result, companies, corp_codes, bsns_year, reprt_code)
+                summary['saved'] += saved
+                summary['no_data'] += no_data
+                done = summary['saved'] + summary['no_data']
+                logger.info(f"[{bsns_year} {reprt_code}] {done:,}/{len(pending):,}개 회사 처리 "
+                            f"(저장 {summary['saved']:,}, 데이터 없음 {summary['no_data']:,})")
+    finally:
+        if own_conn:
+            progress_conn.close()
+
+    summary['seconds'] = time.perf_counter() - started
+    return summary
+
+
+def reset_progress(bsns_years, reprt_code):
+    """진행 기록 삭제 (처음부터 다시 적재)"""
+    conn = _connect_progress()
+    try:
+        conn.executemany('DELETE FROM backfill_progress WHERE bsns_year = ? AND reprt_code = ?',
+                         [(year, reprt_code) for year in bsns_years])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description='DART 다중회사 주요계정 API로 재무제표 일괄 적재')
+    parser.add_argument('--years', nargs='+', default=[str(datetime.now().year - 1)], help='사업연도 (기본: 작년)')
+    parser.add_argument('--reprt-code', default='11011', choices=sorted(REPORT_CODES), help='보고서 코드')
+    parser.add_argument('--db', default=None, help='기업코드 DB (기본: DATA_PATH의 companies.db)')
+    parser.add_argument('--all', action='store_true', help='비상장 회사 포함')
+    parser.add_argument('--corp-codes', nargs='+', help='지정한 회사만 적재')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='동시 호출 수')
+    parser.add_argument('--chunk-size', type=int, default=MAX_CORPS_PER_CALL, help='호출당 회사 수 (최대 100)')
+    parser.add_argument('--restart', action='store_true', help='진행 기록을 지우고 처음부터 적재')
+    parser.add_argument('--base-url', default=DART_API_BASE_URL, help='DART API 주소')
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument('--record', metavar='DIR', help='DART 응답을 DIR에 기록')
+    recording.add_argument('--replay', metavar='DIR', help='DIR에 기록된 응답만 사용 (DART 호출 없음)')
+    args = parser.parse_args()
+
+    if not 1 <= args.chunk_size <= MAX_CORPS_PER_CALL:
+        parser.error(f'--chunk-size는 1~{MAX_CORPS_PER_CALL} 사이여야 합니다.')
+
+    if args.replay:
+        client = ResponseRecorder(args.replay)
+    else:
+        api_key = os.getenv('DART_API_KEY')
+        if not api_key:
+            print("DART_API_KEY 환경변수가 필요합니다. (--replay는 필요 없음)")
+            return
+        client = DartClient(api_key, args.base_url,
+                            rate_limiter=TokenBucket('dart', max_wait=RATE_WAIT))
+        if args.record:
+            client = ResponseRecorder(args.record, client)
+
+    db_path = args.db or get_db_path()
+    if not os.path.exists(db_path):
+        print(f"기업코드 DB를 찾을 수 없습니다: {db_path}")
+        return
+    companies = load_companies(db_path, listed_only=not args.all, corp_codes=args.corp_codes)
+    print(f"적재 대상: {len(companies):,}개 회사, 사업연도 {', '.join(args.years)}, "
+          f"{REPORT_CODES[args.reprt_code]}({args.reprt_code})")
+
+    if args.restart:
+        reset_progress(args.years, args.reprt_code)
+
+    for bsns_year in args.years:
+        summary = backfill(client, companies, bsns_year, args.reprt_code, args.workers, args.chunk_size)
+        print(f"[{bsns_year} {args.reprt_code}] 완료: 호출 {summary['calls']:,}회, 저장 {summary['saved']:,}, "
+              f"데이터 없음 {summary['no_data']:,}, 실패 {summary['failed']:,} "
+              f"(대상 {summary['pending']:,}, {summary['seconds']:.1f}초)")
+        if summary['saved']:
+            peers = industry_peers.refresh(bsns_year, args.reprt_code, industry_peers.load_listed_companies(db_path))
+            print(f"업종 백분위 갱신: 업종 {peers['groups']:,}개, 회사 {peers['companies']:,}개 ({peers['seconds']:.2f}초)")
+        if summary['stopped']:
+            print(f"중단: {summary['stopped']} 다시 실행하면 남은 회사부터 이어서 적재합니다.")
+            break
+        if summary['failed']:
+            print("실패한 회사는 다시 실행하면 재시도합니다.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""회사 검색 벤치마크: LIKE 전체 스캔 vs FTS5 trigram 인덱스
+
+사용법:
+    python bench_company_search.py                 # 합성 데이터 20,000건
+    python bench_company_search.py --db companies.db
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from company_search import ensure_search_index, search_companies
+
+NAME_PARTS = ['삼성', '현대', '엘지', '에스케이', '한국', '대한', '동양', '신한', '롯데', '포스코',
+              '전자', '화학', '건설', '중공업', '제약', '바이오', '증권', '생명', '물산', '반도체',
+              '테크', '시스템', '에너지', '홀딩스', '솔루션', '네트웍스', '글로벌', '산업']
+ENG_PARTS = ['SAMSUNG', 'HYUNDAI', 'LG', 'SK', 'KOREA', 'DAEHAN', 'TECH', 'CHEM', 'BIO', 'ENERGY',
+             'HOLDINGS', 'SYSTEMS', 'GLOBAL', 'INDUSTRIES']
+
+QUERIES = ['삼성전자', '중공업', '바이오', 'HOLDINGS', '00126', '005930']
+
+
+def build_synthetic_db(path, rows):
+    """합성 companies 테이블 생성"""
+    random.seed(42)
+    conn = sqlite3.connect(path)
+    conn.execute('''
+    CREATE TABLE companies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        corp_code TEXT UNIQUE,
+        corp_name TEXT,
+        corp_name_eng TEXT,
+        stock_code TEXT,
+        modify_date TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    data = []
+    for i in range(rows):
+        name = ''.join(random.sample(NAME_PARTS, random.randint(2, 3)))
+        eng = ' '.join(random.sample(ENG_PARTS, 2)) + ' CO.,LTD'
+        stock = f'{random.randint(0, 999999):06d}' if random.random() < 0.15 else ' '
+        data.append((f'{i:08d}', f'{name}{i % 97}', eng, stock, '20240101'))
+    conn.executemany('''
+    INSERT INTO companies (corp_code, corp_name, corp_name_eng, stock_code, modify_date)
+    VALUES (?, ?, ?, ?, ?)
+    ''', data)
+    conn.commit()
+    return conn
+
+
+def time_query(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) / repeat * 1000, result
+
+
+def explain(conn, sql, params):
+    return '; '.join(row[-1] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params).fetchall())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='회사 검색 벤치마크')
+    parser.add_argument('--db', help='기존 companies.db 경로 (없으면 합성 데이터 사용)')
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.db:
+        conn = sqlite3.connect(args.db)
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'bench_companies.db')
+        conn = build_synthetic_db(path, args.rows)
+    conn.row_factory = sqlite3.Row
+
+    if not ensure_search_index(conn):
+        print("이 SQLite 버전은 FTS5 trigram을 지원하지 않습니다.")
+        return
+
+    total_rows = conn.execute('SELECT COUNT(*) FROM companies').fetchone()[0]
+    print(f"SQLite {sqlite3.sqlite_version}, 회사 수: {total_rows:,}, 반복: {args.repeat}회\n")
+
+    like_sql = ('SELECT COUNT(*) FROM companies c WHERE c.corp_name LIKE :like OR c.corp_name_eng LIKE :like'
+                ' OR c.corp_code LIKE :like OR c.stock_code LIKE :like')
+    fts_sql = 'SELECT COUNT(*) FROM companies_fts WHERE companies_fts MATCH :match'
+    print("실행 계획")
+    print(f"  LIKE: {explain(conn, like_sql, {'like': '%삼성전자%'})}")
+    print(f"  FTS5: {explain(conn, fts_sql, {'match': chr(34) + '삼성전자' + chr(34)})}\n")
+
+    print(f"{'검색어':<12}{'LIKE(ms)':>10}{'FTS5(ms)':>10}{'배율':>8}{'건수':>8}")
+    for query in QUERIES:
+        like_ms, (_, like_total) = time_query(
+            lambda: search_companies(conn, query, 20, 0, use_fts=False), args.repeat)
+        fts_ms, (_, fts_total) = time_query(
+            lambda: search_companies(conn, query, 20, 0, use_fts=True), args.repeat)
+        print(f"{query:<12}{like_ms:>10.2f}{fts_ms:>10.2f}{like_ms / fts_ms:>7.1f}x{fts_total:>8,}")
+        if like_total != fts_total:
+            # LIKE와 trigram의 일치 방식 차이(특수문자 등)로 건수가 다를 수 있음
+            print(f"{'':<12}(LIKE {like_total:,}건 / FTS5 {fts_total:,}건)")
+
+    conn.close()
+
+
+if __name__ == '__main__':
+    main()
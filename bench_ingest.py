@@ -0,0 +1,79 @@
+"""기업코드 적재 벤치마크: 처리량(행/초)과 파싱 메모리
+
+합성 CORPCODE.xml로 최초 적재, 변경 없는 재적재, 일부 변경(수정/추가/삭제) 재적재를 측정한다.
+
+사용법:
+    python bench_ingest.py                      # 10만 건
+    python bench_ingest.py --rows 50000 200000  # 크기별 비교 (파싱 메모리가 일정한지 확인)
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from parse_corpcode import create_database, ingest_companies, iter_companies
+
+
+def write_corpcode_xml(path, rows, changed_every=0, skip_every=0, extra=0):
+    """합성 CORPCODE.xml 작성 (changed_every마다 modify_date 변경, skip_every마다 누락, extra개 추가)"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<result>\n')
+        for i in range(rows + extra):
+            if skip_every and i < rows and i % skip_every == 0:
+                continue
+            modify_date = '20250101' if changed_every and i % changed_every == 0 else '20240101'
+            stock_code = f'{i % 1000000:06d}' if i % 7 == 0 else ' '
+            f.write(f'<list><corp_code>{i:08d}</corp_code><corp_name>테스트기업{i}</corp_name>'
+                    f'<corp_name_eng>TEST CORP {i}</corp_name_eng><stock_code>{stock_code}</stock_code>'
+                    f'<modify_date>{modify_date}</modify_date></list>\n')
+        f.write('</result>\n')
+
+
+def parse_peak_memory(path):
+    """파싱만 할 때의 최대 Python 메모리(KB)와 행 수"""
+    tracemalloc.start()
+    count = sum(1 for _ in iter_companies(path))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024, count
+
+
+def run(rows, batch_size, workdir):
+    base_xml = os.path.join(workdir, f'corpcode_{rows}.xml')
+    changed_xml = os.path.join(workdir, f'corpcode_{rows}_changed.xml')
+    write_corpcode_xml(base_xml, rows)
+    # 1% 수정, 0.5% 삭제, 0.5% 추가
+    write_corpcode_xml(changed_xml, rows, changed_every=100, skip_every=200, extra=rows // 200)
+
+    peak_kb, _ = parse_peak_memory(base_xml)
+    size_mb = os.path.getsize(base_xml) / 1024 / 1024
+    print(f"\n[{rows:,}건] XML {size_mb:.1f}MB, 파싱 최대 메모리 {peak_kb:,.0f}KB")
+    print(f"{'단계':<16}{'초':>8}{'행/초':>12}{'추가':>9}{'변경':>9}{'삭제':>9}")
+
+    db_path = os.path.join(workdir, f'companies_{rows}.db')
+    conn = create_database(db_path)
+    try:
+        for label, xml_path in (('최초 적재', base_xml), ('재적재(변경 없음)', base_xml), ('재적재(1% 변경)', changed_xml)):
+            started = time.perf_counter()
+            result = ingest_companies(conn, iter_companies(xml_path), batch_size, progress_every=0)
+            seconds = time.perf_counter() - started
+            print(f"{label:<16}{seconds:>8.2f}{result['total'] / seconds:>12,.0f}"
+                  f"{result['added']:>9,}{result['changed']:>9,}{result['removed']:>9,}")
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='기업코드 적재 벤치마크')
+    parser.add_argument('--rows', type=int, nargs='+', default=[100000])
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.rows:
+            run(rows, args.batch_size, workdir)
+
+
+if __name__ == '__main__':
+    main()
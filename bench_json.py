@@ -0,0 +1,81 @@
+"""API 응답 직렬화/압축 벤치마크: Flask 기본 json vs ensure_ascii=False vs orjson, gzip/brotli 크기
+
+스크리너/일괄 조회와 비슷한 합성 응답(한글 회사명, 재무비율, 금액 문자열)으로 직렬화 시간과 본문 크기를 비교한다.
+
+사용법:
+    python bench_json.py                  # 회사 500개
+    python bench_json.py --companies 2000
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+
+from http_encoding import BROTLI_QUALITY, GZIP_LEVEL, brotli, orjson
+
+NAMES = ('삼성전자', '에스케이하이닉스', '현대자동차', '엘지에너지솔루션', '카카오뱅크', '셀트리온제약', '한화생명보험')
+RATIOS = ('operating_margin', 'net_margin', 'roe', 'roa', 'debt_ratio', 'current_ratio', 'revenue_growth')
+
+
+def synthetic_payload(rng, companies):
+    """스크리너 응답 형태의 합성 데이터"""
+    results = []
+    for i in range(companies):
+        result = {
+            'corp_code': f'{i:08d}',
+            'corp_name': f'{rng.choice(NAMES)}{i}',
+            'stock_code': f'{i:06d}',
+            'revenue_formatted': f'{rng.randint(1, 9999):,}억원',
+            'industry': '전자부품, 컴퓨터, 영상, 음향 및 통신장비 제조업'
+        }
+        for field in RATIOS:
+            result[field] = round(rng.uniform(-50, 200), 1) if rng.random() > 0.05 else None
+        results.append(result)
+    return {'total': companies, 'results': results}
+
+
+def measure(dumps, payload, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = dumps(payload)
+    return body, (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='API 응답 직렬화/압축 벤치마크')
+    parser.add_argument('--companies', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    payload = synthetic_payload(random.Random(42), args.companies)
+    encoders = [
+        ('json (Flask 기본, ASCII 이스케이프)',
+         lambda obj: json.dumps(obj, sort_keys=True, separators=(',', ':')).encode('utf-8')),
+        ('json (ensure_ascii=False)',
+         lambda obj: json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')),
+    ]
+    if orjson is not None:
+        encoders.append(('orjson', lambda obj: orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)))
+    else:
+        print("orjson이 설치되어 있지 않아 비교에서 제외합니다. (pip install orjson)")
+
+    print(f"{'직렬화':<36}{'시간':>10}{'크기':>12}")
+    body = None
+    for name, dumps in encoders:
+        body, ms = measure(dumps, payload, args.repeat)
+        print(f"{name:<36}{ms:>8.2f}ms{len(body):>11,}B")
+
+    print(f"\n{'압축 (마지막 본문 기준)':<36}{'시간':>10}{'크기':>12}")
+    compressors = [(f'gzip (레벨 {GZIP_LEVEL})', lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))]
+    if brotli is not None:
+        compressors.append((f'brotli (품질 {BROTLI_QUALITY})', lambda data: brotli.compress(data, quality=BROTLI_QUALITY)))
+    else:
+        print("brotli가 설치되어 있지 않아 비교에서 제외합니다. (pip install brotli)")
+    for name, compress in compressors:
+        compressed, ms = measure(compress, body, args.repeat)
+        print(f"{name:<36}{ms:>8.2f}ms{len(compressed):>11,}B")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""재무비율 엔진/스크리너 벤치마크: 회사별 스칼라 계산 vs NumPy 일괄 계산
+
+합성 재무제표를 임시 저장소(financials.db)에 넣고, 같은 비율을 FinancialStatements로 회사마다 계산한 값과
+RatioTable 값이 같은지 확인한 뒤 각 방식의 계산 시간과 스크리너 조건식 평가 시간을 비교한다.
+
+사용법:
+    python bench_screener.py                  # 상장사 규모 2,500개 회사
+    python bench_screener.py --companies 10000
+"""
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+
+
+def synthetic_report(rng, i):
+    """합성 DART 주요계정 응답 (회사마다 계정명/누락 계정이 조금씩 다름)"""
+    def item(sj_div, account_nm, base, account_id=None):
+        amounts = [base * rng.uniform(0.7, 1.3) for _ in range(3)]
+        result = {'fs_div': 'CFS', 'sj_div': sj_div, 'account_nm': account_nm, 'currency': 'KRW',
+                  'thstrm_amount': f'{int(amounts[0]):,}', 'frmtrm_amount': f'{int(amounts[1]):,}',
+                  'bfefrmtrm_amount': f'{int(amounts[2]):,}'}
+        if account_id:
+            result['account_id'] = account_id
+        return result
+
+    scale = 10 ** rng.randint(9, 14)
+    assets = scale * rng.uniform(1, 10)
+    liabilities = assets * rng.uniform(0.1, 0.9)
+    items = [
+        item('BS', '자산총계', assets, 'ifrs-full_Assets'),
+        item('BS', '부채총계', liabilities),
+        item('BS', '자본 총계', assets - liabilities),
+        item('BS', '유동자산', assets * 0.4),
+        item('BS', '유동부채', liabilities * 0.5),
+        item('IS', rng.choice(['매출액', '수익(매출액)', '영업수익']), assets * rng.uniform(0.3, 1.5)),
+        item('IS', '영업이익(손실)', assets * rng.uniform(-0.05, 0.15)),
+    ]
+    if i % 10:
+        items.append(item('CIS' if i % 3 else 'IS', '당기순이익', assets * rng.uniform(-0.05, 0.1)))
+    return {'status': '000', 'list': items}
+
+
+def scalar_ratios(statements):
+    """회사 한 곳의 세 기간 roe/debt_ratio/operating_margin (스칼라 계산)"""
+    result = {}
+    net_income = statements.find('당기순이익')
+    equity = statements.find('자본총계')
+    liabilities = statements.find('부채총계')
+    revenue = statements.find('매출액')
+    operating_profit = statements.find('영업이익')
+    for period, suffix in (('current', ''), ('previous', '_previous'), ('previous2', '_previous2')):
+        def amount(entry):
+            return entry['amounts'][period] if entry and entry['amounts'][period] is not None else None
+        e, n, l, r, o = amount(equity), amount(net_income), amount(liabilities), amount(revenue), amount(operating_profit)
+        result['roe' + suffix] = n / e * 100 if e and e > 0 and n is not None else None
+        result['debt_ratio' + suffix] = l / e * 100 if e and e > 0 and l is not None else None
+        result['operating_margin' + suffix] = o / r * 100 if r and r > 0 and o is not None else None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='재무비율 엔진/스크리너 벤치마크')
+    parser.add_argument('--companies', type=int, default=2500)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ['DATA_PATH'] = workdir
+        import financial_store
+        import ratio_engine
+        from financial_statements import FinancialStatements
+
+        rng = random.Random(42)
+        reports = {f'{i:08d}': synthetic_report(rng, i) for i in range(args.companies)}
+        started = time.perf_counter()
+        for corp_code, report in reports.items():
+            financial_store.save_report(corp_code, '2023', '11011', report)
+        print(f"합성 저장소: {args.companies:,}개 회사 ({time.perf_counter() - started:.1f}초)")
+
+        # 스칼라: 회사마다 FinancialStatements 색인 + 비율 계산 + 조건 평가
+        started = time.perf_counter()
+        scalar = {corp_code: scalar_ratios(FinancialStatements.from_dart(report))
+                  for corp_code, report in reports.items()}
+        scalar_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        corp_codes, amounts = ratio_engine.load_amounts('2023', '11011')
+        load_seconds = time.perf_counter() - started
+        started = time.perf_counter()
+        table = ratio_engine.RatioTable(corp_codes, amounts)
+        compute_seconds = time.perf_counter() - started
+
+        # 두 방식의 값 비교
+        mismatches = 0
+        for position, corp_code in enumerate(table.corp_codes):
+            for field, expected in scalar[corp_code].items():
+                actual = table.columns[field][position]
+                if expected is None:
+                    mismatches += not math.isnan(actual)
+                elif math.isnan(actual) or abs(actual - expected) > 1e-9 * max(1, abs(expected)):
+                    mismatches += 1
+        print(f"값 비교: {'일치' if not mismatches else f'불일치 {mismatches}건'}")
+
+        conditions = ratio_engine.parse_filter('roe>10 AND debt_ratio<100 AND operating_margin>5')
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            positions, total = table.screen(conditions, sort='-roe', limit=50)
+        screen_ms = (time.perf_counter() - started) / args.repeat * 1000
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            matched = [corp_code for corp_code, r in scalar.items()
+                       if r['roe'] is not None and r['roe'] > 10 and r['debt_ratio'] is not None
+                       and r['debt_ratio'] < 100 and r['operating_margin'] is not None and r['operating_margin'] > 5]
+            sorted(matched, key=lambda code: -scalar[code]['roe'])[:50]
+        scalar_screen_ms = (time.perf_counter() - started) / args.repeat * 1000
+
+        print(f"\n{'단계':<28}{'시간':>12}")
+        print(f"{'스칼라 비율 계산':<28}{scalar_seconds * 1000:>10.1f}ms")
+        print(f"{'배열 적재 (저장소 → NumPy)':<28}{load_seconds * 1000:>10.1f}ms")
+        print(f"{'NumPy 비율 계산 (전 필드)':<28}{compute_seconds * 1000:>10.1f}ms")
+        print(f"{'스칼라 조건 평가 + 정렬':<28}{scalar_screen_ms:>10.2f}ms")
+        print(f"{'NumPy 조건 평가 + 정렬':<28}{screen_ms:>10.2f}ms  (일치 {total:,}개)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""워커 시작 비용 측정: app.py import 시간 예산 확인
+
+새 Python 프로세스에서 `import app`을 반복 실행해 import 시간(중앙값)을 재고, 예산을 넘으면 종료 코드 1을 반환한다.
+import 중 출력한 줄 수, DATA_PATH에 만든 파일(있으면 안 됨), 가장 오래 걸린 모듈도 함께 보여준다.
+import 중 OpenAI를 호출하지 않는지도 확인되도록 OpenAI 주소는 닿지 않는 주소로 바꿔 실행한다.
+
+사용법:
+    python bench_startup.py                   # 기본 예산 400ms
+    python bench_startup.py --budget-ms 300 --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_BUDGET_MS = 400
+TOP_MODULES = 10
+
+# import app 시간만 재는 코드 (인터프리터 시작 시간 제외)
+MEASURE_CODE = '''
+import time
+started = time.perf_counter()
+import app
+print("IMPORT_MS", (time.perf_counter() - started) * 1000)
+'''
+
+
+def run_import(data_path, importtime=False):
+    """새 프로세스에서 import app 실행, (import ms, 출력 줄 수, -X importtime 출력)"""
+    env = dict(os.environ, DATA_PATH=data_path, OPENAI_BASE_URL='http://127.0.0.1:9/v1')
+    command = [sys.executable, *(['-X', 'importtime'] if importtime else []), '-c', MEASURE_CODE]
+    result = subprocess.run(command, env=env, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(f"import app 실패:\n{result.stderr}")
+    lines = result.stdout.splitlines()
+    import_ms = float(lines[-1].split()[1])
+    return import_ms, len(lines) - 1, result.stderr
+
+
+def slowest_modules(importtime_output, count):
+    """-X importtime 출력에서 누적 시간이 긴 최상위(app이 직접 import한) 모듈"""
+    modules = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # 들여쓰기 2칸 = app의 직접 import
+        if name.startswith('   ') and not name.startswith('    '):
+            modules.append((int(cumulative) / 1000, name.strip()))
+    return sorted(modules, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='app.py import 시간 예산 확인')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_path:
+        run_import(data_path)  # 첫 실행은 .pyc 생성 등으로 느리므로 제외
+        timings = []
+        output_lines = 0
+        for _ in range(args.runs):
+            import_ms, lines, _ = run_import(data_path)
+            timings.append(import_ms)
+            output_lines = max(output_lines, lines)
+        _, _, importtime_output = run_import(data_path, importtime=True)
+        created = sorted(os.listdir(data_path))
+
+    median = statistics.median(timings)
+    print(f"import app: 중앙값 {median:.0f}ms (최소 {min(timings):.0f}ms, 최대 {max(timings):.0f}ms, {args.runs}회)")
+    print(f"import 중 출력: {output_lines}줄")
+    print(f"DATA_PATH에 만든 파일: {', '.join(created) if created else '없음'}")
+    print(f"\n{'가장 오래 걸린 모듈':<28}{'누적':>10}")
+    for cumulative_ms, name in slowest_modules(importtime_output, TOP_MODULES):
+        print(f"{name:<28}{cumulative_ms:>8.1f}ms")
+
+    if median > args.budget_ms:
+        print(f"\n예산 초과: {median:.0f}ms > {args.budget_ms:.0f}ms")
+        sys.exit(1)
+    print(f"\n예산 이내: {median:.0f}ms <= {args.budget_ms:.0f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""회사명 자동완성 (메모리 정렬 배열 + 초성 검색)"""
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+
+CHOSUNG = ['ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅉ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ']
+HANGUL_START = 0xAC00
+HANGUL_END = 0xD7A3
+JUNG_JONG_COUNT = 21 * 28  # 중성 21개 × 종성 28개
+
+# 자주 쓰는 짧은 접두어(1~2글자)는 결과를 미리 계산해 두고, 그보다 긴 접두어는 범위를 직접 탐색
+PRECOMPUTED_PREFIX_LENGTH = 2
+MAX_SUGGESTIONS = 20
+MAX_RANGE_SCAN = 5000
+
+_MAX_CHAR = '\U0010ffff'  # 접두어 구간의 상한 (prefix + _MAX_CHAR)
+
+_CORP_SUFFIX_PATTERN = re.compile(r'\(주\)|㈜|주식회사|\(유\)|유한회사')
+_STRIP_PATTERN = re.compile(r'[\s\.,\-&\'"()]+')
+
+
+def normalize(text):
+    """검색 키 정규화 (법인 형태 표기, 공백, 기호 제거, 소문자)"""
+    if not text:
+        return ''
+    # NFKC는 호환용 자음(ㄱ)을 조합형 자모로 바꾸므로 초성 검색을 위해 NFC 사용
+    text = unicodedata.normalize('NFC', text)
+    text = _CORP_SUFFIX_PATTERN.sub('', text)
+    return _STRIP_PATTERN.sub('', text).lower()
+
+
+# 한글 음절 11,172자 → 초성 변환표 (str.translate로 한 번에 변환)
+_CHOSUNG_TABLE = {
+    code: CHOSUNG[(code - HANGUL_START) // JUNG_JONG_COUNT]
+    for code in range(HANGUL_START, HANGUL_END + 1)
+}
+
+
+def to_chosung(text):
+    """한글 음절을 초성으로 변환 (예: 삼성전자 → ㅅㅅㅈㅈ), 그 외 문자는 그대로"""
+    return text.translate(_CHOSUNG_TABLE)
+
+
+def has_jamo(text):
+    """호환용 자음(ㄱ~ㅎ)이 포함되어 있는지 여부"""
+    return any('ㄱ' <= ch <= 'ㅎ' for ch in text)
+
+
+class AutocompleteIndex:
+    """회사명/영문명/초성/주식코드 접두어 검색 인덱스 (워커별 메모리)"""
+
+    def __init__(self):
+        self._keys = []        # 정렬된 검색 키
+        self._ids = []         # 키에 대응하는 회사 번호
+        self._listed_keys = []  # 상장사만의 정렬된 검색 키 (넓은 접두어에서도 상장사를 먼저 찾기 위함)
+        self._listed_ids = []
+        self._companies = []   # 회사 번호 → (corp_code, corp_name, corp_name_eng, stock_code)
+        self._ranks = []       # 회사 번호 → 정렬 순위 (상장사 우선, 짧은 이름 우선)
+        self._prefix_top = {}  # 짧은 접두어 → 상위 회사 번호 목록
+        self._lock = threading.Lock()
+        self.built_at = None
+        self.build_seconds = None
+
+    @property
+    def ready(self):
+        return self.built_at is not None
+
+    def __len__(self):
+        return len(self._companies)
+
+    def build(self, conn):
+        """companies 테이블로 인덱스 구성"""
+        started = time.perf_counter()
+        companies = []
+        sort_keys = []
+        pair_keys = []
+        pair_ids = []
+
+        rows = conn.execute(
+            'SELECT corp_code, corp_name, corp_name_eng, stock_code FROM companies'
+        ).fetchall()
+        for corp_code, corp_name, corp_name_eng, stock_code in rows:
+            corp_name = corp_name or ''
+            stock_code = (stock_code or '').strip()
+            company_id = len(companies)
+            companies.append((corp_code, corp_name, corp_name_eng, stock_code))
+            sort_keys.append((0 if stock_code else 1, len(corp_name), corp_name, corp_code))
+
+            name_key = normalize(corp_name)
+            keys = {name_key, to_chosung(name_key), normalize(corp_name_eng), corp_code, stock_code}
+            keys.discard('')
+            pair_keys.extend(keys)
+            pair_ids.extend([company_id] * len(keys))
+
+        # 회사 번호 → 정렬 순위 (상장사 우선, 짧은 이름 우선)
+        by_rank = sorted(range(len(companies)), key=sort_keys.__getitem__)
+        ranks = [0] * len(companies)
+        for rank, company_id in enumerate(by_rank):
+            ranks[company_id] = rank
+
+        # (키, 번호) 튜플 정렬보다 문자열 키만 비교하는 인덱스 정렬이 빠름
+        order = sorted(range(len(pair_keys)), key=pair_keys.__getitem__)
+        keys = [pair_keys[i] for i in order]
+        ids = [pair_ids[i] for i in order]
+        listed = [i for i, company_id in enumerate(ids) if companies[company_id][3]]
+        listed_keys = [keys[i] for i in listed]
+        listed_ids = [ids[i] for i in listed]
+
+        # 짧은 접두어별 상위 결과 미리 계산 (정렬된 키에서 접두어 구간마다 순위 상위 N개)
+        key_ranks = [ranks[company_id] for company_id in ids]
+        prefix_top = {}
+        for length in range(1, PRECOMPUTED_PREFIX_LENGTH + 1):
+            i = 0
+            while i < len(keys):
+                prefix = keys[i][:length]
+                if len(prefix) < length:
+                    i += 1
+                    continue
+                end = bisect.bisect_left(keys, prefix + _MAX_CHAR, i)
+                top = heapq.nsmallest(MAX_SUGGESTIONS, set(key_ranks[i:end]))
+                prefix_top[prefix] = [by_rank[rank] for rank in top]
+                i = end
+
+        with self._lock:
+            self._keys = keys
+            self._ids = ids
+            self._listed_keys = listed_keys
+            self._listed_ids = listed_ids
+            self._companies = companies
+            self._ranks = ranks
+            self._prefix_top = prefix_top
+            self.built_at = time.time()
+            self.build_seconds = time.perf_counter() - started
+        return len(companies)
+
+    @staticmethod
+    def _scan_range(prefix, keys, ids):
+        """정렬된 키에서 접두어 구간을 최대 MAX_RANGE_SCAN개까지 훑어 회사 번호 집합 반환"""
+        start = bisect.bisect_left(keys, prefix)
+        matched = set()
+        for i in range(start, min(start + MAX_RANGE_SCAN, len(keys))):
+            if not keys[i].startswith(prefix):
+                break
+            matched.add(ids[i])
+        return matched
+
+    def _match_prefix(self, prefix, limit, index):
+        """접두어가 일치하는 회사 번호 집합
+
+        상장사가 먼저 정렬되므로 상장사 키에서 먼저 찾고, limit개가 안 되면 전체 키에서 채운다.
+        (전체 키만 훑으면 넓은 접두어에서 탐색 한도 뒤에 있는 상장사를 놓침)
+        """
+        keys, ids, listed_keys, listed_ids, prefix_top = index
+        if len(prefix) <= PRECOMPUTED_PREFIX_LENGTH:
+            return set(prefix_top.get(prefix, ()))
+
+        matched = self._scan_range(prefix, listed_keys, listed_ids)
+        if len(matched) < limit:
+            matched |= self._scan_range(prefix, keys, ids)
+        return matched
+
+    def suggest(self, query, limit=10):
+        """접두어 자동완성 결과 (상장사 우선)"""
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+        query = normalize(query)
+        if not query:
+            return []
+
+        with self._lock:
+            index = (self._keys, self._ids, self._listed_keys, self._listed_ids, self._prefix_top)
+            companies, ranks = self._companies, self._ranks
+
+        matched = self._match_prefix(query, limit, index)
+        # 초성이 섞인 검색어(예: 삼성ㅈ)는 전체를 초성으로 바꿔 한 번 더 검색
+        if has_jamo(query):
+            chosung_query = to_chosung(query)
+            if chosung_query != query:
+                matched |= self._match_prefix(chosung_query, limit, index)
+
+        best = heapq.nsmallest(limit, matched, key=ranks.__getitem__)
+        return [self._to_dict(companies[company_id]) for company_id in best]
+
+    @staticmethod
+    def _to_dict(company):
+        corp_code, corp_name, corp_name_eng, stock_code = company
+        return {
+            'corp_code': corp_code,
+            'corp_name': corp_name,
+            'corp_name_eng': corp_name_eng,
+            'stock_code': stock_code,
+            'listed': bool(stock_code)
+        }
@@ -0,0 +1,316 @@
+"""회사 검색 및 목록 조회 (FTS5 trigram 전문 검색 인덱스, 키셋 페이지네이션)"""
+import base64
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# trigram 토크나이저는 3글자 이상 검색어만 인덱스로 찾을 수 있음
+MIN_FTS_QUERY_LENGTH = 3
+# 짧은 검색어의 부분 일치(LIKE) 결과 최대 개수 (회사명 접두어 일치 결과에 더해 반환)
+SHORT_QUERY_SCAN_LIMIT = 500
+
+FTS_COLUMNS = ('corp_name', 'corp_name_eng', 'corp_code', 'stock_code')
+SEARCH_TRIGGERS = ('companies_fts_ai', 'companies_fts_ad', 'companies_fts_au')
+
+COUNT_CACHE_TTL = 300  # 검색 결과 개수 캐시 유효시간(초)
+COUNT_CACHE_MAX_ENTRIES = 1024
+
+_count_cache = {}
+_count_lock = threading.Lock()
+
+
+def ensure_list_index(conn):
+    """회사명 정렬/키셋 페이지네이션과 짧은 검색어의 접두어 검색용 인덱스 생성"""
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_companies_name ON companies(corp_name, corp_code)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_companies_name_eng ON companies(corp_name_eng COLLATE NOCASE)')
+    conn.commit()
+
+
+def ensure_search_index(conn):
+    """companies_fts 가상 테이블과 동기화 트리거 생성 (필요하면 인덱스 재구성)
+
+    trigram 토크나이저를 지원하지 않는 SQLite(3.34 미만)에서는 False를 반환한다.
+    """
+    columns = ', '.join(FTS_COLUMNS)
+    new_columns = ', '.join(f'new.{c}' for c in FTS_COLUMNS)
+    old_columns = ', '.join(f'old.{c}' for c in FTS_COLUMNS)
+
+    try:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'companies_fts'"
+        ).fetchone() is not None
+
+        conn.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS companies_fts USING fts5(
+            {columns},
+            content='companies',
+            content_rowid='id',
+            tokenize='trigram'
+        )
+        ''')
+    except sqlite3.OperationalError as e:
+        logger.warning("전문 검색 인덱스를 만들 수 없습니다 (LIKE 검색 사용): %s", e)
+        return False
+
+    # companies 변경 시 검색 인덱스 동기화
+    conn.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS companies_fts_ai AFTER INSERT ON companies BEGIN
+        INSERT INTO companies_fts(rowid, {columns}) VALUES (new.id, {new_columns});
+    END
+    ''')
+    conn.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS companies_fts_ad AFTER DELETE ON companies BEGIN
+        INSERT INTO companies_fts(companies_fts, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+    END
+    ''')
+    conn.execute(f'''
+    CREATE TRIGGER IF NOT EXISTS companies_fts_au AFTER UPDATE ON companies BEGIN
+        INSERT INTO companies_fts(companies_fts, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+        INSERT INTO companies_fts(rowid, {columns}) VALUES (new.id, {new_columns});
+    END
+    ''')
+
+    if not exists:
+        # 기존 데이터로 인덱스 최초 구성
+        conn.execute("INSERT INTO companies_fts(companies_fts) VALUES ('rebuild')")
+        logger.info("전문 검색 인덱스를 구성했습니다.")
+
+    conn.commit()
+    return True
+
+
+def has_search_index(conn):
+    """companies_fts 인덱스 존재 여부"""
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'companies_fts'"
+    ).fetchone() is not None
+
+
+def drop_search_triggers(conn):
+    """대량 적재 전 검색 인덱스 동기화 트리거 제거 (적재 후 rebuild_search_index로 복구)
+
+    행마다 trigram을 갱신하는 것보다 적재 후 한 번에 재구성하는 편이 훨씬 빠르다.
+    """
+    for name in SEARCH_TRIGGERS:
+        conn.execute(f'DROP TRIGGER IF EXISTS {name}')
+    conn.commit()
+
+
+def rebuild_search_index(conn):
+    """동기화 트리거를 다시 만들고 companies 전체로 검색 인덱스 재구성"""
+    if not ensure_search_index(conn):
+        return False
+    conn.execute("INSERT INTO companies_fts(companies_fts) VALUES ('rebuild')")
+    conn.commit()
+    return True
+
+
+def _fts_phrase(search):
+    """검색어를 FTS5 구문(phrase) 쿼리로 변환"""
+    return '"' + search.replace('"', '""') + '"'
+
+
+# 정확히 일치 → 회사명 접두 일치 → 부분 일치 순으로 정렬
+MATCH_RANK_SQL = '''
+CASE
+    WHEN c.corp_name = :q OR c.corp_code = :q OR TRIM(c.stock_code) = :q THEN 0
+    WHEN LOWER(SUBSTR(c.corp_name, 1, LENGTH(:q))) = LOWER(:q)
+      OR LOWER(SUBSTR(c.corp_name_eng, 1, LENGTH(:q))) = LOWER(:q) THEN 1
+    ELSE 2
+END
+'''
+
+
+def _next_prefix(prefix):
+    """prefix로 시작하는 모든 문자열보다 큰 가장 작은 문자열 (접두어 범위의 끝)"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _like_conditions():
+    """회사명, 영문 회사명, 기업코드, 종목코드 부분 일치 조건 (:like 파라미터)"""
+    return ('c.corp_name LIKE :like OR c.corp_name_eng LIKE :like OR c.corp_code LIKE :like'
+            ' OR c.stock_code LIKE :like')
+
+
+def _short_query_source(search, params):
+    """짧은 검색어의 검색 대상 (회사명 접두어 인덱스 범위 + 개수를 제한한 부분 일치)
+
+    1단계로 회사명/영문 회사명의 접두어를 인덱스 범위로 찾고, 2단계로 네 컬럼의 부분 일치(LIKE)를
+    SHORT_QUERY_SCAN_LIMIT건까지만 더한다. 부분 일치는 결과가 제한에 닿으면 테이블을 끝까지 읽지 않으므로
+    '전자'처럼 흔한 검색어도 비용이 일정하고, 전체 개수도 두 단계 결과의 합으로 제한된다.
+    idx_companies_name은 대소문자를 구분하므로 영문이 섞인 회사명(예: 'lg' → 'LG전자')은 대문자로도 찾는다.
+    """
+    conditions = []
+    for i, prefix in enumerate(dict.fromkeys((search, search.upper()))):
+        params[f'name_from{i}'] = prefix
+        params[f'name_to{i}'] = _next_prefix(prefix)
+        conditions.append(f'(c.corp_name >= :name_from{i} AND c.corp_name < :name_to{i})')
+
+    # idx_companies_name_eng(NOCASE) 범위로 후보를 좁히고 접두어를 다시 확인
+    params['eng_from'] = search.lower()
+    params['eng_to'] = _next_prefix(search.lower())
+    params['prefix_length'] = len(search)
+    conditions.append(
+        '(c.corp_name_eng COLLATE NOCASE >= :eng_from AND c.corp_name_eng COLLATE NOCASE < :eng_to'
+        ' AND LOWER(SUBSTR(c.corp_name_eng, 1, :prefix_length)) = :eng_from)'
+    )
+
+    params['like'] = f'%{search}%'
+    params['scan_limit'] = SHORT_QUERY_SCAN_LIMIT
+    source = f'''(
+        SELECT c.* FROM companies c WHERE {' OR '.join(conditions)}
+        UNION
+        SELECT * FROM (SELECT c.* FROM companies c WHERE {_like_conditions()} LIMIT :scan_limit)
+    ) c'''
+    return source, '1', params
+
+
+def _search_source(search, use_fts):
+    """검색 조건에 맞는 FROM/WHERE 절과 파라미터"""
+    search = search.strip()
+    params = {'q': search}
+    if not search:
+        return 'companies c', '1', params
+    if len(search) < MIN_FTS_QUERY_LENGTH:
+        # 짧은 검색어(예: '삼성')는 trigram 인덱스를 쓸 수 없어 접두어 인덱스 범위와 제한된 부분 일치로 검색
+        return _short_query_source(search, params)
+    if use_fts:
+        params['match'] = _fts_phrase(search)
+        return ('companies_fts f JOIN companies c ON c.id = f.rowid',
+                'companies_fts MATCH :match', params)
+
+    # trigram을 지원하지 않는 SQLite에서는 LIKE로 부분 일치 검색
+    params['like'] = f'%{search}%'
+    return 'companies c', _like_conditions(), params
+
+
+def _strip_rank(rows):
+    companies = []
+    for row in rows:
+        company = dict(row)
+        company.pop('match_rank', None)
+        companies.append(company)
+    return companies
+
+
+def count_companies(conn, search='', use_fts=True):
+    """전체/검색 결과 개수 (워커별로 잠시 캐시)"""
+    key = (search.strip(), bool(use_fts))
+    now = time.time()
+    with _count_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[1] > now:
+            metrics.inc('cache_requests_total', cache='company_count', result='hit')
+            return cached[0]
+
+    metrics.inc('cache_requests_total', cache='company_count', result='miss')
+    if key[0]:
+        source, where, params = _search_source(search, use_fts)
+        if source.startswith('companies_fts'):
+            # 개수는 조인 없이 전문 검색 인덱스만으로 계산
+            source = 'companies_fts'
+        with metrics.timer('db_query_duration_seconds', db='companies', operation='count_companies'):
+            total = conn.execute(f'SELECT COUNT(*) FROM {source} WHERE {where}', params).fetchone()[0]
+    else:
+        with metrics.timer('db_query_duration_seconds', db='companies', operation='count_companies'):
+            total = conn.execute('SELECT COUNT(*) FROM companies').fetchone()[0]
+
+    with _count_lock:
+        if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+            _count_cache.clear()
+        _count_cache[key] = (total, now + COUNT_CACHE_TTL)
+    return total
+
+
+@metrics.timed('db_query_duration_seconds', db='companies', operation='search_companies')
+def search_companies(conn, search, limit, offset, use_fts=True):
+    """회사 검색 (OFFSET 페이지네이션), (회사 목록, 전체 개수) 반환"""
+    source, where, params = _search_source(search, use_fts)
+    params.update({'limit': limit, 'offset': offset})
+    rows = conn.execute(f'''
+    SELECT c.*, {MATCH_RANK_SQL} AS match_rank
+    FROM {source}
+    WHERE {where}
+    ORDER BY match_rank, c.corp_name, c.corp_code
+    LIMIT :limit OFFSET :offset
+    ''', params).fetchall()
+    return _strip_rank(rows), count_companies(conn, search, use_fts)
+
+
+def encode_cursor(values):
+    """정렬 키를 불투명한 커서 문자열로 변환"""
+    raw = json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """커서 문자열을 정렬 키로 변환 (빈 값은 첫 페이지, 잘못된 값은 ValueError)"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError('잘못된 커서입니다.') from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError('잘못된 커서입니다.')
+    return values
+
+
+@metrics.timed('db_query_duration_seconds', db='companies', operation='list_companies_after')
+def list_companies_after(conn, limit, cursor=None):
+    """회사명 순 키셋 페이지네이션, (회사 목록, 다음 커서) 반환
+
+    (corp_name, corp_code) 인덱스를 따라 읽으므로 페이지 깊이와 관계없이 비용이 일정하다.
+    """
+    after = decode_cursor(cursor, 2)
+    if after is None:
+        rows = conn.execute(
+            'SELECT * FROM companies ORDER BY corp_name, corp_code LIMIT ?', (limit + 1,)
+        ).fetchall()
+    else:
+        rows = conn.execute('''
+        SELECT * FROM companies
+        WHERE (corp_name, corp_code) > (?, ?)
+        ORDER BY corp_name, corp_code
+        LIMIT ?
+        ''', (after[0], after[1], limit + 1)).fetchall()
+
+    companies = [dict(row) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = companies[-1]
+        next_cursor = encode_cursor([last['corp_name'], last['corp_code']])
+    return companies, next_cursor
+
+
+@metrics.timed('db_query_duration_seconds', db='companies', operation='search_companies_after')
+def search_companies_after(conn, search, limit, cursor=None, use_fts=True):
+    """검색 결과 키셋 페이지네이션 (일치 순위, 회사명 순), (회사 목록, 다음 커서) 반환"""
+    after = decode_cursor(cursor, 3)
+    source, where, params = _search_source(search, use_fts)
+    params['limit'] = limit + 1
+    query = f'''
+    SELECT * FROM (
+        SELECT c.*, {MATCH_RANK_SQL} AS match_rank
+        FROM {source}
+        WHERE {where}
+    )
+    '''
+    if after is not None:
+        query += ' WHERE (match_rank, corp_name, corp_code) > (:after_rank, :after_name, :after_code)'
+        params.update({'after_rank': after[0], 'after_name': after[1], 'after_code': after[2]})
+    query += ' ORDER BY match_rank, corp_name, corp_code LIMIT :limit'
+
+    rows = conn.execute(query, params).fetchall()
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor([last['match_rank'], last['corp_name'], last['corp_code']])
+    return _strip_rank(rows[:limit]), next_cursor
@@ -0,0 +1,172 @@
+"""회사 통계 스냅샷 (is_listed 인덱스 컬럼 + company_stats 테이블, 워커별 캐시)"""
+import json
+import sqlite3
+import threading
+import time
+
+# 상장 여부의 유일한 정의 (is_listed 컬럼 값), 다른 쿼리는 이 식 대신 is_listed = 1을 사용
+_LISTED_EXPR = "LENGTH(TRIM(COALESCE(stock_code, ''))) > 0"
+RECENT_UPDATES_LIMIT = 10
+SAMPLE_LISTED_LIMIT = 10
+VERSION_CHECK_INTERVAL = 5  # 스냅샷 버전 확인 간격(초)
+
+_cache = {'version': None, 'stats': None, 'checked_at': 0.0}
+_cache_lock = threading.Lock()
+
+
+def _columns(conn):
+    # 생성 컬럼은 table_info에 나오지 않으므로 table_xinfo 사용
+    return {row[1] for row in conn.execute('PRAGMA table_xinfo(companies)').fetchall()}
+
+
+def ensure_stats_schema(conn):
+    """is_listed 컬럼, 통계용 인덱스, company_stats 테이블 생성"""
+    if 'is_listed' not in _columns(conn):
+        try:
+            # 생성 컬럼(SQLite 3.31+)은 stock_code가 바뀌면 자동으로 맞춰짐
+            conn.execute(f'ALTER TABLE companies ADD COLUMN is_listed INTEGER '
+                         f'GENERATED ALWAYS AS ({_LISTED_EXPR}) VIRTUAL')
+        except sqlite3.OperationalError:
+            # 구버전 SQLite는 일반 컬럼으로 두고 refresh_stats에서 값을 맞춤
+            conn.execute('ALTER TABLE companies ADD COLUMN is_listed INTEGER NOT NULL DEFAULT 0')
+
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_companies_listed ON companies(is_listed, corp_name)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_companies_modify_date ON companies(modify_date)')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS company_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL,
+        total_companies INTEGER NOT NULL,
+        listed_companies INTEGER NOT NULL,
+        unlisted_companies INTEGER NOT NULL,
+        recent_updates TEXT NOT NULL,
+        sample_listed TEXT NOT NULL,
+        refreshed_at REAL NOT NULL
+    )
+    ''')
+    conn.commit()
+
+
+def compute_stats(conn):
+    """companies 테이블에서 통계 계산 (모두 인덱스로 처리)"""
+    total = conn.execute('SELECT COUNT(*) FROM companies').fetchone()[0]
+    listed = conn.execute('SELECT COUNT(*) FROM companies WHERE is_listed = 1').fetchone()[0]
+    recent_updates = [
+        {'corp_name': corp_name, 'modify_date': modify_date}
+        for corp_name, modify_date in conn.execute('''
+        SELECT corp_name, modify_date
+        FROM companies
+        WHERE modify_date IS NOT NULL
+        ORDER BY modify_date DESC
+        LIMIT ?
+        ''', (RECENT_UPDATES_LIMIT,)).fetchall()
+    ]
+    sample_listed = [
+        {'corp_name': corp_name, 'stock_code': stock_code}
+        for corp_name, stock_code in conn.execute('''
+        SELECT corp_name, stock_code
+        FROM companies
+        WHERE is_listed = 1
+        ORDER BY corp_name
+        LIMIT ?
+        ''', (SAMPLE_LISTED_LIMIT,)).fetchall()
+    ]
+    return {
+        'total_companies': total,
+        'listed_companies': listed,
+        'unlisted_companies': total - listed,
+        'recent_updates': recent_updates,
+        'sample_listed': sample_listed
+    }
+
+
+def refresh_stats(conn):
+    """통계 스냅샷 갱신 (회사 정보 적재 후 호출), 새 버전 반환"""
+    ensure_stats_schema(conn)
+    # table_info에 보이면 생성 컬럼이 아닌 일반 컬럼(구버전 SQLite)이므로 stock_code 변경분을 직접 반영
+    if 'is_listed' in {row[1] for row in conn.execute('PRAGMA table_info(companies)').fetchall()}:
+        conn.execute(f'UPDATE companies SET is_listed = ({_LISTED_EXPR}) WHERE is_listed IS NOT ({_LISTED_EXPR})')
+
+    stats = compute_stats(conn)
+    conn.execute('''
+    INSERT INTO company_stats
+    (id, version, total_companies, listed_companies, unlisted_companies, recent_updates, sample_listed, refreshed_at)
+    VALUES (1, 1, :total_companies, :listed_companies, :unlisted_companies, :recent_updates, :sample_listed, :refreshed_at)
+    ON CONFLICT(id) DO UPDATE SET
+        version = version + 1,
+        total_companies = excluded.total_companies,
+        listed_companies = excluded.listed_companies,
+        unlisted_companies = excluded.unlisted_companies,
+        recent_updates = excluded.recent_updates,
+        sample_listed = excluded.sample_listed,
+        refreshed_at = excluded.refreshed_at
+    ''', {
+        **stats,
+        'recent_updates': json.dumps(stats['recent_updates'], ensure_ascii=False),
+        'sample_listed': json.dumps(stats['sample_listed'], ensure_ascii=False),
+        'refreshed_at': time.time()
+    })
+    conn.commit()
+    return conn.execute('SELECT version FROM company_stats WHERE id = 1').fetchone()[0]
+
+
+def ensure_stats(conn):
+    """스키마를 확인하고 스냅샷이 없으면 한 번 만든다 (앱 시작 시)"""
+    ensure_stats_schema(conn)
+    if conn.execute('SELECT 1 FROM company_stats WHERE id = 1').fetchone() is None:
+        refresh_stats(conn)
+
+
+def load_stats(conn):
+    """저장된 스냅샷 읽기 (없으면 None)"""
+    try:
+        row = conn.execute('SELECT * FROM company_stats WHERE id = 1').fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        return None
+    version, total, listed, unlisted, recent_updates, sample_listed, refreshed_at = tuple(row)[1:]
+    return {
+        'total_companies': total,
+        'listed_companies': listed,
+        'unlisted_companies': unlisted,
+        'recent_updates': json.loads(recent_updates),
+        'sample_listed': json.loads(sample_listed),
+        'version': version,
+        'refreshed_at': refreshed_at
+    }
+
+
+def get_stats(connect):
+    """통계 조회 (워커별 캐시, 스냅샷 버전이 바뀌면 다시 읽음)
+
+    connect는 연결을 돌려주는 함수다. 버전은 VERSION_CHECK_INTERVAL마다 한 번만 확인한다.
+    """
+    now = time.time()
+    with _cache_lock:
+        if _cache['stats'] is not None and now - _cache['checked_at'] < VERSION_CHECK_INTERVAL:
+            return _cache['stats']
+
+    conn = connect()
+    try:
+        try:
+            row = conn.execute('SELECT version FROM company_stats WHERE id = 1').fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        version = row[0] if row is not None else None
+
+        with _cache_lock:
+            if _cache['stats'] is not None and version is not None and version == _cache['version']:
+                _cache['checked_at'] = now
+                return _cache['stats']
+
+        stats = load_stats(conn) if version is not None else None
+        if stats is None:
+            # 스냅샷이 아직 없는 DB는 직접 계산 (캐시하지 않음)
+            return compute_stats(conn)
+    finally:
+        conn.close()
+
+    with _cache_lock:
+        _cache.update({'version': stats['version'], 'stats': stats, 'checked_at': now})
+    return stats
@@ -0,0 +1,290 @@
+"""CORPCODE.zip 스트리밍 읽기 (디스크에 풀지 않고 zip 스트림에서 XML을 바로 읽음)
+
+zipfile 모듈은 끝부분의 중앙 디렉터리를 먼저 읽어야 해서 HTTP 응답처럼 되감을 수 없는 스트림을
+읽지 못한다. 여기서는 로컬 파일 헤더를 순서대로 읽고 zlib으로 압축을 풀며,
+CRC32와 크기(압축 전/후, 전체 다운로드 크기)를 검증한다.
+"""
+import hashlib
+import io
+import struct
+import zlib
+
+import requests
+
+from dart_client import DART_API_BASE_URL, DART_STATUS_CODES, redacted_request_error
+
+CHUNK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 60
+
+LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+DATA_DESCRIPTOR_SIGNATURE = b'PK\x07\x08'
+END_OF_CENTRAL_DIRECTORY_SIGNATURE = b'PK\x05\x06'
+END_OF_CENTRAL_DIRECTORY_MAX_SIZE = 22 + 0xFFFF  # 고정 22바이트 + 최대 주석 길이
+LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+FLAG_ENCRYPTED = 0x01
+FLAG_DATA_DESCRIPTOR = 0x08
+METHOD_STORED = 0
+METHOD_DEFLATED = 8
+
+
+class ZipStreamError(Exception):
+    """zip 형식 오류 또는 검증 실패"""
+
+
+class _ByteReader:
+    """원본 스트림에서 필요한 만큼 읽고, 읽은 바이트 수와 SHA-256을 누적"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.buffer = b''
+        self.bytes_read = 0
+        self.sha256 = hashlib.sha256()
+        self.tail = b''  # 마지막으로 읽은 바이트 (끝의 중앙 디렉터리 종료 레코드 확인용)
+
+    def _fill(self):
+        chunk = self.raw.read(CHUNK_SIZE)
+        if chunk:
+            self.bytes_read += len(chunk)
+            self.sha256.update(chunk)
+            self.tail = (self.tail + chunk)[-END_OF_CENTRAL_DIRECTORY_MAX_SIZE:]
+        return chunk
+
+    def read_some(self):
+        """버퍼에 남은 데이터 또는 새 청크 (끝이면 b'')"""
+        if self.buffer:
+            data, self.buffer = self.buffer, b''
+            return data
+        return self._fill()
+
+    def read_exact(self, size):
+        while len(self.buffer) < size:
+            chunk = self._fill()
+            if not chunk:
+                raise ZipStreamError('zip 파일이 중간에 끊겼습니다.')
+            self.buffer += chunk
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def peek(self, size):
+        while len(self.buffer) < size:
+            chunk = self._fill()
+            if not chunk:
+                break
+            self.buffer += chunk
+        return self.buffer[:size]
+
+    def unread(self, data):
+        self.buffer = data + self.buffer
+
+    def drain(self):
+        """남은 데이터(중앙 디렉터리 등)를 끝까지 읽어 크기/해시 계산에 포함"""
+        self.buffer = b''
+        while self._fill():
+            pass
+
+    def has_end_record(self):
+        """끝에 중앙 디렉터리 종료 레코드가 있는지 (없으면 파일 끝부분이 잘린 것)"""
+        position = self.tail.rfind(END_OF_CENTRAL_DIRECTORY_SIGNATURE)
+        return position >= 0 and len(self.tail) - position >= 22
+
+
+def _read_local_header(reader):
+    """로컬 파일 헤더 읽기 (더 이상 파일 항목이 없으면 None)"""
+    if reader.peek(4) != LOCAL_HEADER_SIGNATURE:
+        return None
+    (_, _, flags, method, _, _, crc, compressed_size, size,
+     name_length, extra_length) = LOCAL_HEADER.unpack(reader.read_exact(LOCAL_HEADER.size))
+    name = reader.read_exact(name_length).decode('cp437' if not flags & 0x800 else 'utf-8')
+    reader.read_exact(extra_length)
+
+    if flags & FLAG_ENCRYPTED:
+        raise ZipStreamError(f'암호화된 zip 항목은 지원하지 않습니다: {name}')
+    if method not in (METHOD_STORED, METHOD_DEFLATED):
+        raise ZipStreamError(f'지원하지 않는 압축 방식입니다 ({method}): {name}')
+    if 0xFFFFFFFF in (compressed_size, size):
+        raise ZipStreamError(f'ZIP64 항목은 지원하지 않습니다: {name}')
+    if method == METHOD_STORED and flags & FLAG_DATA_DESCRIPTOR:
+        raise ZipStreamError(f'크기 정보가 없는 비압축 항목은 스트리밍할 수 없습니다: {name}')
+
+    return {
+        'name': name,
+        'flags': flags,
+        'method': method,
+        'crc': crc,
+        'compressed_size': compressed_size,
+        'size': size
+    }
+
+
+def _iter_member_data(reader, header):
+    """zip 항목 하나의 압축을 풀어 청크 단위로 반환하고, 끝에서 CRC32와 크기 검증"""
+    crc = 0
+    size = 0
+    compressed = 0
+
+    if header['method'] == METHOD_STORED:
+        remaining = header['compressed_size']
+        while remaining:
+            data = reader.read_some()
+            if not data:
+                raise ZipStreamError('zip 파일이 중간에 끊겼습니다.')
+            if len(data) > remaining:
+                reader.unread(data[remaining:])
+                data = data[:remaining]
+            remaining -= len(data)
+            compressed += len(data)
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            yield data
+    else:
+        # raw deflate 스트림은 스스로 끝을 알 수 있어 크기 정보 없이도 읽을 수 있음
+        decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+        while not decompressor.eof:
+            data = reader.read_some()
+            if not data:
+                raise ZipStreamError('zip 파일이 중간에 끊겼습니다.')
+            compressed += len(data)
+            try:
+                output = decompressor.decompress(data)
+            except zlib.error as e:
+                raise ZipStreamError(f'압축 해제 실패: {e}') from e
+            if output:
+                crc = zlib.crc32(output, crc)
+                size += len(output)
+                yield output
+        if decompressor.unused_data:
+            compressed -= len(decompressor.unused_data)
+            reader.unread(decompressor.unused_data)
+
+    expected_crc, expected_compressed, expected_size = header['crc'], header['compressed_size'], header['size']
+    if header['flags'] & FLAG_DATA_DESCRIPTOR:
+        # 데이터 뒤의 descriptor에 CRC와 크기가 있음 (서명은 선택 사항)
+        if reader.peek(4) == DATA_DESCRIPTOR_SIGNATURE:
+            reader.read_exact(4)
+        expected_crc, expected_compressed, expected_size = struct.unpack('<III', reader.read_exact(12))
+
+    if compressed != expected_compressed or size != expected_size:
+        raise ZipStreamError(
+            f"zip 항목 크기가 맞지 않습니다 ({header['name']}: {size:,}/{expected_size:,}바이트)")
+    if crc != expected_crc:
+        raise ZipStreamError(f"zip 항목 CRC32가 맞지 않습니다 ({header['name']})")
+
+
+class ZipMemberStream(io.RawIOBase):
+    """zip 스트림 안의 XML 항목을 파일 객체처럼 읽기 (ET.iterparse에 그대로 전달)
+
+    항목을 끝까지 읽으면 CRC32/크기를 검증하고, 나머지 zip 데이터를 읽어 중앙 디렉터리 종료 레코드,
+    전체 크기와 SHA-256(expected_sha256이 있으면 비교)을 확인한다. 검증에 실패하면 마지막 read()에서
+    ZipStreamError가 발생하므로 적재 트랜잭션이 커밋되지 않는다.
+    """
+
+    def __init__(self, raw, suffix='.xml', expected_size=None, expected_sha256=None):
+        super().__init__()
+        self._reader = _ByteReader(raw)
+        self._suffix = suffix.lower()
+        self._expected_size = expected_size
+        self._expected_sha256 = expected_sha256.lower() if expected_sha256 else None
+        self._chunks = None
+        self._pending = b''
+        self._offset = 0
+        self.member_name = None
+        self.member_size = 0
+        self.total_bytes = None
+        self.sha256 = None
+
+    def readable(self):
+        return True
+
+    def _open_member(self):
+        if self._reader.peek(4) != LOCAL_HEADER_SIGNATURE:
+            raise ZipStreamError(describe_non_zip(self._reader.peek(4096)))
+        while True:
+            header = _read_local_header(self._reader)
+            if header is None:
+                raise ZipStreamError(f'zip 안에 {self._suffix} 파일이 없습니다.')
+            if header['name'].lower().endswith(self._suffix):
+                self.member_name = header['name']
+                return _iter_member_data(self._reader, header)
+            # 찾는 항목이 아니면 압축만 풀어 버리고 다음 항목으로
+            for _ in _iter_member_data(self._reader, header):
+                pass
+
+    def _finish(self):
+        self._reader.drain()
+        self.total_bytes = self._reader.bytes_read
+        self.sha256 = self._reader.sha256.hexdigest()
+        if not self._reader.has_end_record():
+            # 항목 데이터는 온전해도 뒤의 중앙 디렉터리가 잘렸으면 파일이 끝까지 오지 않은 것
+            raise ZipStreamError('zip 파일이 중간에 끊겼습니다.')
+        if self._expected_size is not None and self.total_bytes != self._expected_size:
+            raise ZipStreamError(
+                f'다운로드 크기가 맞지 않습니다 ({self.total_bytes:,}/{self._expected_size:,}바이트)')
+        if self._expected_sha256 and self.sha256 != self._expected_sha256:
+            raise ZipStreamError(f'SHA-256이 맞지 않습니다 ({self.sha256})')
+
+    def readinto(self, buffer):
+        if self._chunks is None:
+            self._chunks = self._open_member()
+        while self._offset >= len(self._pending):
+            try:
+                self._pending = next(self._chunks)
+                self._offset = 0
+            except StopIteration:
+                if self.total_bytes is None:
+                    self._finish()
+                return 0
+        size = min(len(buffer), len(self._pending) - self._offset)
+        buffer[:size] = self._pending[self._offset:self._offset + size]
+        self._offset += size
+        self.member_size += size
+        return size
+
+
+def describe_non_zip(head):
+    """zip이 아닌 응답(DART 오류 XML 등)의 내용을 오류 메시지로 변환"""
+    text = head.decode('utf-8', errors='replace')
+    status = _between(text, '<status>', '</status>')
+    message = _between(text, '<message>', '</message>')
+    if status:
+        return f"DART 오류 ({status}): {message or DART_STATUS_CODES.get(status, '알 수 없는 오류')}"
+    return 'zip 파일이 아닙니다.'
+
+
+def _between(text, start, end):
+    begin = text.find(start)
+    if begin < 0:
+        return None
+    begin += len(start)
+    finish = text.find(end, begin)
+    return text[begin:finish].strip() if finish >= 0 else None
+
+
+def dart_corpcode_url(base_url=DART_API_BASE_URL):
+    """DART 기업코드 zip 다운로드 URL"""
+    return f'{base_url.rstrip("/")}/corpCode.xml'
+
+
+def open_corpcode_zip(source, api_key=None, expected_sha256=None, timeout=DOWNLOAD_TIMEOUT):
+    """파일 경로 또는 HTTP(S) URL의 CORPCODE.zip을 열어 (XML 스트림, 닫기 함수) 반환
+
+    URL이면 응답을 스트리밍으로 읽고 Content-Length로 전체 크기를 검증한다.
+    api_key가 있으면 crtfc_key 파라미터로 전달한다.
+    """
+    if source.startswith(('http://', 'https://')):
+        params = {'crtfc_key': api_key} if api_key else None
+        try:
+            response = requests.get(source, params=params, stream=True, timeout=timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise redacted_request_error(e, api_key) from None
+        # zip 본문은 압축 전송 대상이 아니지만, 혹시 적용되어 있으면 풀어서 읽음
+        response.raw.decode_content = True
+        length = response.headers.get('Content-Length')
+        encoded = response.headers.get('Content-Encoding', 'identity') != 'identity'
+        stream = ZipMemberStream(response.raw,
+                                 expected_size=int(length) if length and not encoded else None,
+                                 expected_sha256=expected_sha256)
+        return stream, response.close
+
+    raw = open(source, 'rb')
+    return ZipMemberStream(raw, expected_sha256=expected_sha256), raw.close
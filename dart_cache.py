@@ -0,0 +1,329 @@
+"""DART 재무정보 응답 캐시 (메모리 LRU + SQLite 영구 저장)"""
+import argparse
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB_NAME = 'dart_cache.db'
+
+# 캐시 설정 (환경 변수로 조정 가능)
+MEMORY_MAX_ENTRIES = int(os.getenv('DART_CACHE_MEMORY_SIZE', '256'))
+TTL_CLOSED_YEAR = int(os.getenv('DART_CACHE_TTL_CLOSED', str(30 * 24 * 3600)))  # 마감된 사업연도: 30일
+TTL_CURRENT_YEAR = int(os.getenv('DART_CACHE_TTL_CURRENT', str(6 * 3600)))  # 진행 중인 사업연도: 6시간
+HIT_FLUSH_INTERVAL = float(os.getenv('DART_CACHE_HIT_FLUSH_INTERVAL', '60'))  # 디스크 적중 횟수를 모아 기록하는 주기(초)
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_schema_ready = False
+_stats = {
+    'memory_hits': 0,
+    'disk_hits': 0,
+    'misses': 0,
+    'stores': 0
+}
+# 조회마다 쓰기 트랜잭션을 열지 않도록 디스크 적중 횟수는 모아 두었다가 HIT_FLUSH_INTERVAL마다 기록
+_pending_hits = {}  # key -> 아직 기록하지 않은 디스크 적중 횟수
+_hit_state = {'flushed_at': time.time()}
+
+
+def get_cache_path():
+    """캐시 DB 경로 (companies.db와 같은 디렉토리)"""
+    return os.path.join(os.getenv('DATA_PATH', ''), CACHE_DB_NAME)
+
+
+def ttl_for(bsns_year):
+    """사업연도에 따른 캐시 유효기간(초)"""
+    try:
+        year = int(bsns_year)
+    except (TypeError, ValueError):
+        return TTL_CURRENT_YEAR
+    return TTL_CLOSED_YEAR if year < datetime.now().year else TTL_CURRENT_YEAR
+
+
+def _connect():
+    """캐시 DB 연결 (최초 연결 시 테이블 생성)"""
+    global _schema_ready
+    path = get_cache_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    if not _schema_ready:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS dart_financial_cache (
+            corp_code TEXT NOT NULL,
+            bsns_year TEXT NOT NULL,
+            reprt_code TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            fetched_at REAL NOT NULL,
+            expires_at REAL NOT NULL,
+            hit_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (corp_code, bsns_year, reprt_code)
+        )
+        ''')
+        conn.commit()
+        _schema_ready = True
+    return conn
+
+
+def _remember(key, payload, expires_at):
+    """메모리 LRU에 저장 (호출 측에서 _lock 보유)"""
+    _memory[key] = (payload, expires_at)
+    _memory.move_to_end(key)
+    while len(_memory) > MEMORY_MAX_ENTRIES:
+        _memory.popitem(last=False)
+
+
+def get(corp_code, bsns_year, reprt_code):
+    """캐시된 DART 응답 조회 (없거나 만료되면 None)"""
+    key = (corp_code, str(bsns_year), str(reprt_code))
+    now = time.time()
+
+    # 1단계: 메모리 LRU
+    with _lock:
+        entry = _memory.get(key)
+        if entry is not None:
+            if entry[1] > now:
+                _memory.move_to_end(key)
+                _stats['memory_hits'] += 1
+                metrics.inc('cache_requests_total', cache='dart', result='memory_hit')
+                return entry[0]
+            del _memory[key]
+
+    # 2단계: SQLite
+    try:
+        conn = _connect()
+        try:
+            with metrics.timer('db_query_duration_seconds', db='dart_cache', operation='get'):
+                row = conn.execute(
+                    'SELECT payload, expires_at FROM dart_financial_cache '
+                    'WHERE corp_code = ? AND bsns_year = ? AND reprt_code = ?',
+                    key
+                ).fetchone()
+            if row is not None and row['expires_at'] > now:
+                payload = json.loads(row['payload'])
+                with _lock:
+                    _remember(key, payload, row['expires_at'])
+                    _stats['disk_hits'] += 1
+                    _pending_hits[key] = _pending_hits.get(key, 0) + 1
+                    flush_due = now - _hit_state['flushed_at'] >= HIT_FLUSH_INTERVAL
+                metrics.inc('cache_requests_total', cache='dart', result='disk_hit')
+                if flush_due:
+                    flush_hits(conn)
+                return payload
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("DART 캐시 조회 오류: %s", e)
+
+    with _lock:
+        _stats['misses'] += 1
+    metrics.inc('cache_requests_total', cache='dart', result='miss')
+    return None
+
+
+def put(corp_code, bsns_year, reprt_code, payload):
+    """DART 응답을 캐시에 저장"""
+    key = (corp_code, str(bsns_year), str(reprt_code))
+    now = time.time()
+    expires_at = now + ttl_for(bsns_year)
+
+    with _lock:
+        _remember(key, payload, expires_at)
+        _stats['stores'] += 1
+        # 새로 저장한 항목은 적중 횟수가 0부터 시작
+        _pending_hits.pop(key, None)
+
+    try:
+        conn = _connect()
+        try:
+            conn.execute('''
+            INSERT OR REPLACE INTO dart_financial_cache
+            (corp_code, bsns_year, reprt_code, payload, fetched_at, expires_at, hit_count)
+            VALUES (?, ?, ?, ?, ?, ?, 0)
+            ''', key + (json.dumps(payload, ensure_ascii=False), now, expires_at))
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("DART 캐시 저장 오류: %s", e)
+
+
+def flush_hits(conn=None):
+    """모아 둔 디스크 적중 횟수를 한 트랜잭션으로 기록 (실패하면 다음 기록 때 다시 시도)"""
+    with _lock:
+        _hit_state['flushed_at'] = time.time()
+        if not _pending_hits:
+            return
+        pending = dict(_pending_hits)
+        _pending_hits.clear()
+
+    own_conn = conn is None
+    try:
+        conn = conn or _connect()
+        try:
+            conn.executemany(
+                'UPDATE dart_financial_cache SET hit_count = hit_count + ? '
+                'WHERE corp_code = ? AND bsns_year = ? AND reprt_code = ?',
+                [(count, *key) for key, count in pending.items()]
+            )
+            conn.commit()
+        finally:
+            if own_conn:
+                conn.close()
+    except sqlite3.Error as e:
+        logger.warning("DART 캐시 적중 횟수 기록 실패 (다음 주기에 재시도): %s", e)
+        with _lock:
+            for key, count in pending.items():
+                _pending_hits[key] = _pending_hits.get(key, 0) + count
+
+
+def purge(corp_code=None, bsns_year=None, expired_only=False):
+    """캐시 항목 삭제 후 삭제된 건수 반환"""
+    conditions = []
+    params = []
+    if corp_code:
+        conditions.append('corp_code = ?')
+        params.append(corp_code)
+    if bsns_year:
+        conditions.append('bsns_year = ?')
+        params.append(str(bsns_year))
+    if expired_only:
+        conditions.append('expires_at <= ?')
+        params.append(time.time())
+
+    query = 'DELETE FROM dart_financial_cache'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+
+    conn = _connect()
+    try:
+        deleted = conn.execute(query, params).rowcount
+        conn.commit()
+    finally:
+        conn.close()
+
+    # 메모리 캐시도 같은 조건으로 정리
+    with _lock:
+        now = time.time()
+        for key in list(_memory):
+            if corp_code and key[0] != corp_code:
+                continue
+            if bsns_year and key[1] != str(bsns_year):
+                continue
+            if expired_only and _memory[key][1] > now:
+                continue
+            del _memory[key]
+
+    return deleted
+
+
+def entries(corp_code=None, limit=50):
+    """저장된 캐시 항목 목록 (최근 조회 순)"""
+    flush_hits()
+    query = '''
+    SELECT corp_code, bsns_year, reprt_code, fetched_at, expires_at, hit_count,
+           LENGTH(payload) AS size
+    FROM dart_financial_cache
+    '''
+    params = []
+    if corp_code:
+        query += ' WHERE corp_code = ?'
+        params.append(corp_code)
+    query += ' ORDER BY fetched_at DESC LIMIT ?'
+    params.append(limit)
+
+    conn = _connect()
+    try:
+        return [dict(row) for row in conn.execute(query, params).fetchall()]
+    finally:
+        conn.close()
+
+
+def stats():
+    """캐시 적중/실패 통계"""
+    with _lock:
+        result = dict(_stats)
+        result['memory_entries'] = len(_memory)
+
+    lookups = result['memory_hits'] + result['disk_hits'] + result['misses']
+    result['hit_rate'] = round((result['memory_hits'] + result['disk_hits']) / lookups, 3) if lookups else 0.0
+
+    flush_hits()
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute('''
+            SELECT COUNT(*) AS disk_entries,
+                   COALESCE(SUM(hit_count), 0) AS disk_hit_total,
+                   COALESCE(SUM(expires_at <= ?), 0) AS expired_entries
+            FROM dart_financial_cache
+            ''', (time.time(),)).fetchone()
+            result.update(dict(row))
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("DART 캐시 통계 조회 오류: %s", e)
+
+    return result
+
+
+atexit.register(flush_hits)
+
+
+def _format_ts(ts):
+    return datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def main():
+    """캐시 관리 CLI"""
+    parser = argparse.ArgumentParser(description='DART 재무정보 캐시 관리')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('stats', help='캐시 통계 출력')
+
+    list_parser = subparsers.add_parser('list', help='캐시 항목 조회')
+    list_parser.add_argument('--corp', help='기업코드')
+    list_parser.add_argument('--limit', type=int, default=50)
+
+    purge_parser = subparsers.add_parser('purge', help='캐시 항목 삭제')
+    purge_parser.add_argument('--corp', help='기업코드')
+    purge_parser.add_argument('--year', help='사업연도')
+    purge_parser.add_argument('--expired', action='store_true', help='만료된 항목만 삭제')
+
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        result = stats()
+        print(f"캐시 파일: {get_cache_path()}")
+        print(f"저장된 항목: {result.get('disk_entries', 0):,}개 (만료: {result.get('expired_entries', 0):,}개)")
+        print(f"누적 디스크 적중: {result.get('disk_hit_total', 0):,}회")
+    elif args.command == 'list':
+        rows = entries(args.corp, args.limit)
+        now = time.time()
+        for row in rows:
+            state = '만료' if row['expires_at'] <= now else '유효'
+            print(f"- {row['corp_code']} {row['bsns_year']} {row['reprt_code']} "
+                  f"[{state}] 저장: {_format_ts(row['fetched_at'])}, 만료: {_format_ts(row['expires_at'])}, "
+                  f"적중: {row['hit_count']}회, 크기: {row['size']:,}B")
+        print(f"총 {len(rows)}개 항목")
+    elif args.command == 'purge':
+        deleted = purge(args.corp, args.year, args.expired)
+        print(f"삭제 완료: {deleted}개 항목")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""DART Open API HTTP 클라이언트 (연결 풀 + 재시도)"""
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DART_API_BASE_URL = "https://opendart.fss.or.kr/api"
+
+# API 응답 상태 코드
+DART_STATUS_CODES = {
+    '000': '정상',
+    '010': '등록되지 않은 키입니다.',
+    '011': '사용할 수 없는 키입니다.',
+    '012': '접근할 수 없는 IP입니다.',
+    '013': '조회된 데이터가 없습니다.',
+    '014': '파일이 존재하지 않습니다.',
+    '020': '요청 제한을 초과하였습니다.',
+    '100': '필드의 부적절한 값입니다.',
+    '800': '시스템 점검 중입니다.',
+    '900': '정의되지 않은 오류가 발생하였습니다.'
+}
+
+# 재시도할 DART 상태 코드별 기본 대기 시간(초)
+RETRY_BACKOFF_BASE = {
+    '020': 1.0,  # 요청 제한 초과
+    '800': 3.0,  # 시스템 점검
+}
+# 재시도할 HTTP 상태 코드
+RETRY_HTTP_STATUS = {429, 500, 502, 503, 504}
+
+MAX_RETRIES = int(os.getenv('DART_MAX_RETRIES', '3'))
+BACKOFF_CAP = float(os.getenv('DART_BACKOFF_CAP', '10'))
+POOL_SIZE = int(os.getenv('DART_POOL_SIZE', '10'))
+DEFAULT_TIMEOUT = float(os.getenv('DART_TIMEOUT', '10'))
+
+
+# 요청 URL의 인증키 파라미터 (requests 예외 메시지에 URL이 그대로 들어감)
+API_KEY_PARAM_PATTERN = re.compile(r'(crtfc_key=)[^&\s\'")]+')
+
+
+def redact_api_key(text, api_key=None):
+    """문자열(예외 메시지, URL)에서 DART 인증키를 가림"""
+    text = API_KEY_PARAM_PATTERN.sub(r'\1***', str(text))
+    if api_key:
+        text = text.replace(api_key, '***')
+    return text
+
+
+def redacted_request_error(error, api_key=None):
+    """인증키를 가린 메시지의 같은 종류 requests 예외 (except requests.exceptions.Timeout 등은 그대로 동작)
+
+    원래 예외의 메시지와 요청 객체(URL)에는 인증키가 들어 있으므로 요청 객체는 넘기지 않는다.
+    """
+    message = redact_api_key(error, api_key)
+    try:
+        return type(error)(message, response=error.response)
+    except TypeError:
+        return requests.exceptions.RequestException(message, response=error.response)
+
+
+def backoff_delay(attempt, base):
+    """지터가 적용된 지수 백오프 대기 시간 (full jitter)"""
+    return random.uniform(0, min(BACKOFF_CAP, base * (2 ** attempt)))
+
+
+class DartResult:
+    """DART API 호출 결과"""
+
+    def __init__(self, data, latency, attempts, http_status):
+        self.data = data
+        self.latency = latency  # 마지막 시도의 왕복 시간(초)
+        self.attempts = attempts
+        self.http_status = http_status
+
+    @property
+    def status(self):
+        return self.data.get('status')
+
+    @property
+    def message(self):
+        return DART_STATUS_CODES.get(self.status, '알 수 없는 상태')
+
+
+class DartClient:
+    """워커 프로세스별 requests.Session 연결 풀을 공유하는 DART 클라이언트"""
+
+    def __init__(self, api_key, base_url=DART_API_BASE_URL, max_retries=MAX_RETRIES,
+                 timeout=DEFAULT_TIMEOUT, rate_limiter=None):
+        self.api_key = api_key
+        self.rate_limiter = rate_limiter
+        self.base_url = base_url.rstrip('/')
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._session = None
+        self._session_pid = None
+        self._lock = threading.Lock()
+        self._latency = {}
+
+    def _get_session(self):
+        """현재 프로세스의 세션 반환 (gunicorn fork 이후에는 새로 생성)"""
+        pid = os.getpid()
+        if self._session is None or self._session_pid != pid:
+            with self._lock:
+                if self._session is None or self._session_pid != pid:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    session.headers.update({'Connection': 'keep-alive'})
+                    self._session = session
+                    self._session_pid = pid
+        return self._session
+
+    def _record_latency(self, endpoint, latency, status):
+        """응답 시간 기록 (status: DART 상태 코드, HTTP 오류는 http_<코드>, 연결 실패는 오류 이름)"""
+        metrics.observe('dart_request_duration_seconds', latency, endpoint=endpoint, status=status)
+        with self._lock:
+            stats = self._latency.setdefault(endpoint, {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0})
+            stats['count'] += 1
+            stats['total'] += latency
+            stats['max'] = max(stats['max'], latency)
+            stats['last'] = latency
+
+    def latency_stats(self):
+        """엔드포인트별 응답 시간 통계 (초)"""
+        with self._lock:
+            return {
+                endpoint: {
+                    'count': s['count'],
+                    'avg': round(s['total'] / s['count'], 4) if s['count'] else 0.0,
+                    'max': round(s['max'], 4),
+                    'last': round(s['last'], 4)
+                }
+                for endpoint, s in self._latency.items()
+            }
+
+    def get(self, endpoint, params, timeout=None):
+        """DART API 호출 (JSON 응답), 일시적 오류는 백오프 후 재시도
+
+        재시도 후에도 네트워크 오류가 계속되면 같은 종류의 requests 예외를 전달하되,
+        메시지의 요청 URL에 들어 있는 인증키(crtfc_key)는 가린다 (호출 측이 예외를 그대로 로그에 남겨도 안전).
+        rate_limiter가 있으면 재시도를 포함한 모든 호출마다 토큰을 획득한다
+        (한도 초과 시 rate_limiter.RateLimitExceeded).
+        """
+        try:
+            return self._get(endpoint, params, timeout)
+        except requests.exceptions.InvalidJSONError:
+            raise  # 메시지에 URL이 없음
+        except requests.exceptions.RequestException as e:
+            # 원래 예외를 연결하면 로그의 traceback에 인증키가 다시 나오므로 끊음
+            raise redacted_request_error(e, self.api_key) from None
+
+    def _get(self, endpoint, params, timeout=None):
+        url = f"{self.base_url}/{endpoint}"
+        query = dict(params, crtfc_key=self.api_key)
+        session = self._get_session()
+        attempt = 0
+
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = session.get(url, params=query, timeout=timeout or self.timeout)
+                latency = time.perf_counter() - started
+
+                if not response.ok:
+                    self._record_latency(endpoint, latency, f'http_{response.status_code}')
+                    if response.status_code in RETRY_HTTP_STATUS and attempt < self.max_retries:
+                        delay = backoff_delay(attempt, 1.0)
+                        logger.warning("DART HTTP %s (%s), %.2f초 후 재시도", response.status_code, endpoint, delay)
+                        time.sleep(delay)
+                        attempt += 1
+                        continue
+                    response.raise_for_status()
+
+                try:
+                    data = response.json()
+                except ValueError:
+                    self._record_latency(endpoint, latency, 'invalid_json')
+                    raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record_latency(endpoint, time.perf_counter() - started, type(e).__name__)
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, 1.0)
+                logger.warning("DART 연결 오류 (%s): %s, %.2f초 후 재시도", endpoint, type(e).__name__, delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            status = data.get('status')
+            self._record_latency(endpoint, latency, status or 'unknown')
+            if status in RETRY_BACKOFF_BASE and attempt < self.max_retries:
+                delay = backoff_delay(attempt, RETRY_BACKOFF_BASE[status])
+                logger.warning("DART 상태 %s (%s), %.2f초 후 재시도", status, DART_STATUS_CODES.get(status), delay)
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            return DartResult(data, latency, attempt + 1, response.status_code)
@@ -0,0 +1,217 @@
+"""companies.db 연결 관리 (워커별 읽기 전용 연결 풀 + 회사 정보 캐시)"""
+import logging
+import os
+import queue
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = 'companies.db'
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))  # 워커 프로세스당 보관할 유휴 연결 수
+MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(256 * 1024 * 1024)))  # 메모리 매핑 크기(바이트)
+CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '16384'))  # 연결당 페이지 캐시(KB)
+STATEMENT_CACHE_SIZE = 256  # 연결당 준비된 SQL 문 캐시 개수
+BUSY_TIMEOUT = 5  # 잠금 대기 시간(초)
+
+COMPANY_CACHE_TTL = int(os.getenv('COMPANY_CACHE_TTL', '300'))  # 회사 정보 캐시 유효시간(초)
+COMPANY_CACHE_MAX_ENTRIES = 2048
+
+
+def get_db_path():
+    """DATA_PATH 기준 companies.db 경로"""
+    return os.path.join(os.getenv('DATA_PATH', ''), DB_NAME)
+
+
+def bootstrap_database(path=None):
+    """시작 시 한 번: 데이터 디렉터리에 DB가 없으면 복사하고 WAL 모드로 전환
+
+    여러 워커가 동시에 시작해도 반쯤 복사된 파일을 열지 않도록 임시 파일에 복사한 뒤 교체한다.
+    """
+    path = path or get_db_path()
+    if not os.path.exists(path) and os.path.exists(DB_NAME) and os.path.abspath(path) != os.path.abspath(DB_NAME):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        shutil.copy2(DB_NAME, temp_path)
+        os.replace(temp_path, path)
+        logger.info("데이터베이스를 복사했습니다: %s → %s", DB_NAME, path)
+
+    if not os.path.exists(path):
+        logger.error("데이터베이스 파일이 없습니다: %s", path)
+        return False
+
+    # journal_mode는 파일에 기록되므로 쓰기 연결로 한 번만 설정
+    conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT)
+    try:
+        conn.execute('PRAGMA journal_mode=WAL')
+    finally:
+        conn.close()
+    return True
+
+
+class PooledConnection:
+    """풀에서 빌린 연결 (close() 시 닫지 않고 풀에 반환)"""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            self._pool._release(self._conn)
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class ConnectionPool:
+    """읽기 전용 SQLite 연결 풀 (스레드 안전, gunicorn fork 이후 워커별로 새로 구성)"""
+
+    def __init__(self, path=None, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_idle(self):
+        pid = os.getpid()
+        if self._idle is None or self._pid != pid:
+            with self._lock:
+                if self._idle is None or self._pid != pid:
+                    # 부모 프로세스에서 연 연결은 fork 이후 공유하지 않고 버림
+                    self._idle = queue.LifoQueue(maxsize=self.size)
+                    self._pid = pid
+        return self._idle
+
+    def _open(self):
+        path = os.path.abspath(self.path or get_db_path())
+        conn = sqlite3.connect(
+            f'file:{path}?mode=ro', uri=True, timeout=BUSY_TIMEOUT,
+            check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA query_only=ON')
+        conn.execute(f'PRAGMA mmap_size={MMAP_SIZE}')
+        conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    def connect(self):
+        """유휴 연결을 빌리고, 없으면 새로 연다"""
+        try:
+            conn = self._get_idle().get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        return PooledConnection(self, conn)
+
+    def _release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        idle = self._get_idle()
+        try:
+            idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def clear(self):
+        """유휴 연결 모두 닫기 (DB 파일 교체 후 호출)"""
+        idle = self._get_idle()
+        while True:
+            try:
+                idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+pool = ConnectionPool()
+
+_company_cache = OrderedDict()
+_company_lock = threading.Lock()
+
+
+def get_connection():
+    """풀에서 읽기 전용 연결 빌리기 (사용 후 close()로 반환)"""
+    return pool.connect()
+
+
+def get_company(corp_code):
+    """corp_code로 회사 행 조회 (dict, 없으면 None), 워커별로 잠시 캐시
+
+    상세 페이지, 재무정보, AI 보고서 요청이 같은 회사를 연달아 조회하므로 한 번만 읽는다.
+    """
+    now = time.time()
+    with _company_lock:
+        cached = _company_cache.get(corp_code)
+        if cached and cached[1] > now:
+            _company_cache.move_to_end(corp_code)
+            metrics.inc('cache_requests_total', cache='company', result='hit')
+            return dict(cached[0]) if cached[0] is not None else None
+
+    metrics.inc('cache_requests_total', cache='company', result='miss')
+    with get_connection() as conn, metrics.timer('db_query_duration_seconds', db='companies', operation='get_company'):
+        row = conn.execute('SELECT * FROM companies WHERE corp_code = ?', (corp_code,)).fetchone()
+    company = dict(row) if row is not None else None
+
+    with _company_lock:
+        _company_cache[corp_code] = (company, now + COMPANY_CACHE_TTL)
+        _company_cache.move_to_end(corp_code)
+        while len(_company_cache) > COMPANY_CACHE_MAX_ENTRIES:
+            _company_cache.popitem(last=False)
+    return dict(company) if company is not None else None
+
+
+def get_companies(corp_codes):
+    """여러 회사 행을 한 번에 조회 ({corp_code: dict}, 없는 회사는 제외)
+
+    캐시에 없는 회사만 IN 쿼리 하나로 읽고, 결과(없는 회사 포함)를 get_company와 같은 캐시에 넣는다.
+    """
+    now = time.time()
+    companies = {}
+    missing = []
+    with _company_lock:
+        unique = dict.fromkeys(corp_codes)
+        for corp_code in unique:
+            cached = _company_cache.get(corp_code)
+            if cached and cached[1] > now:
+                _company_cache.move_to_end(corp_code)
+                if cached[0] is not None:
+                    companies[corp_code] = dict(cached[0])
+            else:
+                missing.append(corp_code)
+
+    metrics.inc('cache_requests_total', len(unique) - len(missing), cache='company', result='hit')
+    if missing:
+        metrics.inc('cache_requests_total', len(missing), cache='company', result='miss')
+        with get_connection() as conn, metrics.timer('db_query_duration_seconds', db='companies',
+                                                     operation='get_companies'):
+            rows = conn.execute(
+                f"SELECT * FROM companies WHERE corp_code IN ({','.join('?' * len(missing))})", missing
+            ).fetchall()
+        found = {row['corp_code']: dict(row) for row in rows}
+
+        with _company_lock:
+            for corp_code in missing:
+                company = found.get(corp_code)
+                _company_cache[corp_code] = (company, now + COMPANY_CACHE_TTL)
+                _company_cache.move_to_end(corp_code)
+                if company is not None:
+                    companies[corp_code] = dict(company)
+            while len(_company_cache) > COMPANY_CACHE_MAX_ENTRIES:
+                _company_cache.popitem(last=False)
+    return companies
@@ -0,0 +1,168 @@
+"""DART 재무제표 목록의 계정 색인 (한 번 훑어 만들고 재무비율/차트/표가 함께 사용)"""
+from decimal import Decimal, InvalidOperation
+
+# DART 금액 필드 → 기간 이름
+PERIOD_FIELDS = (
+    ('current', 'thstrm_amount'),     # 당기
+    ('previous', 'frmtrm_amount'),    # 전기
+    ('previous2', 'bfefrmtrm_amount')  # 전전기
+)
+PERIODS = tuple(period for period, _ in PERIOD_FIELDS)
+
+INCOME_STATEMENT_DIVS = ('IS', 'CIS')  # 손익계산서, 포괄손익계산서
+
+# 표준 계정 → (재무제표 구분, IFRS account_id, 계정명 동의어)
+# 회사마다 계정명이 달라도(예: 수익(매출액)) account_id나 동의어로 같은 계정을 찾는다.
+ACCOUNTS = {
+    '자산총계': (('BS',), ('ifrs-full_Assets', 'ifrs_Assets'), ('자산총계',)),
+    '부채총계': (('BS',), ('ifrs-full_Liabilities', 'ifrs_Liabilities'), ('부채총계',)),
+    '자본총계': (('BS',), ('ifrs-full_Equity', 'ifrs_Equity'), ('자본총계',)),
+    '유동자산': (('BS',), ('ifrs-full_CurrentAssets', 'ifrs_CurrentAssets'), ('유동자산',)),
+    '유동부채': (('BS',), ('ifrs-full_CurrentLiabilities', 'ifrs_CurrentLiabilities'), ('유동부채',)),
+    '매출액': (INCOME_STATEMENT_DIVS, ('ifrs-full_Revenue', 'ifrs_Revenue'),
+            ('매출액', '수익(매출액)', '영업수익', '매출', '수익')),
+    '영업이익': (INCOME_STATEMENT_DIVS, ('dart_OperatingIncomeLoss',),
+             ('영업이익', '영업이익(손실)', '영업손익')),
+    '당기순이익': (INCOME_STATEMENT_DIVS, ('ifrs-full_ProfitLoss', 'ifrs_ProfitLoss'),
+              ('당기순이익', '당기순이익(손실)', '당기순손익', '분기순이익', '분기순이익(손실)',
+               '반기순이익', '반기순이익(손실)')),
+}
+
+EMPTY_AMOUNTS = {period: 0 for period in PERIODS}
+
+
+def parse_amount(value):
+    """DART 금액 문자열을 정수(원)로 변환, 값이 없으면 None
+
+    float을 거치지 않아 조 단위 금액도 정확하다.
+    """
+    if value is None:
+        return None
+    cleaned = str(value).replace(',', '').replace(' ', '')
+    if cleaned in ('', '-'):
+        return None
+    try:
+        return int(cleaned)
+    except ValueError:
+        try:
+            return int(Decimal(cleaned))
+        except InvalidOperation:
+            return None
+
+
+def normalize_account_name(name):
+    """계정명 비교용 정규화 (공백 제거)"""
+    return (name or '').replace(' ', '')
+
+
+class FinancialStatements:
+    """재무제표 항목 색인
+
+    (fs_div, sj_div, account_id) 와 (fs_div, sj_div, 계정명) 키로 세 기간의 정수 금액을 찾는다.
+    """
+
+    def __init__(self, items):
+        self._index = {}
+        self._items = {}
+        for item in items:
+            fs_div = item.get('fs_div')
+            sj_div = item.get('sj_div')
+            self._items.setdefault((fs_div, sj_div), []).append(item)
+
+            entry = {
+                'account_nm': item.get('account_nm'),
+                'account_id': item.get('account_id'),
+                'amounts': {period: parse_amount(item.get(field)) for period, field in PERIOD_FIELDS}
+            }
+            # 같은 키가 여러 번 나오면 DART 목록 순서상 먼저 나온 항목 사용
+            if entry['account_id']:
+                self._index.setdefault((fs_div, sj_div, entry['account_id']), entry)
+            self._index.setdefault((fs_div, sj_div, normalize_account_name(entry['account_nm'])), entry)
+
+    @classmethod
+    def from_dart(cls, data):
+        """DART 응답(dict)의 list로 색인 생성"""
+        return cls(data.get('list', []))
+
+    def __bool__(self):
+        return bool(self._items)
+
+    def items(self, fs_div, sj_div):
+        """원본 DART 항목 목록 (fs_div='CFS', sj_div='BS' 등)"""
+        return self._items.get((fs_div, sj_div), [])
+
+    def find(self, account, fs_div='CFS'):
+        """표준 계정(ACCOUNTS의 키) 또는 계정명으로 항목 찾기, 없으면 None"""
+        sj_divs, account_ids, names = ACCOUNTS.get(account, (None, (), (account,)))
+        if sj_divs is None:
+            sj_divs = tuple({sj_div for _, sj_div in self._items})
+        for sj_div in sj_divs:
+            for account_id in account_ids:
+                entry = self._index.get((fs_div, sj_div, account_id))
+                if entry:
+                    return entry
+            for name in names:
+                entry = self._index.get((fs_div, sj_div, normalize_account_name(name)))
+                if entry:
+                    return entry
+        return None
+
+    def amounts(self, account, fs_div='CFS'):
+        """계정의 기간별 금액 {'current', 'previous', 'previous2'} (없는 값은 0)"""
+        entry = self.find(account, fs_div)
+        if entry is None:
+            return dict(EMPTY_AMOUNTS)
+        return {period: amount or 0 for period, amount in entry['amounts'].items()}
+
+
+def account_matchers(accounts=None):
+    """저장된 항목을 표준 계정에 대응시키는 색인 (find와 같은 우선순위)
+
+    ({(sj_div, account_id): [(account, rank)]}, {(sj_div, 공백 없는 계정명): [(account, rank)]}) 반환.
+    rank가 작을수록 find가 먼저 찾는 항목이다.
+    """
+    by_id = {}
+    by_name = {}
+    for account in accounts or ACCOUNTS:
+        sj_divs, account_ids, names = ACCOUNTS[account]
+        for sj_position, sj_div in enumerate(sj_divs):
+            for position, account_id in enumerate(account_ids):
+                by_id.setdefault((sj_div, account_id), []).append((account, (sj_position, 0, position)))
+            for position, name in enumerate(names):
+                by_name.setdefault((sj_div, normalize_account_name(name)), []).append((account, (sj_position, 1, position)))
+    return by_id, by_name
+
+
+def history_fetch_years(end_year, years, covered=()):
+    """years년 이력을 채우는 데 필요한 사업연도 목록 (최신순)
+
+    보고서 하나가 당기·전기·전전기 3년을 포함하므로 아직 채워지지 않은 가장 최근 연도부터 3년 간격으로 고른다.
+    covered에 있는 연도는 이미 채워진 것으로 본다.
+    """
+    missing = set(range(end_year - years + 1, end_year + 1)) - set(covered)
+    fetch_years = []
+    while missing:
+        year = max(missing)
+        fetch_years.append(year)
+        missing -= {year - offset for offset in range(len(PERIODS))}
+    return fetch_years
+
+
+def merge_history(statements_by_year, accounts, fs_div='CFS'):
+    """여러 사업연도 보고서를 연도별 계정 금액으로 합침
+
+    statements_by_year는 {사업연도(int): FinancialStatements}. 같은 연도가 여러 보고서에 나오면
+    가장 최근 보고서(재작성된 값)를 사용한다. {account: {year: (amount, 보고서 사업연도)}} 반환.
+    """
+    merged = {account: {} for account in accounts}
+    for report_year in sorted(statements_by_year, reverse=True):
+        statements = statements_by_year[report_year]
+        for account in accounts:
+            entry = statements.find(account, fs_div)
+            if entry is None:
+                continue
+            for offset, period in enumerate(PERIODS):
+                amount = entry['amounts'][period]
+                if amount is not None:
+                    merged[account].setdefault(report_year - offset, (amount, report_year))
+    return merged
@@ -0,0 +1,356 @@
+"""재무제표 로컬 저장소 (정규화된 financial_items 테이블, 정수 금액)
+
+DART 응답을 계정·기간별 행으로 저장해 한 번 불러온 회사는 DART 없이 재무정보를 제공한다.
+같은 보고서를 다시 저장하면 기존 행을 교체하므로 여러 번 저장해도 결과가 같다.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import metrics
+from dart_cache import ttl_for
+from financial_statements import PERIOD_FIELDS, parse_amount
+
+STORE_DB_NAME = 'financials.db'
+
+# 기간 이름 필드 (예: thstrm_nm = '제 55 기'), 보고서 단위로 한 번만 저장
+PERIOD_NAME_FIELDS = ('thstrm_nm', 'frmtrm_nm', 'bfefrmtrm_nm')
+MAX_SQL_CORP_FILTER = 500  # account_rows에서 IN 조건으로 거를 최대 회사 수
+
+# 한 재무제표에 같은 계정명이 여러 번 나올 수 있으므로(ord, account_id가 다름) DART 목록 순서(seq)까지 키에 포함
+ITEMS_COLUMNS = ('corp_code', 'bsns_year', 'reprt_code', 'fs_div', 'sj_div', 'account_nm', 'period',
+                 'account_id', 'amount', 'seq', 'ord', 'currency')
+ITEMS_TABLE_SQL = '''
+CREATE TABLE IF NOT EXISTS {table} (
+    corp_code TEXT NOT NULL,
+    bsns_year TEXT NOT NULL,
+    reprt_code TEXT NOT NULL,
+    fs_div TEXT NOT NULL,
+    sj_div TEXT NOT NULL,
+    account_nm TEXT NOT NULL,
+    period TEXT NOT NULL,
+    account_id TEXT,
+    amount INTEGER,
+    seq INTEGER NOT NULL,
+    ord TEXT,
+    currency TEXT,
+    PRIMARY KEY (corp_code, bsns_year, reprt_code, fs_div, sj_div, account_nm, period, seq)
+) WITHOUT ROWID
+'''
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def get_store_path():
+    """저장소 DB 경로 (companies.db와 같은 디렉토리)"""
+    return os.path.join(os.getenv('DATA_PATH', ''), STORE_DB_NAME)
+
+
+def _connect():
+    """저장소 DB 연결 (최초 연결 시 테이블과 인덱스 생성)"""
+    global _schema_ready
+    path = get_store_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    if not _schema_ready:
+        with _schema_lock:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS financial_reports (
+                corp_code TEXT NOT NULL,
+                bsns_year TEXT NOT NULL,
+                reprt_code TEXT NOT NULL,
+                rcept_no TEXT,
+                period_names TEXT,
+                item_count INTEGER NOT NULL,
+                loaded_at REAL NOT NULL,
+                PRIMARY KEY (corp_code, bsns_year, reprt_code)
+            ) WITHOUT ROWID
+            ''')
+            conn.execute(ITEMS_TABLE_SQL.format(table='financial_items'))
+            _migrate_items_key(conn)
+            # 연도·계정별 전체 회사 조회용 (테이블을 읽지 않고 인덱스만으로 금액, 계정 선택 우선순위까지 반환)
+            conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_financial_items_lookup
+            ON financial_items(bsns_year, reprt_code, fs_div, sj_div, account_nm, period, corp_code, amount,
+                               account_id, seq)
+            ''')
+            # 이전 버전의 같은 용도 인덱스 (account_id, seq가 없어 재무비율 엔진 조회를 덮지 못함)
+            conn.execute('DROP INDEX IF EXISTS idx_financial_items_account')
+            conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_financial_items_account_id
+            ON financial_items(bsns_year, reprt_code, fs_div, account_id, period, corp_code, amount)
+            WHERE account_id IS NOT NULL
+            ''')
+            conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_financial_reports_year
+            ON financial_reports(bsns_year, reprt_code, loaded_at)
+            ''')
+            conn.commit()
+            _schema_ready = True
+    return conn
+
+
+def _items_key(conn):
+    return {row[1] for row in conn.execute('PRAGMA table_info(financial_items)').fetchall() if row[5]}
+
+
+def _migrate_items_key(conn):
+    """이전 버전(기본 키에 seq 없음)의 financial_items를 새 기본 키 테이블로 옮김
+
+    이전 버전은 중복 계정명 중 첫 항목만 저장했으므로, 빠진 항목은 보고서를 다시 저장할 때 채워진다.
+    """
+    if 'seq' in _items_key(conn):
+        return
+    conn.execute('BEGIN IMMEDIATE')
+    if 'seq' in _items_key(conn):  # 다른 워커가 먼저 옮김
+        conn.rollback()
+        return
+    columns = ', '.join(ITEMS_COLUMNS)
+    conn.execute('ALTER TABLE financial_items RENAME TO financial_items_old')
+    conn.execute(ITEMS_TABLE_SQL.format(table='financial_items'))
+    conn.execute(f'INSERT INTO financial_items ({columns}) SELECT {columns} FROM financial_items_old')
+    conn.execute('DROP TABLE financial_items_old')  # 이전 테이블의 인덱스도 함께 삭제되어 아래에서 다시 생성
+    conn.commit()
+
+
+def _item_rows(corp_code, bsns_year, reprt_code, items):
+    """DART 항목 목록을 financial_items 행으로 변환 (항목당 기간 3행)"""
+    for seq, item in enumerate(items):
+        for period, field in PERIOD_FIELDS:
+            yield (
+                corp_code, bsns_year, reprt_code,
+                item.get('fs_div') or '', item.get('sj_div') or '', item.get('account_nm') or '',
+                period, item.get('account_id'), parse_amount(item.get(field)),
+                seq, item.get('ord'), item.get('currency')
+            )
+
+
+@metrics.timed('db_query_duration_seconds', db='financials', operation='save_report')
+def save_report(corp_code, bsns_year, reprt_code, data, conn=None):
+    """정상(000) DART 응답을 저장 (같은 보고서의 기존 행은 교체), 저장한 항목 수 반환"""
+    if data.get('status') != '000':
+        return 0
+    key = (corp_code, str(bsns_year), str(reprt_code))
+    items = data.get('list', [])
+    rcept_no = next((item.get('rcept_no') for item in items if item.get('rcept_no')), None)
+    period_names = {field: next((item[field] for item in items if item.get(field)), None)
+                    for field in PERIOD_NAME_FIELDS}
+    period_names = {field: name for field, name in period_names.items() if name}
+
+    own_conn = conn is None
+    conn = conn or _connect()
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute(
+            'DELETE FROM financial_items WHERE corp_code = ? AND bsns_year = ? AND reprt_code = ?', key)
+        # 같은 계정명이 중복되어도 모든 항목을 저장 (조회할 때는 DART 목록에서 먼저 나온 항목이 우선)
+        conn.executemany('''
+        INSERT INTO financial_items
+        (corp_code, bsns_year, reprt_code, fs_div, sj_div, account_nm, period, account_id, amount, seq, ord, currency)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', _item_rows(*key, items))
+        conn.execute('''
+        INSERT INTO financial_reports
+        (corp_code, bsns_year, reprt_code, rcept_no, period_names, item_count, loaded_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(corp_code, bsns_year, reprt_code) DO UPDATE SET
+            rcept_no = excluded.rcept_no,
+            period_names = excluded.period_names,
+            item_count = excluded.item_count,
+            loaded_at = excluded.loaded_at
+        ''', (*key, rcept_no, json.dumps(period_names, ensure_ascii=False), len(items), time.time()))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if own_conn:
+            conn.close()
+    return len(items)
+
+
+def is_fresh(bsns_year, loaded_at, now=None):
+    """저장된 보고서를 DART 대신 써도 되는지 (마감된 사업연도는 항상, 진행 중이면 캐시 유효기간 내)"""
+    try:
+        if int(bsns_year) < datetime.now().year:
+            return True
+    except (TypeError, ValueError):
+        pass
+    return loaded_at + ttl_for(bsns_year) > (now or time.time())
+
+
+@metrics.timed('db_query_duration_seconds', db='financials', operation='load_report')
+def load_report(corp_code, bsns_year, reprt_code, fresh_only=True):
+    """저장된 보고서를 DART 응답 형식(dict)으로 반환, 없으면 None"""
+    key = (corp_code, str(bsns_year), str(reprt_code))
+    conn = _connect()
+    try:
+        report = conn.execute(
+            'SELECT * FROM financial_reports WHERE corp_code = ? AND bsns_year = ? AND reprt_code = ?', key
+        ).fetchone()
+        if report is None or (fresh_only and not is_fresh(bsns_year, report['loaded_at'])):
+            return None
+        rows = conn.execute('''
+        SELECT * FROM financial_items
+        WHERE corp_code = ? AND bsns_year = ? AND reprt_code = ?
+        ORDER BY seq
+        ''', key).fetchall()
+    finally:
+        conn.close()
+
+    # 기간별 행을 DART 항목 하나로 다시 묶음 (금액은 DART와 같은 콤마 문자열)
+    items = []
+    fields = dict(PERIOD_FIELDS)
+    period_names = json.loads(report['period_names'] or '{}')
+    for row in rows:
+        if not items or items[-1]['_seq'] != row['seq']:
+            items.append({
+                '_seq': row['seq'],
+                'rcept_no': report['rcept_no'],
+                'bsns_year': key[1],
+                'corp_code': corp_code,
+                'reprt_code': key[2],
+                'account_id': row['account_id'],
+                'account_nm': row['account_nm'],
+                'fs_div': row['fs_div'],
+                'sj_div': row['sj_div'],
+                'ord': row['ord'],
+                'currency': row['currency'],
+                **period_names
+            })
+        amount = row['amount']
+        items[-1][fields[row['period']]] = f'{amount:,}' if amount is not None else ''
+    for item in items:
+        del item['_seq']
+        for field in ('rcept_no', 'account_id'):
+            if item[field] is None:
+                del item[field]
+
+    return {'status': '000', 'message': '정상', 'list': items, 'loaded_at': report['loaded_at']}
+
+
+def report_loaded_at(corp_code, bsns_year, reprt_code):
+    """보고서의 마지막 저장 시각, 저장되지 않았으면 None"""
+    conn = _connect()
+    try:
+        row = conn.execute(
+            'SELECT loaded_at FROM financial_reports WHERE corp_code = ? AND bsns_year = ? AND reprt_code = ?',
+            (corp_code, str(bsns_year), str(reprt_code))
+        ).fetchone()
+    finally:
+        conn.close()
+    return row[0] if row is not None else None
+
+
+def report_version(bsns_year, reprt_code):
+    """사업연도·보고서의 저장 상태 (보고서 수, 마지막 저장 시각), 바뀌면 전체 회사 집계를 다시 만든다"""
+    conn = _connect()
+    try:
+        return tuple(conn.execute('''
+        SELECT COUNT(*), MAX(loaded_at) FROM financial_reports WHERE bsns_year = ? AND reprt_code = ?
+        ''', (str(bsns_year), str(reprt_code))).fetchone())
+    finally:
+        conn.close()
+
+
+def report_load_times(bsns_year, reprt_code):
+    """사업연도·보고서별 회사의 마지막 저장 시각 {corp_code: loaded_at}"""
+    conn = _connect()
+    try:
+        return dict(conn.execute(
+            'SELECT corp_code, loaded_at FROM financial_reports WHERE bsns_year = ? AND reprt_code = ?',
+            (str(bsns_year), str(reprt_code))
+        ).fetchall())
+    finally:
+        conn.close()
+
+
+@metrics.timed('db_query_duration_seconds', db='financials', operation='account_rows')
+def account_rows(bsns_year, reprt_code, fs_div, sj_divs, account_ids, names, corp_codes=None):
+    """전체(또는 corp_codes) 회사의 지정 계정 행 (corp_code, sj_div, account_id, account_nm, period, amount, seq)
+
+    account_id가 account_ids에 있거나 공백을 뺀 계정명이 names에 있는 항목만 읽는다.
+    """
+    sj_divs, account_ids, names = list(sj_divs), list(account_ids), list(names)
+    params = [str(bsns_year), str(reprt_code), fs_div, *sj_divs, *account_ids, *names]
+    corp_filter = ''
+    # 회사가 많으면 SQL 변수 개수 제한을 피해 읽은 뒤 거름
+    filter_after = corp_codes is not None and len(corp_codes) > MAX_SQL_CORP_FILTER
+    if corp_codes is not None and not filter_after:
+        corp_filter = f"AND corp_code IN ({','.join('?' * len(corp_codes))})"
+        params.extend(corp_codes)
+
+    conn = _connect()
+    conn.row_factory = None
+    try:
+        rows = conn.execute(f'''
+        SELECT corp_code, sj_div, account_id, account_nm, period, amount, seq
+        FROM financial_items
+        WHERE bsns_year = ? AND reprt_code = ? AND fs_div = ?
+          AND sj_div IN ({','.join('?' * len(sj_divs))})
+          AND (account_id IN ({','.join('?' * len(account_ids))})
+               OR REPLACE(account_nm, ' ', '') IN ({','.join('?' * len(names))}))
+          {corp_filter}
+        ''', params).fetchall()
+    finally:
+        conn.close()
+    if filter_after:
+        corp_codes = set(corp_codes)
+        rows = [row for row in rows if row[0] in corp_codes]
+    return rows
+
+
+def loaded_reports(corp_code):
+    """회사의 저장된 보고서 목록"""
+    conn = _connect()
+    try:
+        return [dict(row) for row in conn.execute(
+            'SELECT * FROM financial_reports WHERE corp_code = ? ORDER BY bsns_year DESC, reprt_code',
+            (corp_code,)
+        ).fetchall()]
+    finally:
+        conn.close()
+
+
+def stats():
+    """저장소 통계"""
+    conn = _connect()
+    try:
+        reports, companies = conn.execute(
+            'SELECT COUNT(*), COUNT(DISTINCT corp_code) FROM financial_reports').fetchone()
+        items = conn.execute('SELECT COUNT(*) FROM financial_items').fetchone()[0]
+    finally:
+        conn.close()
+    return {'reports': reports, 'companies': companies, 'items': items, 'path': get_store_path()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='재무제표 로컬 저장소 관리')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('stats', help='저장소 통계')
+    list_parser = sub.add_parser('list', help='회사의 저장된 보고서 목록')
+    list_parser.add_argument('corp_code')
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        for key, value in stats().items():
+            print(f"{key}: {value:,}" if isinstance(value, int) else f"{key}: {value}")
+    elif args.command == 'list':
+        for report in loaded_reports(args.corp_code):
+            loaded = time.strftime('%Y-%m-%d %H:%M', time.localtime(report['loaded_at']))
+            print(f"{report['bsns_year']} {report['reprt_code']} 항목 {report['item_count']}개 "
+                  f"(접수번호 {report['rcept_no'] or '-'}, 저장 {loaded})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""읽기 API의 HTTP 조건부 캐시 (강한 ETag, Last-Modified, Cache-Control, 304 Not Modified)
+
+ETag는 응답 본문이 아니라 원본 데이터의 버전(회사 modify_date, 통계 스냅샷 버전, 재무제표 저장 시각 등)으로
+만들어, 클라이언트가 If-None-Match로 재검증하면 본문을 만들지 않고 304로 응답할 수 있다.
+"""
+import hashlib
+import json
+import math
+from datetime import datetime, timedelta, timezone
+
+from flask import Response, jsonify, request
+
+SCHEMA_VERSION = 1  # 같은 데이터의 응답 형식이 바뀌면 올려서 기존 ETag를 무효화
+
+VARY = 'Accept-Encoding'
+ETAG_ENCODINGS = ('gzip', 'br')  # http_encoding이 압축한 응답의 ETag 접미사
+
+CACHE_CONTROL_COMPANY = 'public, max-age=300'  # 회사 정보/목록/통계 (회사 정보 적재 주기보다 충분히 짧게)
+CACHE_CONTROL_CLOSED_YEAR = 'public, max-age=86400, immutable'  # 마감된 사업연도 재무정보
+CACHE_CONTROL_CURRENT_YEAR = 'no-cache'  # 진행 중인 사업연도 재무정보 (매번 재검증)
+
+KST = timezone(timedelta(hours=9))
+
+
+def make_etag(*parts):
+    """데이터 버전 값들로 강한 ETag 생성 (따옴표 없는 값)"""
+    raw = json.dumps([SCHEMA_VERSION, *parts], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:32]
+
+
+def modify_date_timestamp(modify_date):
+    """DART modify_date(YYYYMMDD, 한국 시간)를 유닉스 시각으로 변환, 형식이 다르면 None"""
+    try:
+        return datetime.strptime(str(modify_date), '%Y%m%d').replace(tzinfo=KST).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def financial_cache_control(bsns_year, static=True):
+    """사업연도별 재무정보 Cache-Control (마감된 연도는 바뀌지 않으므로 immutable)
+
+    static=False면 응답에 시간이 지나며 바뀌는 항목이 있으므로 연도와 관계없이 매번 재검증한다.
+    """
+    try:
+        closed = static and int(bsns_year) < datetime.now().year
+    except (TypeError, ValueError):
+        closed = False
+    return CACHE_CONTROL_CLOSED_YEAR if closed else CACHE_CONTROL_CURRENT_YEAR
+
+
+def encoded_etag(etag, encoding):
+    """압축된 표현의 ETag (본문 바이트가 다르므로 인코딩 이름을 붙여 구분)"""
+    return f'{etag}-{encoding}'
+
+
+def matching_etag(etag, last_modified=None):
+    """요청의 조건부 헤더가 현재 버전과 같으면 일치한 ETag(압축된 표현 포함), 아니면 None
+
+    If-None-Match가 있으면 그것만 비교하고(약한 비교), 없을 때만 If-Modified-Since를 본다.
+    """
+    if request.if_none_match:
+        for candidate in (etag, *(encoded_etag(etag, encoding) for encoding in ETAG_ENCODINGS)):
+            if request.if_none_match.contains_weak(candidate):
+                return candidate
+        return None
+    if last_modified is not None and request.if_modified_since is not None:
+        if math.floor(last_modified) <= request.if_modified_since.timestamp():
+            return etag
+    return None
+
+
+def set_cache_headers(response, etag, last_modified=None, cache_control=CACHE_CONTROL_COMPANY, vary=VARY):
+    """ETag, Last-Modified, Cache-Control, Vary 설정"""
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = datetime.fromtimestamp(math.floor(last_modified), timezone.utc)
+    response.headers['Cache-Control'] = cache_control
+    if vary:
+        response.vary.add(vary)
+    return response
+
+
+def not_modified(etag, last_modified=None, cache_control=CACHE_CONTROL_COMPANY, vary=VARY):
+    """조건부 요청이 현재 버전과 같으면 304 응답, 아니면 None"""
+    matched = matching_etag(etag, last_modified)
+    if matched is None:
+        return None
+    return set_cache_headers(Response(status=304), matched, last_modified, cache_control, vary)
+
+
+def json_response(payload, etag, last_modified=None, cache_control=CACHE_CONTROL_COMPANY, vary=VARY):
+    """캐시 헤더를 붙인 JSON 응답 (조건부 요청이 일치하면 본문 없이 304)"""
+    response = not_modified(etag, last_modified, cache_control, vary)
+    if response is not None:
+        return response
+    return set_cache_headers(jsonify(payload), etag, last_modified, cache_control, vary)
@@ -0,0 +1,99 @@
+"""API 응답 인코딩: JSON 직렬화(orjson이 있으면 사용)와 Accept-Encoding에 따른 gzip/brotli 압축
+
+orjson과 brotli는 requirements.txt에 포함되어 있다. 설치되지 않은 환경에서는 표준 json(UTF-8 그대로, 압축 구분자)과
+gzip만 사용한다.
+"""
+import gzip
+import os
+
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+import http_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))  # 이보다 작은 응답은 압축하지 않음(바이트)
+GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))  # 요청마다 압축하므로 최고 품질(11)은 너무 느림
+COMPRESSIBLE_MIMETYPES = {'application/json'}
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson으로 직렬화하는 JSON 공급자 (키 정렬은 기본 공급자와 같고, NaN은 null)
+
+    dumps에 json.dumps 옵션(indent 등)을 넘기거나 디버그 모드의 들여쓰기 출력은 표준 json을 사용한다.
+    """
+
+    options = (orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+    def _orjson_dumps(self, obj):
+        return orjson.dumps(obj, default=self.default, option=self.options)
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj).decode('utf-8')
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._orjson_dumps(obj) + b'\n', mimetype=self.mimetype)
+
+
+def negotiate_encoding():
+    """요청의 Accept-Encoding에서 사용할 압축 방식 ('br', 'gzip' 또는 None)"""
+    accept = request.accept_encodings
+    gzip_quality = accept.quality('gzip')
+    if brotli is not None and accept.quality('br') > 0 and accept.quality('br') >= gzip_quality:
+        return 'br'
+    if gzip_quality > 0:
+        return 'gzip'
+    return None
+
+
+def compress_response(response):
+    """JSON 응답 본문을 협상한 방식으로 압축 (after_request)"""
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES or response.direct_passthrough or response.is_streamed:
+        return response
+    response.vary.add('Accept-Encoding')
+    if not 200 <= response.status_code < 300 or 'Content-Encoding' in response.headers:
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=BROTLI_QUALITY))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0))
+    response.headers['Content-Encoding'] = encoding
+
+    # 압축한 표현은 바이트가 다르므로 강한 ETag도 구분 (재검증은 http_cache가 처리)
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(http_cache.encoded_etag(etag, encoding))
+    return response
+
+
+def init_app(app):
+    """앱에 JSON 공급자와 응답 압축 등록"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    else:
+        # 한글을 \uXXXX로 이스케이프하지 않아 본문이 절반 가까이 줄어듦
+        app.json.ensure_ascii = False
+    app.after_request(compress_response)
@@ -0,0 +1,460 @@
+"""업종별 재무비율 분포와 회사별 업종 내 백분위 (미리 계산해 financials.db에 저장)
+
+상장사를 업종으로 묶고(DART 업종코드가 있으면 표준산업분류 중분류, 없으면 회사명 기반 업종 분류),
+업종마다 재무비율 분포(10/25/50/75/90 백분위수)와 회사별 백분위를 계산해 저장한다.
+상세/AI 보고서 요청은 기본키 조회 한 번으로 회사의 백분위를 읽는다.
+
+refresh는 마지막 갱신 이후 재무제표가 새로 저장되었거나 업종이 바뀐 회사가 속한 업종만 다시 계산한다.
+
+사용법:
+    python industry_peers.py fetch-industries          # DART 기업개황에서 업종코드 수집 (DART_API_KEY 필요)
+    python industry_peers.py refresh --years 2023      # 업종 백분위 갱신 (--full: 전체 재계산)
+    python industry_peers.py show 00126380 --year 2023
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from dotenv import load_dotenv
+
+import financial_store
+import metrics
+import ratio_engine
+from dart_client import DART_API_BASE_URL, DartClient
+from database import get_db_path
+from rate_limiter import RateLimitExceeded, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+PEER_FIELDS = ratio_engine.RATIO_FIELDS
+DISTRIBUTION_PERCENTILES = (10, 25, 50, 75, 90)
+MIN_GROUP_SIZE = 5  # 중분류 회사 수가 이보다 적으면 대분류로 묶음
+RATE_WAIT = 60  # 업종코드 수집 시 토큰 대기 최대 시간(초)
+# 앱이 보고서를 저장한 뒤 백분위 갱신까지 기다리는 시간(초), 그동안 저장된 보고서는 한 번의 갱신으로 처리
+REFRESH_DELAY = float(os.getenv('PEER_REFRESH_DELAY', '10'))
+
+# 표준산업분류(KSIC) 대분류: (중분류 시작, 끝, 코드, 이름)
+KSIC_SECTIONS = (
+    (1, 3, 'A', '농업, 임업 및 어업'),
+    (5, 8, 'B', '광업'),
+    (10, 34, 'C', '제조업'),
+    (35, 35, 'D', '전기, 가스, 증기 및 공기 조절 공급업'),
+    (36, 39, 'E', '수도, 하수 및 폐기물 처리, 원료 재생업'),
+    (41, 42, 'F', '건설업'),
+    (45, 47, 'G', '도매 및 소매업'),
+    (49, 52, 'H', '운수 및 창고업'),
+    (55, 56, 'I', '숙박 및 음식점업'),
+    (58, 63, 'J', '정보통신업'),
+    (64, 66, 'K', '금융 및 보험업'),
+    (68, 68, 'L', '부동산업'),
+    (70, 73, 'M', '전문, 과학 및 기술 서비스업'),
+    (74, 76, 'N', '사업시설 관리, 사업 지원 및 임대 서비스업'),
+    (84, 84, 'O', '공공 행정, 국방 및 사회보장 행정'),
+    (85, 85, 'P', '교육 서비스업'),
+    (86, 87, 'Q', '보건업 및 사회복지 서비스업'),
+    (90, 91, 'R', '예술, 스포츠 및 여가 관련 서비스업'),
+    (94, 96, 'S', '협회 및 단체, 수리 및 기타 개인 서비스업'),
+    (97, 98, 'T', '가구 내 고용활동 및 자가 소비 생산활동'),
+    (99, 99, 'U', '국제 및 외국기관'),
+)
+
+# 회사명 키워드 기반 업종 분류 (업종 정보가 없을 때)
+NAME_INDUSTRY_KEYWORDS = (
+    ('IT/전자', ('전자', '반도체', 'IT', '소프트웨어')),
+    ('건설업', ('건설', '건축', '토목')),
+    ('금융업', ('금융', '은행', '증권', '보험')),
+    ('제약/바이오', ('제약', '바이오', '의료')),
+    ('화학/석유', ('화학', '석유', '정유')),
+)
+
+_schema_ready = False
+_refresh_lock = threading.Lock()
+_refresh_state = {}
+
+
+def classify_industry(company):
+    """업종 분류 (industry 값이 없으면 회사명으로 추정)"""
+    industry = company.get('industry', '정보 없음')
+    if industry == '정보 없음' or not industry:
+        corp_name = company.get('corp_name', '') or ''
+        for label, keywords in NAME_INDUSTRY_KEYWORDS:
+            if any(keyword in corp_name for keyword in keywords):
+                return label
+        return '기타 업종'
+    return industry
+
+
+def ksic_section(division):
+    """중분류(2자리 숫자)의 대분류 (코드, 이름), 모르면 None"""
+    for start, end, code, name in KSIC_SECTIONS:
+        if start <= division <= end:
+            return code, name
+    return None
+
+
+def _connect():
+    """업종/백분위 테이블 (financials.db 안에 저장)"""
+    global _schema_ready
+    conn = sqlite3.connect(financial_store.get_store_path(), timeout=10)
+    if not _schema_ready:
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS company_industries (
+            corp_code TEXT PRIMARY KEY,
+            induty_code TEXT,
+            fetched_at REAL NOT NULL
+        ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS peer_groups (
+            bsns_year TEXT NOT NULL,
+            reprt_code TEXT NOT NULL,
+            group_key TEXT NOT NULL,
+            label TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            distribution TEXT NOT NULL,
+            computed_at REAL NOT NULL,
+            PRIMARY KEY (bsns_year, reprt_code, group_key)
+        ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS peer_ranks (
+            bsns_year TEXT NOT NULL,
+            reprt_code TEXT NOT NULL,
+            corp_code TEXT NOT NULL,
+            group_key TEXT NOT NULL,
+            percentiles TEXT NOT NULL,
+            PRIMARY KEY (bsns_year, reprt_code, corp_code)
+        ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS peer_refresh (
+            bsns_year TEXT NOT NULL,
+            reprt_code TEXT NOT NULL,
+            loaded_until REAL NOT NULL,
+            refreshed_at REAL NOT NULL,
+            PRIMARY KEY (bsns_year, reprt_code)
+        ) WITHOUT ROWID
+        ''')
+        conn.commit()
+        _schema_ready = True
+    return conn
+
+
+def load_listed_companies(db_path=None):
+    """상장사 행 {corp_code: dict} (업종 분류용)"""
+    conn = sqlite3.connect(f'file:{db_path or get_db_path()}?mode=ro', uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        rows = conn.execute('SELECT * FROM companies WHERE is_listed = 1').fetchall()
+    finally:
+        conn.close()
+    return {row['corp_code']: dict(row) for row in rows}
+
+
+def assign_groups(companies, induty_codes):
+    """회사별 업종 {corp_code: (group_key, label)}
+
+    업종코드가 있으면 표준산업분류 중분류로 묶고, 회사 수가 MIN_GROUP_SIZE보다 적은 중분류는 대분류로 합친다.
+    업종코드가 없으면 회사명 기반 업종 분류를 사용한다.
+    """
+    divisions = {}
+    for corp_code, company in companies.items():
+        code = (induty_codes.get(corp_code) or company.get('induty_code') or '').strip()
+        if len(code) >= 2 and code[:2].isdigit():
+            divisions[corp_code] = int(code[:2])
+    division_sizes = {}
+    for division in divisions.values():
+        division_sizes[division] = division_sizes.get(division, 0) + 1
+
+    groups = {}
+    for corp_code, company in companies.items():
+        division = divisions.get(corp_code)
+        section = ksic_section(division) if division is not None else None
+        if section is None:
+            label = classify_industry(company)
+            groups[corp_code] = (f'name:{label}', label)
+        elif division_sizes[division] >= MIN_GROUP_SIZE:
+            groups[corp_code] = (f'ksic:{division:02d}', f'{section[1]} (중분류 {division:02d})')
+        else:
+            groups[corp_code] = (f'ksic:{section[0]}', section[1])
+    return groups
+
+
+def percentile_ranks(values):
+    """값마다 그룹 내 백분위 (0~100, 같은 값은 중간 순위), NaN은 NaN"""
+    ranks = np.full(values.shape, np.nan)
+    valid = ~np.isnan(values)
+    count = int(valid.sum())
+    if count:
+        ordered = np.sort(values[valid])
+        below = np.searchsorted(ordered, values[valid], side='left')
+        at_or_below = np.searchsorted(ordered, values[valid], side='right')
+        ranks[valid] = (below + at_or_below) / 2 / count * 100
+    return ranks
+
+
+def distribution(values):
+    """그룹의 비율 분포 {count, p10, p25, p50, p75, p90}"""
+    values = values[~np.isnan(values)]
+    result = {'count': int(len(values))}
+    if len(values):
+        for percentile, value in zip(DISTRIBUTION_PERCENTILES, np.percentile(values, DISTRIBUTION_PERCENTILES)):
+            result[f'p{percentile}'] = round(float(value), 1)
+    return result
+
+
+@metrics.timed('ratio_compute_duration_seconds', kind='peer_refresh')
+def refresh(bsns_year, reprt_code, companies, full=False):
+    """업종 백분위 갱신, 다시 계산한 업종/회사 수 반환
+
+    마지막 갱신 이후 재무제표가 저장된 회사, 업종이 바뀌었거나 새로 생기거나 빠진 회사가 속한 업종만 다시 계산한다.
+    full이면 모든 업종을 다시 계산한다.
+    """
+    bsns_year, reprt_code = str(bsns_year), str(reprt_code)
+    started = time.perf_counter()
+    load_times = financial_store.report_load_times(bsns_year, reprt_code)
+    companies = {corp_code: company for corp_code, company in companies.items() if corp_code in load_times}
+
+    conn = _connect()
+    try:
+        row = conn.execute('SELECT loaded_until FROM peer_refresh WHERE bsns_year = ? AND reprt_code = ?',
+                           (bsns_year, reprt_code)).fetchone()
+        loaded_until = 0 if full or row is None else row[0]
+        induty_codes = dict(conn.execute('SELECT corp_code, induty_code FROM company_industries').fetchall())
+        stored = dict(conn.execute('SELECT corp_code, group_key FROM peer_ranks WHERE bsns_year = ? AND reprt_code = ?',
+                                   (bsns_year, reprt_code)).fetchall())
+        groups = assign_groups(companies, induty_codes)
+
+        dirty = set()
+        for corp_code, (group_key, _) in groups.items():
+            if full or load_times[corp_code] > loaded_until or stored.get(corp_code) != group_key:
+                dirty.add(group_key)
+                if corp_code in stored:
+                    dirty.add(stored[corp_code])
+        dirty.update(group_key for corp_code, group_key in stored.items() if corp_code not in groups)
+
+        members = {}
+        for corp_code, (group_key, _) in groups.items():
+            if group_key in dirty:
+                members.setdefault(group_key, []).append(corp_code)
+        labels = {group_key: label for group_key, label in groups.values()}
+
+        corp_codes, amounts = ratio_engine.load_amounts(
+            bsns_year, reprt_code, corp_codes={code for codes in members.values() for code in codes})
+        positions = {corp_code: i for i, corp_code in enumerate(corp_codes)}
+        # 당기 비율만 사용 (회사 순서는 corp_codes)
+        ratios = {field: values[0] for field, values in ratio_engine.compute_ratios(amounts).items()}
+
+        now = time.time()
+        group_rows = []
+        rank_rows = []
+        for group_key, codes in members.items():
+            # 비율 계정이 하나도 없는 회사는 위치가 없으므로 NaN
+            index = np.array([positions.get(corp_code, -1) for corp_code in codes])
+            present = index >= 0
+            group_distribution = {}
+            group_ranks = {}
+            for field in PEER_FIELDS:
+                values = np.full(len(codes), np.nan)
+                values[present] = ratios[field][index[present]]
+                group_distribution[field] = distribution(values)
+                group_ranks[field] = percentile_ranks(values)
+            group_rows.append((bsns_year, reprt_code, group_key, labels[group_key], len(codes),
+                               json.dumps(group_distribution, ensure_ascii=False), now))
+            for i, corp_code in enumerate(codes):
+                percentiles = {field: None if np.isnan(group_ranks[field][i]) else round(float(group_ranks[field][i]), 1)
+                               for field in PEER_FIELDS}
+                rank_rows.append((bsns_year, reprt_code, corp_code, group_key, json.dumps(percentiles)))
+
+        moved = [corp_code for corp_code, group_key in stored.items() if group_key in dirty]
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany('DELETE FROM peer_groups WHERE bsns_year = ? AND reprt_code = ? AND group_key = ?',
+                         [(bsns_year, reprt_code, group_key) for group_key in dirty])
+        conn.executemany('DELETE FROM peer_ranks WHERE bsns_year = ? AND reprt_code = ? AND corp_code = ?',
+                         [(bsns_year, reprt_code, corp_code) for corp_code in moved])
+        conn.executemany('INSERT INTO peer_groups VALUES (?, ?, ?, ?, ?, ?, ?)', group_rows)
+        conn.executemany('INSERT OR REPLACE INTO peer_ranks VALUES (?, ?, ?, ?, ?)', rank_rows)
+        conn.execute('''
+        INSERT OR REPLACE INTO peer_refresh (bsns_year, reprt_code, loaded_until, refreshed_at) VALUES (?, ?, ?, ?)
+        ''', (bsns_year, reprt_code, max(load_times.values(), default=loaded_until), now))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    return {
+        'bsns_year': bsns_year,
+        'reprt_code': reprt_code,
+        'groups': len(group_rows),
+        'companies': len(rank_rows),
+        'seconds': time.perf_counter() - started
+    }
+
+
+def get_percentiles(corp_code, bsns_year, reprt_code):
+    """회사의 업종 내 백분위와 업종 분포 (계산 전이면 None)"""
+    conn = _connect()
+    try:
+        row = conn.execute('''
+        SELECT r.percentiles, g.group_key, g.label, g.size, g.distribution, g.computed_at
+        FROM peer_ranks r
+        JOIN peer_groups g
+          ON g.bsns_year = r.bsns_year AND g.reprt_code = r.reprt_code AND g.group_key = r.group_key
+        WHERE r.bsns_year = ? AND r.reprt_code = ? AND r.corp_code = ?
+        ''', (str(bsns_year), str(reprt_code), corp_code)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    percentiles, group_key, label, size, group_distribution, computed_at = row
+    return {
+        'group': label,
+        'group_key': group_key,
+        'group_size': size,
+        'percentiles': json.loads(percentiles),
+        'distribution': json.loads(group_distribution),
+        'computed_at': computed_at
+    }
+
+
+def schedule_refresh(bsns_year, reprt_code, load_companies=load_listed_companies, delay=None):
+    """delay초 뒤 백그라운드 스레드에서 refresh (워커별로 사업연도·보고서마다 대기 중인 갱신은 하나)
+
+    대기 중에 들어온 요청은 그 갱신에 합쳐지고, 실행 중에 들어온 요청은 끝난 뒤 다시 delay초 기다려 한 번 더 갱신한다.
+    DART 조회가 몰려도 상장사 목록을 읽고 업종을 다시 계산하는 횟수는 delay초에 한 번을 넘지 않는다.
+    """
+    key = (str(bsns_year), str(reprt_code))
+    with _refresh_lock:
+        state = _refresh_state.get(key)
+        if state is not None:
+            if state == 'running':
+                _refresh_state[key] = 'rerun'
+            return
+        _refresh_state[key] = 'pending'
+    threading.Thread(target=_refresh_worker, args=(key, load_companies, REFRESH_DELAY if delay is None else delay),
+                     daemon=True, name='peer-refresh').start()
+
+
+def _refresh_worker(key, load_companies, delay):
+    while True:
+        time.sleep(delay)
+        with _refresh_lock:
+            _refresh_state[key] = 'running'
+        try:
+            refresh(*key, load_companies())
+        except Exception as e:
+            logger.exception("업종 백분위 갱신 실패 (%s %s): %s", key[0], key[1], e)
+        with _refresh_lock:
+            if _refresh_state.get(key) == 'rerun':
+                _refresh_state[key] = 'pending'
+                continue
+            del _refresh_state[key]
+            return
+
+
+def fetch_industries(client, corp_codes, workers=4):
+    """DART 기업개황(company.json)의 업종코드를 저장, (저장 수, 실패 수) 반환"""
+    def fetch(corp_code):
+        return corp_code, client.get('company.json', {'corp_code': corp_code})
+
+    saved = failed = 0
+    conn = _connect()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(fetch, corp_code) for corp_code in corp_codes]:
+                try:
+                    corp_code, result = future.result()
+                except RateLimitExceeded as e:
+                    logger.warning("중단: %s", e.message)
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    failed += 1
+                    break
+                except Exception as e:
+                    logger.warning("업종코드 조회 실패: %s: %s", type(e).__name__, e)
+                    failed += 1
+                    continue
+                if result.status != '000':
+                    logger.warning("업종코드 조회 실패 %s: DART 상태 %s (%s)", corp_code, result.status, result.message)
+                    failed += 1
+                    continue
+                conn.execute('INSERT OR REPLACE INTO company_industries VALUES (?, ?, ?)',
+                             (corp_code, result.data.get('induty_code'), time.time()))
+                conn.commit()
+                saved += 1
+                if saved % 100 == 0:
+                    logger.info(f"업종코드 {saved:,}/{len(corp_codes):,}")
+    finally:
+        conn.close()
+    return saved, failed
+
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    parser = argparse.ArgumentParser(description='업종별 재무비율 백분위')
+    parser.add_argument('--db', default=None, help='기업코드 DB (기본: DATA_PATH의 companies.db)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    fetch_parser = sub.add_parser('fetch-industries', help='DART 기업개황에서 상장사 업종코드 수집')
+    fetch_parser.add_argument('--workers', type=int, default=4)
+    fetch_parser.add_argument('--refetch', action='store_true', help='이미 수집한 회사도 다시 조회')
+    fetch_parser.add_argument('--base-url', default=DART_API_BASE_URL, help='DART API 주소')
+
+    refresh_parser = sub.add_parser('refresh', help='업종 백분위 갱신')
+    refresh_parser.add_argument('--years', nargs='+', required=True)
+    refresh_parser.add_argument('--reprt-code', default='11011')
+    refresh_parser.add_argument('--full', action='store_true', help='모든 업종 다시 계산')
+
+    show_parser = sub.add_parser('show', help='회사의 업종 내 백분위')
+    show_parser.add_argument('corp_code')
+    show_parser.add_argument('--year', required=True)
+    show_parser.add_argument('--reprt-code', default='11011')
+    args = parser.parse_args()
+
+    if args.command == 'fetch-industries':
+        api_key = os.getenv('DART_API_KEY')
+        if not api_key:
+            print("DART_API_KEY 환경변수가 필요합니다.")
+            return
+        companies = load_listed_companies(args.db)
+        if not args.refetch:
+            conn = _connect()
+            try:
+                known = {row[0] for row in conn.execute('SELECT corp_code FROM company_industries')}
+            finally:
+                conn.close()
+            companies = {code: company for code, company in companies.items() if code not in known}
+        client = DartClient(api_key, args.base_url, rate_limiter=TokenBucket('dart', max_wait=RATE_WAIT))
+        print(f"업종코드 조회 대상: {len(companies):,}개 회사")
+        saved, failed = fetch_industries(client, sorted(companies), args.workers)
+        print(f"완료: 저장 {saved:,}, 실패 {failed:,}")
+
+    elif args.command == 'refresh':
+        companies = load_listed_companies(args.db)
+        for bsns_year in args.years:
+            result = refresh(bsns_year, args.reprt_code, companies, full=args.full)
+            print(f"[{bsns_year} {args.reprt_code}] 업종 {result['groups']:,}개, 회사 {result['companies']:,}개 "
+                  f"다시 계산 ({result['seconds']:.2f}초)")
+
+    elif args.command == 'show':
+        peers = get_percentiles(args.corp_code, args.year, args.reprt_code)
+        if peers is None:
+            print("계산된 백분위가 없습니다. refresh를 먼저 실행하세요.")
+            return
+        print(f"{peers['group']} ({peers['group_size']}개 회사)")
+        for field in PEER_FIELDS:
+            percentile = peers['percentiles'].get(field)
+            median = peers['distribution'][field].get('p50')
+            print(f"  {field:<24}{'-' if percentile is None else f'{percentile:.1f}':>8}  (업종 중앙값 {median})")
+
+
+if __name__ == '__main__':
+    main()
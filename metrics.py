@@ -0,0 +1,270 @@
+"""단계별 지연 시간/캐시 지표 (Prometheus 텍스트 형식), gunicorn 워커 간 합산
+
+각 워커는 지표를 메모리에 모으고 FLUSH_INTERVAL마다 지난 기록 이후의 증가분만 DATA_PATH의 metrics.db에 더한다.
+/metrics는 응답하는 워커의 증가분을 먼저 기록한 뒤 metrics.db의 합계를 내보내므로 어느 워커가 받아도
+전체 워커의 합계가 나오고, 재시작된 워커의 값도 사라지지 않는다 (카운터와 히스토그램만 사용하므로 더해도 된다).
+init_app을 호출한 프로세스(웹 워커)만 기록하므로 일괄 적재 같은 CLI 실행은 지표에 섞이지 않는다.
+"""
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import Response, g, request
+
+logger = logging.getLogger(__name__)
+
+METRICS_DB_NAME = 'metrics.db'
+FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', '5'))  # 워커가 증가분을 metrics.db에 기록하는 주기(초)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# SQLite 조회(ms 단위)부터 DART/OpenAI 호출(수십 초)까지 담을 수 있는 경계(초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# 이름: (종류, 설명, 레이블)
+METRICS = {
+    'http_request_duration_seconds': ('histogram', 'HTTP 요청 처리 시간', ('endpoint', 'method', 'status')),
+    'db_query_duration_seconds': ('histogram', 'SQLite 조회/저장 시간', ('db', 'operation')),
+    'dart_request_duration_seconds': ('histogram', 'DART API 왕복 시간 (재시도는 각각 기록)', ('endpoint', 'status')),
+    'ratio_compute_duration_seconds': ('histogram', '재무비율 계산 시간', ('kind',)),
+    'openai_request_duration_seconds': ('histogram', 'OpenAI 보고서 생성 시간', ('model', 'mode', 'outcome')),
+    'openai_tokens_total': ('counter', 'OpenAI 사용 토큰 수', ('model', 'type')),
+    'cache_requests_total': ('counter', '캐시 조회 결과별 횟수', ('cache', 'result')),
+}
+
+_pending = {}  # (이름, 레이블 JSON) -> 아직 기록하지 않은 증가분 (히스토그램: 구간별 개수 + [합계, 개수])
+_lock = threading.Lock()
+_state = {'enabled': False, 'pid': None, 'schema_ready': False}
+
+
+def get_metrics_path():
+    """지표 DB 경로 (companies.db와 같은 디렉토리)"""
+    return os.path.join(os.getenv('DATA_PATH', ''), METRICS_DB_NAME)
+
+
+def _labels_key(name, labels):
+    kind, _, label_names = METRICS[name]
+    if set(labels) != set(label_names):
+        raise ValueError(f"{name} 레이블은 {label_names}이어야 합니다: {sorted(labels)}")
+    return name, json.dumps([[key, str(labels[key])] for key in label_names], ensure_ascii=False)
+
+
+def _ensure_flusher():
+    """워커(프로세스)마다 한 번 주기적 기록 스레드 시작 (_lock 안에서 호출)"""
+    pid = os.getpid()
+    if _state['pid'] == pid:
+        return
+    # fork 전 부모 프로세스가 모은 값은 부모가 기록하므로 자식은 비우고 시작
+    _pending.clear()
+    _state['pid'] = pid
+    threading.Thread(target=_flush_loop, name='metrics-flush', daemon=True).start()
+
+
+def _flush_loop():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        flush()
+
+
+def observe(name, value, **labels):
+    """히스토그램에 값(초) 하나 기록"""
+    if not _state['enabled']:
+        return
+    key = _labels_key(name, labels)
+    with _lock:
+        _ensure_flusher()
+        values = _pending.get(key)
+        if values is None:
+            values = _pending[key] = [0] * (len(LATENCY_BUCKETS) + 3)
+        index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if value <= bound), len(LATENCY_BUCKETS))
+        values[index] += 1
+        values[-2] += value
+        values[-1] += 1
+
+
+def inc(name, amount=1, **labels):
+    """카운터 증가"""
+    if not _state['enabled'] or amount <= 0:
+        return
+    key = _labels_key(name, labels)
+    with _lock:
+        _ensure_flusher()
+        values = _pending.setdefault(key, [0])
+        values[0] += amount
+
+
+@contextmanager
+def timer(name, **labels):
+    """with 블록 실행 시간을 히스토그램에 기록 (예외가 나도 기록)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - started, **labels)
+
+
+def timed(name, **labels):
+    """함수 실행 시간을 히스토그램에 기록하는 데코레이터"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _connect():
+    path = get_metrics_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    if not _state['schema_ready']:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS metric_values (
+            name TEXT NOT NULL,
+            labels TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (name, labels)
+        ) WITHOUT ROWID
+        ''')
+        _state['schema_ready'] = True
+    return conn
+
+
+def flush():
+    """이 워커의 증가분을 metrics.db에 더하기 (실패하면 다음 기록 때 다시 시도)"""
+    with _lock:
+        if not _pending:
+            return
+        pending = dict(_pending)
+        _pending.clear()
+
+    try:
+        conn = _connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for (name, labels), delta in pending.items():
+                    row = conn.execute(
+                        'SELECT value FROM metric_values WHERE name = ? AND labels = ?', (name, labels)
+                    ).fetchone()
+                    total = json.loads(row[0]) if row is not None else [0] * len(delta)
+                    if len(total) != len(delta):  # 구간 경계가 바뀐 뒤의 옛 값은 버림
+                        total = [0] * len(delta)
+                    merged = [a + b for a, b in zip(total, delta)]
+                    conn.execute(
+                        'INSERT OR REPLACE INTO metric_values (name, labels, value) VALUES (?, ?, ?)',
+                        (name, labels, json.dumps(merged))
+                    )
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("지표 기록 실패 (다음 주기에 재시도): %s", e)
+        with _lock:
+            for key, delta in pending.items():
+                values = _pending.get(key)
+                _pending[key] = delta if values is None else [a + b for a, b in zip(values, delta)]
+
+
+def _format_value(value):
+    if isinstance(value, float) and not value.is_integer():
+        return repr(value)
+    return str(int(value))
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        f'{key}="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in pairs
+    )
+    return '{' + ','.join(escaped) + '}'
+
+
+def _render_metric(name, rows):
+    kind, description, _ = METRICS[name]
+    lines = [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+    for labels, values in rows:
+        pairs = json.loads(labels)
+        if kind == 'counter':
+            lines.append(f'{name}{_format_labels(pairs)} {_format_value(values[0])}')
+            continue
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), values[:-2]):
+            cumulative += count
+            lines.append(f'{name}_bucket{_format_labels([*pairs, ["le", str(bound)]])} {cumulative}')
+        lines.append(f'{name}_sum{_format_labels(pairs)} {_format_value(values[-2])}')
+        lines.append(f'{name}_count{_format_labels(pairs)} {_format_value(values[-1])}')
+    return lines
+
+
+def render():
+    """전체 워커의 합계를 Prometheus 텍스트 형식으로 (이 워커의 증가분은 먼저 기록)"""
+    flush()
+    rows = {}
+    try:
+        conn = _connect()
+        try:
+            for name, labels, value in conn.execute(
+                'SELECT name, labels, value FROM metric_values ORDER BY name, labels'
+            ):
+                if name in METRICS:
+                    rows.setdefault(name, []).append((labels, json.loads(value)))
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("지표 조회 실패: %s", e)
+
+    lines = []
+    for name in METRICS:
+        if name in rows:
+            lines.extend(_render_metric(name, rows[name]))
+    return '\n'.join(lines) + '\n'
+
+
+def _start_request_timer():
+    g.metrics_started = time.perf_counter()
+
+
+def _record_request(response):
+    """요청 처리 시간 기록 (스트리밍 응답은 응답 객체를 만들 때까지)"""
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        observe('http_request_duration_seconds', time.perf_counter() - started,
+                endpoint=request.endpoint or 'unmatched', method=request.method, status=response.status_code)
+    return response
+
+
+def metrics_endpoint():
+    """Prometheus 수집 엔드포인트"""
+    response = Response(render(), content_type=CONTENT_TYPE)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+def init_app(app):
+    """앱에 요청 시간 기록과 /metrics 등록하고 이 프로세스의 지표 기록 시작
+
+    after_request는 등록의 역순으로 실행되므로 다른 확장보다 먼저 등록해야 응답 압축 시간까지 포함된다.
+    """
+    _state['enabled'] = True
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_endpoint)
+
+
+atexit.register(flush)
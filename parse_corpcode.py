@@ -1,12 +1,33 @@
 import xml.etree.ElementTree as ET
+import argparse
 import sqlite3
 import os
+import time
+from company_search import (ensure_search_index, ensure_list_index, has_search_index,
+                            drop_search_triggers, rebuild_search_index)
+from company_stats import ensure_stats_schema, refresh_stats
+from corpcode_zip import ZipStreamError, open_corpcode_zip, dart_corpcode_url
 
-def create_database():
+DEFAULT_BATCH_SIZE = 1000
+COMPANY_FIELDS = ('corp_code', 'corp_name', 'corp_name_eng', 'stock_code', 'modify_date')
+
+# modify_date가 바뀐 회사만 갱신하므로 변경 없는 행은 건드리지 않음 (id 유지)
+UPSERT_SQL = '''
+INSERT INTO companies (corp_code, corp_name, corp_name_eng, stock_code, modify_date)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(corp_code) DO UPDATE SET
+    corp_name = excluded.corp_name,
+    corp_name_eng = excluded.corp_name_eng,
+    stock_code = excluded.stock_code,
+    modify_date = excluded.modify_date
+WHERE companies.modify_date IS NOT excluded.modify_date
+'''
+
+def create_database(db_path='companies.db'):
     """SQLite 데이터베이스 생성 및 테이블 생성"""
-    conn = sqlite3.connect('companies.db')
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
-    
+
     # 회사 정보 테이블 생성
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS companies (
@@ -19,123 +40,190 @@ def create_database():
         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     )
     ''')
-    
+
     conn.commit()
+
+    # 회사명 정렬 인덱스와 회사 검색용 전문 검색 인덱스 (트리거로 자동 동기화)
+    ensure_list_index(conn)
+    ensure_search_index(conn)
+    # 상장 여부(is_listed) 컬럼, 통계 인덱스와 스냅샷 테이블
+    ensure_stats_schema(conn)
     return conn
 
-def parse_xml_file(filename):
-    """XML 파일을 파싱하여 회사 정보 추출"""
-    print(f"파싱 시작: {filename}")
-    
-    # XML 파일의 구조를 먼저 확인
-    try:
-        # 큰 파일이므로 iterparse를 사용하여 메모리 효율적으로 파싱
-        companies = []
-        
-        for event, elem in ET.iterparse(filename, events=('start', 'end')):
-            if event == 'end' and elem.tag == 'list':
-                # 회사 정보 추출
-                corp_code = elem.find('corp_code')
-                corp_name = elem.find('corp_name')
-                corp_name_eng = elem.find('corp_name_eng')
-                stock_code = elem.find('stock_code')
-                modify_date = elem.find('modify_date')
-                
-                company_data = {
-                    'corp_code': corp_code.text if corp_code is not None else None,
-                    'corp_name': corp_name.text if corp_name is not None else None,
-                    'corp_name_eng': corp_name_eng.text if corp_name_eng is not None else None,
-                    'stock_code': stock_code.text if stock_code is not None else None,
-                    'modify_date': modify_date.text if modify_date is not None else None
-                }
-                
-                companies.append(company_data)
-                
-                # 메모리 절약을 위해 처리된 요소 제거
-                elem.clear()
-                
-                # 진행 상황 표시 (1000개마다)
-                if len(companies) % 1000 == 0:
-                    print(f"처리된 회사 수: {len(companies)}")
-        
-        return companies
-    
-    except ET.ParseError as e:
-        print(f"XML 파싱 오류: {e}")
-        return []
-    except Exception as e:
-        print(f"파일 처리 중 오류: {e}")
-        return []
+def iter_companies(source):
+    """CORPCODE.xml을 읽으며 회사 정보를 하나씩 반환 (파일 경로 또는 파일 객체)
+
+    처리한 요소는 바로 비워 XML 크기와 관계없이 메모리 사용량이 일정하다.
+    """
+    root = None
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if root is None:
+            root = elem
+        if event == 'end' and elem.tag == 'list':
+            yield tuple(elem.findtext(field) for field in COMPANY_FIELDS)
+            # 처리된 요소와 루트에 남은 참조를 함께 제거
+            elem.clear()
+            root.clear()
+
+def iter_batches(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """행을 batch_size개씩 묶어 반환"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def ingest_companies(conn, rows, batch_size=DEFAULT_BATCH_SIZE, remove_missing=True, progress_every=100000):
+    """회사 정보를 배치 upsert로 적재 (하나의 트랜잭션), 추가/변경/삭제 건수 반환
+
+    remove_missing이면 이번 파일에 없는 회사를 삭제한다 (한 건도 읽지 못했으면 삭제하지 않음).
+    빈 테이블에 처음 적재할 때는 검색 인덱스 트리거를 잠시 끄고 적재 후 한 번에 재구성한다.
+    """
+    started = time.perf_counter()
+    total = added = changed = removed = 0
+
+    bulk_load = has_search_index(conn) and conn.execute('SELECT 1 FROM companies LIMIT 1').fetchone() is None
+    if bulk_load:
+        drop_search_triggers(conn)
 
-def save_to_database(companies, conn):
-    """회사 정보를 데이터베이스에 저장"""
     cursor = conn.cursor()
-    
-    saved_count = 0
-    error_count = 0
-    
-    for company in companies:
-        try:
+    # 이번 파일에 나온 기업코드와 배치 번호 (추가/삭제 판별용, 메모리 대신 임시 테이블에 보관)
+    cursor.execute('''
+    CREATE TEMP TABLE IF NOT EXISTS seen_corp_codes (corp_code TEXT PRIMARY KEY, batch INTEGER NOT NULL)
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS temp.idx_seen_batch ON seen_corp_codes(batch)')
+    cursor.execute('DELETE FROM temp.seen_corp_codes')
+
+    try:
+        for batch_no, batch in enumerate(iter_batches(rows, batch_size)):
+            cursor.executemany('INSERT OR IGNORE INTO temp.seen_corp_codes VALUES (?, ?)',
+                               [(row[0], batch_no) for row in batch])
+            new_codes = cursor.rowcount
+            # 이 배치의 기업코드 중 이미 저장되어 있던 수 (나머지는 새로 추가됨)
+            existing = cursor.execute('''
+            SELECT COUNT(*) FROM temp.seen_corp_codes s
+            WHERE s.batch = ? AND EXISTS (SELECT 1 FROM companies c WHERE c.corp_code = s.corp_code)
+            ''', (batch_no,)).fetchone()[0]
+
+            cursor.executemany(UPSERT_SQL, batch)
+            # rowcount는 새로 추가되거나 실제로 갱신된 행 수 (트리거 변경분 제외)
+            added += new_codes - existing
+            changed += cursor.rowcount - (new_codes - existing)
+
+            previous_total = total
+            total += len(batch)
+            if progress_every and total // progress_every != previous_total // progress_every:
+                print(f"처리된 회사 수: {total:,}")
+
+        if remove_missing and total > 0:
             cursor.execute('''
-            INSERT OR REPLACE INTO companies 
-            (corp_code, corp_name, corp_name_eng, stock_code, modify_date)
-            VALUES (?, ?, ?, ?, ?)
-            ''', (
-                company['corp_code'],
-                company['corp_name'],
-                company['corp_name_eng'],
-                company['stock_code'],
-                company['modify_date']
-            ))
-            saved_count += 1
-        except Exception as e:
-            print(f"데이터 저장 오류: {e}, 회사: {company}")
-            error_count += 1
-    
-    conn.commit()
-    print(f"저장 완료: {saved_count}개 회사, 오류: {error_count}개")
+            DELETE FROM companies
+            WHERE corp_code NOT IN (SELECT corp_code FROM temp.seen_corp_codes)
+            ''')
+            removed = cursor.rowcount
+
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.execute('DELETE FROM temp.seen_corp_codes')
+        conn.commit()
+        if bulk_load:
+            rebuild_search_index(conn)
+
+    elapsed = time.perf_counter() - started
+    return {
+        'total': total,
+        'added': added,
+        'changed': changed,
+        'unchanged': total - added - changed,
+        'removed': removed,
+        'seconds': elapsed,
+        'rows_per_second': total / elapsed if elapsed > 0 else 0
+    }
+
+def print_summary(result):
+    """적재 결과 출력"""
+    print(f"저장 완료: {result['total']:,}개 회사 "
+          f"(추가 {result['added']:,}, 변경 {result['changed']:,}, "
+          f"변경 없음 {result['unchanged']:,}, 삭제 {result['removed']:,})")
+    print(f"처리 시간: {result['seconds']:.2f}초 ({result['rows_per_second']:,.0f}행/초)")
+
+def open_source(source, api_key=None, expected_sha256=None):
+    """적재할 원본 열기, (XML 스트림 또는 경로, 닫기 함수, zip 스트림) 반환
+
+    .zip 파일이나 URL은 zip 스트림에서 XML을 바로 읽어 임시 파일을 만들지 않는다.
+    """
+    if source.startswith(('http://', 'https://')) or source.lower().endswith('.zip'):
+        stream, close = open_corpcode_zip(source, api_key=api_key, expected_sha256=expected_sha256)
+        return stream, close, stream
+    return source, (lambda: None), None
 
 def main():
     """메인 실행 함수"""
-    xml_file = 'CORPCODE.xml'
-    
-    if not os.path.exists(xml_file):
-        print(f"파일을 찾을 수 없습니다: {xml_file}")
+    parser = argparse.ArgumentParser(description='DART 기업코드(CORPCODE.xml/zip) 적재')
+    parser.add_argument('source', nargs='?', default='CORPCODE.xml',
+                        help='CORPCODE.xml, CORPCODE.zip 경로 또는 zip URL')
+    parser.add_argument('--dart', action='store_true', help='DART corpCode.xml API에서 바로 내려받아 적재 (DART_API_KEY 필요)')
+    parser.add_argument('--sha256', help='zip 파일의 기대 SHA-256 (불일치 시 적재 취소)')
+    parser.add_argument('--db', default='companies.db', help='적재할 SQLite 파일')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--keep-removed', action='store_true', help='파일에 없는 회사를 삭제하지 않음')
+    args = parser.parse_args()
+
+    source = dart_corpcode_url() if args.dart else args.source
+    api_key = os.getenv('DART_API_KEY') if args.dart or source.startswith(('http://', 'https://')) else None
+    if args.dart and not api_key:
+        print("DART_API_KEY 환경변수가 필요합니다.")
+        return
+    if not source.startswith(('http://', 'https://')) and not os.path.exists(source):
+        print(f"파일을 찾을 수 없습니다: {source}")
         return
-    
+
     # 데이터베이스 생성
-    conn = create_database()
-    
+    conn = create_database(args.db)
+    close_source = None
+
     try:
-        # XML 파일 파싱
-        companies = parse_xml_file(xml_file)
-        
-        if companies:
-            print(f"총 {len(companies)}개의 회사 정보를 찾았습니다.")
-            
-            # 데이터베이스에 저장
-            save_to_database(companies, conn)
-            
-            # 저장된 데이터 확인
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM companies')
-            count = cursor.fetchone()[0]
-            print(f"데이터베이스에 총 {count}개의 회사가 저장되었습니다.")
-            
-            # 샘플 데이터 출력
-            cursor.execute('SELECT * FROM companies LIMIT 5')
-            sample_companies = cursor.fetchall()
-            print("\n샘플 데이터:")
-            for company in sample_companies:
-                print(f"- {company[2]} ({company[1]}) - 주식코드: {company[4]}")
-        else:
+        print(f"파싱 시작: {source}")
+        xml_source, close_source, zip_stream = open_source(source, api_key, args.sha256)
+        result = ingest_companies(conn, iter_companies(xml_source), args.batch_size,
+                                  remove_missing=not args.keep_removed)
+
+        if zip_stream is not None:
+            print(f"zip 검증 완료: {zip_stream.member_name} {zip_stream.member_size:,}바이트, "
+                  f"zip {zip_stream.total_bytes:,}바이트, SHA-256 {zip_stream.sha256}")
+        if result['total'] == 0:
             print("회사 정보를 찾을 수 없습니다.")
-    
+            return
+        print_summary(result)
+
+        # /api/stats 스냅샷 갱신 (앱은 버전이 바뀌면 다시 읽음)
+        version = refresh_stats(conn)
+        print(f"통계 스냅샷을 갱신했습니다 (버전 {version})")
+
+        # 샘플 데이터 출력
+        cursor = conn.cursor()
+        cursor.execute('SELECT corp_code, corp_name, stock_code FROM companies LIMIT 5')
+        print("\n샘플 데이터:")
+        for corp_code, corp_name, stock_code in cursor.fetchall():
+            print(f"- {corp_name} ({corp_code}) - 주식코드: {stock_code}")
+
+    except ZipStreamError as e:
+        print(f"zip 오류 (적재 취소): {e}")
+    except ET.ParseError as e:
+        print(f"XML 파싱 오류: {e}")
     except Exception as e:
         print(f"처리 중 오류 발생: {e}")
-    
+
     finally:
+        if close_source:
+            close_source()
         conn.close()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,155 @@
+"""워커 간 공유 DART 호출 제한 (SQLite 토큰 버킷 + 일일 한도)"""
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+
+QUOTA_DB_NAME = 'dart_quota.db'
+
+# DART 이용 한도 (환경 변수로 조정 가능)
+RATE_PER_SECOND = float(os.getenv('DART_RATE_PER_SECOND', '5'))
+BURST = float(os.getenv('DART_RATE_BURST', '10'))
+DAILY_LIMIT = int(os.getenv('DART_DAILY_LIMIT', '20000'))
+MAX_WAIT = float(os.getenv('DART_RATE_MAX_WAIT', '5'))  # 토큰 대기 최대 시간(초), 넘으면 즉시 실패
+
+KST = timezone(timedelta(hours=9))  # DART 일일 한도는 한국 시간 자정 기준
+
+
+class RateLimitExceeded(Exception):
+    """DART 호출 한도 초과 (retry_after초 후 재시도 가능)"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.message = message
+        self.retry_after = retry_after
+
+
+def _today_kst():
+    return datetime.now(KST).strftime('%Y-%m-%d')
+
+
+def _seconds_until_reset():
+    now = datetime.now(KST)
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (tomorrow - now).total_seconds()
+
+
+class TokenBucket:
+    """SQLite 파일을 공유해 모든 gunicorn 워커가 같은 한도를 사용하는 토큰 버킷"""
+
+    def __init__(self, name='dart', rate=RATE_PER_SECOND, burst=BURST, daily_limit=DAILY_LIMIT,
+                 max_wait=MAX_WAIT, path=None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.daily_limit = daily_limit
+        self.max_wait = max_wait
+        self.path = path or os.path.join(os.getenv('DATA_PATH', ''), QUOTA_DB_NAME)
+        self._schema_ready = False
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        if not self._schema_ready:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS token_bucket (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            ''')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS daily_usage (
+                name TEXT NOT NULL,
+                day TEXT NOT NULL,
+                used INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (name, day)
+            )
+            ''')
+            self._schema_ready = True
+        return conn
+
+    def _read_state(self, conn, now):
+        """현재 토큰 수(보충 반영)와 오늘 사용량"""
+        row = conn.execute(
+            'SELECT tokens, updated_at FROM token_bucket WHERE name = ?', (self.name,)
+        ).fetchone()
+        if row is None:
+            tokens = self.burst
+        else:
+            tokens = min(self.burst, row[0] + (now - row[1]) * self.rate)
+
+        row = conn.execute(
+            'SELECT used FROM daily_usage WHERE name = ? AND day = ?', (self.name, _today_kst())
+        ).fetchone()
+        used = row[0] if row else 0
+        return tokens, used
+
+    def _try_take(self, conn):
+        """토큰 1개 차감 시도, 실패 시 다음 토큰까지 대기 시간(초) 반환"""
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            tokens, used = self._read_state(conn, now)
+            if used >= self.daily_limit:
+                conn.execute('COMMIT')
+                raise RateLimitExceeded(
+                    f'DART 일일 호출 한도({self.daily_limit:,}회)를 모두 사용했습니다.',
+                    _seconds_until_reset()
+                )
+            if tokens < 1:
+                conn.execute('COMMIT')
+                return (1 - tokens) / self.rate
+
+            conn.execute('''
+            INSERT OR REPLACE INTO token_bucket (name, tokens, updated_at) VALUES (?, ?, ?)
+            ''', (self.name, tokens - 1, now))
+            conn.execute('''
+            INSERT INTO daily_usage (name, day, used) VALUES (?, ?, 1)
+            ON CONFLICT(name, day) DO UPDATE SET used = used + 1
+            ''', (self.name, _today_kst()))
+            conn.execute('COMMIT')
+            return 0.0
+        except RateLimitExceeded:
+            raise
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def acquire(self, max_wait=None):
+        """토큰 획득 (최대 max_wait초 대기), 불가능하면 RateLimitExceeded"""
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        conn = self._connect()
+        try:
+            while True:
+                wait = self._try_take(conn)
+                if wait <= 0:
+                    return
+                remaining = deadline - time.monotonic()
+                if wait > remaining:
+                    raise RateLimitExceeded('DART 요청이 몰려 잠시 후 다시 시도해주세요.', wait)
+                time.sleep(wait)
+        finally:
+            conn.close()
+
+    def status(self):
+        """남은 호출 한도"""
+        conn = self._connect()
+        try:
+            tokens, used = self._read_state(conn, time.time())
+        finally:
+            conn.close()
+        return {
+            'rate_per_second': self.rate,
+            'burst': self.burst,
+            'available_tokens': round(tokens, 2),
+            'daily_limit': self.daily_limit,
+            'daily_used': used,
+            'daily_remaining': max(0, self.daily_limit - used),
+            'resets_in_seconds': int(_seconds_until_reset())
+        }
@@ -0,0 +1,251 @@
+"""전체 상장사 재무비율 계산 엔진과 스크리너
+
+로컬 재무제표 저장소의 주요 계정을 회사별 열(column)로 된 NumPy 배열에 읽어, 모든 회사·세 기간
+(당기, 전기, 전전기)의 재무비율을 한 번에 계산한다. 스크리너 조건식(예: roe>15 AND debt_ratio<100)은
+배열 비교로 평가하므로 회사 수와 관계없이 수 밀리초 안에 끝난다.
+
+필드 이름은 당기 기준이며, 전기·전전기는 _previous, _previous2를 붙인다 (예: roe_previous).
+값이 없거나 분모가 0 이하인 비율은 NaN이고, NaN은 어떤 조건도 만족하지 않는다.
+"""
+import re
+import threading
+import time
+
+import numpy as np
+
+import financial_store
+import metrics
+from financial_statements import ACCOUNTS, PERIODS, account_matchers, normalize_account_name
+
+# 스크리너 필드 이름 → 표준 계정 (금액, 원)
+ACCOUNT_FIELDS = {
+    'revenue': '매출액',
+    'operating_profit': '영업이익',
+    'net_income': '당기순이익',
+    'total_assets': '자산총계',
+    'total_liabilities': '부채총계',
+    'total_equity': '자본총계',
+    'current_assets': '유동자산',
+    'current_liabilities': '유동부채'
+}
+
+# 비율 필드 (%), calculate_financial_ratios와 같은 정의 + 전년 대비 증가율
+RATIO_FIELDS = (
+    'operating_margin', 'net_margin', 'roe', 'roa', 'debt_ratio', 'equity_ratio', 'current_ratio',
+    'revenue_growth', 'operating_profit_growth', 'net_income_growth'
+)
+
+PERIOD_SUFFIXES = {'current': '', 'previous': '_previous', 'previous2': '_previous2'}
+
+SNAPSHOT_CHECK_INTERVAL = 5  # 저장소 변경 확인 주기(초)
+
+_OPERATORS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    '=': np.equal,
+    '==': np.equal,
+    '!=': np.not_equal
+}
+_CONDITION_RE = re.compile(r'^\s*([a-z_0-9]+)\s*(>=|<=|!=|==|=|>|<)\s*([-+]?\d+(?:\.\d+)?(?:e[-+]?\d+)?)\s*$',
+                           re.IGNORECASE)
+_CONDITION_SPLIT_RE = re.compile(r'\s+AND\s+|\s*&&\s*|\s*,\s*', re.IGNORECASE)
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+class ScreenerError(ValueError):
+    """잘못된 스크리너 조건식 또는 정렬 필드"""
+
+
+def _ratio(numerator, denominator):
+    """numerator / denominator * 100 (분모가 0 이하이거나 값이 없으면 NaN)"""
+    result = np.full(numerator.shape, np.nan)
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+    return result * 100
+
+
+def _growth(amounts):
+    """기간별 전년 대비 증가율 (%), 전전기는 비교할 이전 값이 없어 NaN"""
+    result = np.full(amounts.shape, np.nan)
+    current, previous = amounts[:-1], amounts[1:]
+    np.divide(current - previous, np.abs(previous), out=result[:-1],
+              where=(previous != 0) & ~np.isnan(previous))
+    return result * 100
+
+
+def load_amounts(bsns_year, reprt_code, fs_div='CFS', corp_codes=None):
+    """저장된 주요 계정 금액을 {표준 계정: (기간 수, 회사 수) 배열}로 읽음, (회사 목록, 금액) 반환
+
+    계정 선택 우선순위는 FinancialStatements.find와 같다 (account_id → 동의어, 같으면 DART 목록 순서).
+    corp_codes가 있으면 그 회사만 포함한다.
+    """
+    by_id, by_name = account_matchers()
+    sj_divs = {sj_div for sj_div, _ in by_id} | {sj_div for sj_div, _ in by_name}
+    rows = financial_store.account_rows(
+        bsns_year, reprt_code, fs_div, sj_divs,
+        {account_id for _, account_id in by_id}, {name for _, name in by_name}, corp_codes
+    )
+
+    # (회사, 계정)마다 우선순위가 가장 높은 항목의 기간별 금액
+    best = {}
+    no_match = ()
+    for corp_code, sj_div, account_id, account_nm, period, amount, seq in rows:
+        for account, rank in (*by_id.get((sj_div, account_id), no_match),
+                              *by_name.get((sj_div, normalize_account_name(account_nm)), no_match)):
+            key = (corp_code, account)
+            order = (rank, seq)
+            current = best.get(key)
+            if current is None or order < current[0]:
+                best[key] = (order, {period: amount})
+            elif order == current[0]:
+                current[1][period] = amount
+
+    companies = sorted({corp_code for corp_code, _ in best})
+    positions = {corp_code: i for i, corp_code in enumerate(companies)}
+    period_positions = {period: i for i, period in enumerate(PERIODS)}
+    amounts = {account: np.full((len(PERIODS), len(companies)), np.nan) for account in ACCOUNTS}
+    for (corp_code, account), (_, values) in best.items():
+        column = positions[corp_code]
+        for period, amount in values.items():
+            if amount is not None:
+                amounts[account][period_positions[period], column] = amount
+    return companies, amounts
+
+
+@metrics.timed('ratio_compute_duration_seconds', kind='vectorized')
+def compute_ratios(amounts):
+    """모든 회사·기간의 재무비율 {비율 필드: (기간 수, 회사 수) 배열}"""
+    revenue = amounts['매출액']
+    operating_profit = amounts['영업이익']
+    net_income = amounts['당기순이익']
+    assets = amounts['자산총계']
+    liabilities = amounts['부채총계']
+    equity = amounts['자본총계']
+    return {
+        'operating_margin': _ratio(operating_profit, revenue),
+        'net_margin': _ratio(net_income, revenue),
+        'roe': _ratio(net_income, equity),
+        'roa': _ratio(net_income, assets),
+        'debt_ratio': _ratio(liabilities, equity),
+        'equity_ratio': _ratio(equity, assets),
+        'current_ratio': _ratio(amounts['유동자산'], amounts['유동부채']),
+        'revenue_growth': _growth(revenue),
+        'operating_profit_growth': _growth(operating_profit),
+        'net_income_growth': _growth(net_income)
+    }
+
+
+class RatioTable:
+    """한 사업연도·보고서의 전체 회사 재무비율 (필드별 1차원 배열, 회사 순서는 corp_codes)"""
+
+    def __init__(self, corp_codes, amounts):
+        self.corp_codes = corp_codes
+        self.columns = {}
+        self._amount_fields = set()
+        for field, account in ACCOUNT_FIELDS.items():
+            self._add(field, amounts[account], amount=True)
+        for field, values in compute_ratios(amounts).items():
+            self._add(field, values)
+
+    def _add(self, field, values, amount=False):
+        for i, period in enumerate(PERIODS):
+            name = field + PERIOD_SUFFIXES[period]
+            self.columns[name] = values[i]
+            if amount:
+                self._amount_fields.add(name)
+
+    @classmethod
+    def from_store(cls, bsns_year, reprt_code, fs_div='CFS', corp_codes=None):
+        return cls(*load_amounts(bsns_year, reprt_code, fs_div, corp_codes))
+
+    def __len__(self):
+        return len(self.corp_codes)
+
+    def column(self, field):
+        values = self.columns.get(field)
+        if values is None:
+            raise ScreenerError(f'알 수 없는 필드입니다: {field}')
+        return values
+
+    def screen(self, conditions=(), sort=None, limit=50, offset=0):
+        """조건을 모두 만족하는 회사 위치(정렬, 페이지 적용)와 전체 일치 수
+
+        conditions는 parse_filter 결과, sort는 필드 이름 (앞에 -를 붙이면 내림차순, 값 없는 회사는 항상 뒤).
+        """
+        mask = np.ones(len(self.corp_codes), dtype=bool)
+        for field, operator, value in conditions:
+            column = self.column(field)
+            # 값이 없는(NaN) 회사는 != 를 포함한 어떤 조건도 만족하지 않음
+            mask &= ~np.isnan(column) & _OPERATORS[operator](column, value)
+        matched = np.flatnonzero(mask)
+
+        if sort:
+            descending = sort.startswith('-')
+            values = self.column(sort.lstrip('-+'))[matched]
+            keys = -values if descending else values
+            matched = matched[np.lexsort((keys, np.isnan(keys)))]
+        return matched[offset:offset + limit], len(matched)
+
+    def row(self, position, fields):
+        """회사 한 곳의 필드 값 (비율은 소수점 1자리, 금액은 정수, 값이 없으면 None)"""
+        result = {}
+        for field in fields:
+            value = self.columns[field][position]
+            if np.isnan(value):
+                result[field] = None
+            elif field in self._amount_fields:
+                result[field] = int(value)
+            else:
+                result[field] = round(float(value), 1)
+        return result
+
+
+def parse_filter(expression):
+    """조건식 'roe>15 AND debt_ratio<100'을 [(필드, 연산자, 값)]으로 변환 (AND, &&, 쉼표로 연결)"""
+    if not expression or not expression.strip():
+        return []
+    conditions = []
+    for part in _CONDITION_SPLIT_RE.split(expression.strip()):
+        match = _CONDITION_RE.match(part)
+        if not match:
+            raise ScreenerError(f'조건식을 해석할 수 없습니다: {part}')
+        field, operator, value = match.groups()
+        conditions.append((field.lower(), operator, float(value)))
+    return conditions
+
+
+def field_names():
+    """스크리너에서 쓸 수 있는 필드 이름"""
+    return [field + suffix for field in (*ACCOUNT_FIELDS, *RATIO_FIELDS) for suffix in PERIOD_SUFFIXES.values()]
+
+
+def get_table(bsns_year, reprt_code, fs_div='CFS', universe=None):
+    """워커별로 캐시한 RatioTable (저장소의 해당 연도 보고서가 바뀌면 다시 만듦)
+
+    저장소 변경 여부는 SNAPSHOT_CHECK_INTERVAL마다 한 번만 확인한다.
+    universe는 포함할 기업코드 집합(상장사 등)을 돌려주는 함수로, 테이블을 새로 만들 때만 호출한다.
+    """
+    key = (str(bsns_year), str(reprt_code), fs_div)
+    now = time.time()
+    with _tables_lock:
+        cached = _tables.get(key)
+        if cached and now - cached['checked_at'] < SNAPSHOT_CHECK_INTERVAL:
+            metrics.inc('cache_requests_total', cache='ratio_table', result='hit')
+            return cached['table']
+
+    version = financial_store.report_version(bsns_year, reprt_code)
+    with _tables_lock:
+        cached = _tables.get(key)
+        if cached and cached['version'] == version:
+            cached['checked_at'] = now
+            metrics.inc('cache_requests_total', cache='ratio_table', result='hit')
+            return cached['table']
+
+    metrics.inc('cache_requests_total', cache='ratio_table', result='miss')
+    table = RatioTable.from_store(bsns_year, reprt_code, fs_div, universe() if universe else None)
+    with _tables_lock:
+        _tables[key] = {'table': table, 'version': version, 'checked_at': now}
+    return table
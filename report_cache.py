@@ -0,0 +1,125 @@
+"""AI 재무 분석 보고서 캐시 (프롬프트·모델·temperature 해시 기준)"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+REPORT_DB_NAME = 'ai_reports.db'
+MAX_ENTRIES = int(os.getenv('REPORT_CACHE_MAX_ENTRIES', '2000'))
+MAX_AGE = int(os.getenv('REPORT_CACHE_MAX_AGE', str(90 * 24 * 3600)))  # 90일
+
+_schema_ready = False
+
+
+def get_report_db_path():
+    """보고서 캐시 DB 경로 (companies.db와 같은 디렉토리)"""
+    return os.path.join(os.getenv('DATA_PATH', ''), REPORT_DB_NAME)
+
+
+def make_key(model, temperature, messages):
+    """렌더링된 프롬프트, 모델, temperature로 만든 캐시 키"""
+    material = json.dumps({
+        'model': model,
+        'temperature': temperature,
+        'messages': messages
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+def _connect():
+    global _schema_ready
+    path = get_report_db_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    if not _schema_ready:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS ai_reports (
+            cache_key TEXT PRIMARY KEY,
+            corp_code TEXT,
+            model TEXT NOT NULL,
+            temperature REAL NOT NULL,
+            report TEXT NOT NULL,
+            prompt_tokens INTEGER,
+            completion_tokens INTEGER,
+            total_tokens INTEGER,
+            created_at REAL NOT NULL,
+            last_used_at REAL NOT NULL,
+            hit_count INTEGER NOT NULL DEFAULT 0
+        )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_ai_reports_last_used ON ai_reports(last_used_at)')
+        conn.commit()
+        _schema_ready = True
+    return conn
+
+
+def get(cache_key):
+    """캐시된 보고서 조회 (없거나 만료되면 None)"""
+    now = time.time()
+    try:
+        conn = _connect()
+        try:
+            row = conn.execute('SELECT * FROM ai_reports WHERE cache_key = ?', (cache_key,)).fetchone()
+            if row is None or row['created_at'] + MAX_AGE <= now:
+                metrics.inc('cache_requests_total', cache='ai_report', result='miss')
+                return None
+            metrics.inc('cache_requests_total', cache='ai_report', result='hit')
+            conn.execute(
+                'UPDATE ai_reports SET last_used_at = ?, hit_count = hit_count + 1 WHERE cache_key = ?',
+                (now, cache_key)
+            )
+            conn.commit()
+            return dict(row)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("AI 보고서 캐시 조회 오류: %s", e)
+        return None
+
+
+def put(cache_key, corp_code, model, temperature, report, usage=None):
+    """생성된 보고서 저장 후 오래된 항목 정리"""
+    usage = usage or {}
+    now = time.time()
+    try:
+        conn = _connect()
+        try:
+            conn.execute('''
+            INSERT OR REPLACE INTO ai_reports
+            (cache_key, corp_code, model, temperature, report,
+             prompt_tokens, completion_tokens, total_tokens, created_at, last_used_at, hit_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+            ''', (
+                cache_key, corp_code, model, temperature, report,
+                usage.get('prompt_tokens'), usage.get('completion_tokens'), usage.get('total_tokens'),
+                now, now
+            ))
+            evict(conn, now)
+            conn.commit()
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        logger.warning("AI 보고서 캐시 저장 오류: %s", e)
+
+
+def evict(conn, now=None):
+    """만료된 보고서와 최대 개수를 넘는 오래된 보고서 삭제 (LRU)"""
+    now = now or time.time()
+    deleted = conn.execute('DELETE FROM ai_reports WHERE created_at <= ?', (now - MAX_AGE,)).rowcount
+    deleted += conn.execute('''
+    DELETE FROM ai_reports WHERE cache_key IN (
+        SELECT cache_key FROM ai_reports ORDER BY last_used_at DESC LIMIT -1 OFFSET ?
+    )
+    ''', (MAX_ENTRIES,)).rowcount
+    return deleted
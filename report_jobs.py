@@ -0,0 +1,216 @@
+"""AI 보고서 생성 작업 큐 (SQLite 상태 저장 + 워커 스레드 풀)"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+JOB_DB_NAME = 'report_jobs.db'
+MAX_WORKERS = int(os.getenv('REPORT_JOB_WORKERS', '2'))  # 워커 프로세스당 동시 생성 수
+MAX_PENDING = int(os.getenv('REPORT_JOB_MAX_PENDING', '20'))  # 워커 프로세스당 대기 가능한 작업 수
+JOB_TIMEOUT = int(os.getenv('REPORT_JOB_TIMEOUT', '300'))  # 이 시간 동안 진행이 없으면 실패 처리(초)
+JOB_RETENTION = int(os.getenv('REPORT_JOB_RETENTION', str(24 * 3600)))  # 완료된 작업 보관 기간(초)
+PROGRESS_INTERVAL = float(os.getenv('REPORT_JOB_PROGRESS_INTERVAL', '0.5'))  # 생성 중인 보고서 저장 간격(초)
+
+ACTIVE_STATES = ('queued', 'running')
+
+
+class QueueFull(Exception):
+    """대기 중인 작업이 너무 많음"""
+
+
+class ReportJobQueue:
+    """작업 상태는 SQLite에 저장해 어느 gunicorn 워커에서든 조회할 수 있다"""
+
+    def __init__(self, runner, max_workers=MAX_WORKERS, max_pending=MAX_PENDING, path=None):
+        # runner(corp_code, bsns_year, reprt_code, refresh, progress) -> 보고서 dict
+        # progress(text)로 지금까지 생성된 보고서를 넘기면 완료 전에도 상태 조회에서 볼 수 있다
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.path = path or os.path.join(os.getenv('DATA_PATH', ''), JOB_DB_NAME)
+        self._executor = None
+        self._executor_pid = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        if not self._schema_ready:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+            CREATE TABLE IF NOT EXISTS report_jobs (
+                job_id TEXT PRIMARY KEY,
+                corp_code TEXT NOT NULL,
+                bsns_year TEXT NOT NULL,
+                reprt_code TEXT NOT NULL,
+                refresh INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                result TEXT,
+                partial TEXT,
+                error TEXT,
+                owner_pid INTEGER,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            ''')
+            conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_report_jobs_lookup
+            ON report_jobs(corp_code, bsns_year, reprt_code, status)
+            ''')
+            # 이전 버전에서 만든 테이블에는 생성 중인 보고서 열이 없음
+            columns = {row['name'] for row in conn.execute('PRAGMA table_info(report_jobs)')}
+            if 'partial' not in columns:
+                conn.execute('ALTER TABLE report_jobs ADD COLUMN partial TEXT')
+            conn.commit()
+            self._schema_ready = True
+        return conn
+
+    def _get_executor(self):
+        """현재 프로세스의 스레드 풀 (gunicorn fork 이후에는 새로 생성)"""
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='report-job')
+            self._executor_pid = pid
+            self._pending = 0
+        return self._executor
+
+    def _set_status(self, job_id, status, result=None, error=None):
+        conn = self._connect()
+        try:
+            conn.execute('''
+            UPDATE report_jobs SET status = ?, result = ?, error = ?, updated_at = ?
+            WHERE job_id = ?
+            ''', (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                  error, time.time(), job_id))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def _progress_writer(self, job_id):
+        """생성 중인 보고서를 PROGRESS_INTERVAL마다 저장하는 콜백 (저장할 때 updated_at도 갱신)"""
+        last_saved = [0.0]
+
+        def progress(text):
+            now = time.time()
+            if now - last_saved[0] < PROGRESS_INTERVAL:
+                return
+            last_saved[0] = now
+            conn = self._connect()
+            try:
+                conn.execute('''
+                UPDATE report_jobs SET partial = ?, updated_at = ?
+                WHERE job_id = ? AND status = 'running'
+                ''', (text, now, job_id))
+                conn.commit()
+            finally:
+                conn.close()
+
+        return progress
+
+    def _run(self, job_id, corp_code, bsns_year, reprt_code, refresh):
+        try:
+            self._set_status(job_id, 'running')
+            result = self.runner(corp_code, bsns_year, reprt_code, refresh, self._progress_writer(job_id))
+            if result.get('status') == 'success':
+                self._set_status(job_id, 'done', result=result)
+            else:
+                self._set_status(job_id, 'failed', result=result, error=result.get('message'))
+        except Exception as e:
+            logger.exception("AI 보고서 작업 실패 (%s): %s", job_id, e)
+            self._set_status(job_id, 'failed', error=f'AI 보고서 생성 중 오류가 발생했습니다: {str(e)}')
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def submit(self, corp_code, bsns_year, reprt_code, refresh=False):
+        """작업 등록 (같은 조건의 진행 중인 작업이 있으면 그 작업을 반환)
+
+        진행 중인 작업 조회와 등록은 한 쓰기 트랜잭션(BEGIN IMMEDIATE)에서 처리해
+        여러 워커에 동시에 들어온 같은 요청도 작업을 하나만 만든다.
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            if not refresh:
+                row = conn.execute('''
+                SELECT * FROM report_jobs
+                WHERE corp_code = ? AND bsns_year = ? AND reprt_code = ?
+                  AND status IN ('queued', 'running') AND updated_at > ?
+                ORDER BY created_at DESC LIMIT 1
+                ''', (corp_code, bsns_year, reprt_code, now - JOB_TIMEOUT)).fetchone()
+                if row is not None:
+                    conn.rollback()
+                    return self._to_dict(row)
+
+            with self._lock:
+                executor = self._get_executor()
+                if self._pending >= self.max_pending:
+                    conn.rollback()
+                    raise QueueFull('AI 보고서 생성 요청이 많습니다. 잠시 후 다시 시도해주세요.')
+                self._pending += 1
+
+            job_id = uuid.uuid4().hex
+            try:
+                conn.execute('''
+                INSERT INTO report_jobs
+                (job_id, corp_code, bsns_year, reprt_code, refresh, status, owner_pid, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)
+                ''', (job_id, corp_code, bsns_year, reprt_code, int(bool(refresh)), os.getpid(), now, now))
+                # 보관 기간이 지난 작업 정리
+                conn.execute('DELETE FROM report_jobs WHERE updated_at < ?', (now - JOB_RETENTION,))
+                conn.commit()
+            except sqlite3.Error:
+                conn.rollback()
+                with self._lock:
+                    self._pending -= 1
+                raise
+        finally:
+            conn.close()
+
+        executor.submit(self._run, job_id, corp_code, bsns_year, reprt_code, refresh)
+        return self.get(job_id)
+
+    def get(self, job_id):
+        """작업 상태 조회 (없으면 None)"""
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT * FROM report_jobs WHERE job_id = ?', (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._to_dict(row) if row is not None else None
+
+    def _to_dict(self, row):
+        job = {
+            'job_id': row['job_id'],
+            'corp_code': row['corp_code'],
+            'year': row['bsns_year'],
+            'report_type': row['reprt_code'],
+            'status': row['status'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        }
+        # 처리하던 워커가 중단되어 오래 멈춘 작업은 실패로 표시
+        if job['status'] in ACTIVE_STATES and row['updated_at'] + JOB_TIMEOUT < time.time():
+            job['status'] = 'failed'
+            job['error'] = '작업 처리 시간이 초과되었습니다. 다시 요청해주세요.'
+            return job
+        if row['result']:
+            job['result'] = json.loads(row['result'])
+        elif job['status'] == 'running' and row['partial']:
+            job['partial'] = row['partial']
+        if row['error']:
+            job['error'] = row['error']
+        return job
@@ -0,0 +1,175 @@
+"""동일 요청 중복 제거 (single-flight): 워커 내 스레드 + 워커 간 SQLite 임대"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+LEASE_DB_NAME = 'singleflight.db'
+LEASE_TTL = float(os.getenv('SINGLEFLIGHT_LEASE_TTL', '90'))  # 임대 유효시간 (호출 타임아웃보다 길게)
+RESULT_TTL = float(os.getenv('SINGLEFLIGHT_RESULT_TTL', '10'))  # 대기 중인 워커가 결과를 가져갈 수 있는 시간
+POLL_INTERVAL = 0.2
+
+_calls = {}
+_lock = threading.Lock()
+_schema_ready = False
+
+
+class _Call:
+    """진행 중인 호출 (같은 워커의 대기자들이 결과를 공유)"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def get_lease_path():
+    """임대 DB 경로 (companies.db와 같은 디렉토리)"""
+    return os.path.join(os.getenv('DATA_PATH', ''), LEASE_DB_NAME)
+
+
+def _connect():
+    global _schema_ready
+    path = get_lease_path()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None)
+    if not _schema_ready:
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS flights (
+            key TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            state TEXT NOT NULL,
+            lease_expires REAL NOT NULL,
+            result TEXT,
+            done_at REAL
+        )
+        ''')
+        _schema_ready = True
+    return conn
+
+
+def _try_acquire(conn, key, owner, lease_ttl, since):
+    """임대 획득 시도: ('acquired', None) / ('done', 결과) / ('busy', None)
+
+    since 이후에 끝난 호출(대기하는 동안 완료된 호출)의 결과만 공유받는다.
+    """
+    now = time.time()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = conn.execute(
+            'SELECT state, lease_expires, result, done_at FROM flights WHERE key = ?', (key,)
+        ).fetchone()
+        if row is not None:
+            state, lease_expires, result, done_at = row
+            if state == 'done' and result is not None and done_at >= since and done_at + RESULT_TTL > now:
+                conn.execute('COMMIT')
+                return 'done', json.loads(result)
+            if state == 'running' and lease_expires > now:
+                conn.execute('COMMIT')
+                return 'busy', None
+
+        conn.execute('''
+        INSERT OR REPLACE INTO flights (key, owner, state, lease_expires, result, done_at)
+        VALUES (?, ?, 'running', ?, NULL, NULL)
+        ''', (key, owner, now + lease_ttl))
+        conn.execute('COMMIT')
+        return 'acquired', None
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def _release(conn, key, owner, result):
+    """임대 해제 (결과가 있으면 대기 중인 워커를 위해 잠시 보관)"""
+    encoded = None
+    if result is not None:
+        try:
+            encoded = json.dumps(result, ensure_ascii=False)
+        except (TypeError, ValueError):
+            encoded = None
+
+    if encoded is None:
+        conn.execute('DELETE FROM flights WHERE key = ? AND owner = ?', (key, owner))
+    else:
+        conn.execute('''
+        UPDATE flights SET state = 'done', result = ?, done_at = ?
+        WHERE key = ? AND owner = ?
+        ''', (encoded, time.time(), key, owner))
+    # 오래된 완료 항목 정리
+    conn.execute("DELETE FROM flights WHERE state = 'done' AND done_at < ?", (time.time() - RESULT_TTL,))
+
+
+def _run_across_workers(key, fn, lease_ttl):
+    """SQLite 임대로 워커 간에 한 번만 실행"""
+    owner = f"{os.getpid()}:{threading.get_ident()}"
+    since = time.time()
+    try:
+        conn = _connect()
+    except sqlite3.Error as e:
+        logger.warning("single-flight 임대 DB 연결 실패, 직접 실행: %s", e)
+        return fn()
+
+    try:
+        while True:
+            try:
+                state, shared = _try_acquire(conn, key, owner, lease_ttl, since)
+            except sqlite3.Error as e:
+                logger.warning("single-flight 임대 획득 실패, 직접 실행: %s", e)
+                return fn()
+
+            if state == 'done':
+                return shared
+            if state == 'busy':
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            result = None
+            try:
+                result = fn()
+            finally:
+                try:
+                    _release(conn, key, owner, result)
+                except sqlite3.Error as e:
+                    logger.warning("single-flight 임대 해제 실패: %s", e)
+            return result
+    finally:
+        conn.close()
+
+
+def do(key, fn, lease_ttl=LEASE_TTL, shared=True):
+    """같은 key의 동시 호출은 fn을 한 번만 실행하고 결과를 공유
+
+    shared=True이면 다른 gunicorn 워커와도 SQLite 임대로 중복을 제거한다.
+    워커 간 공유되는 결과는 JSON 직렬화가 가능해야 한다.
+    """
+    with _lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _Call()
+            _calls[key] = call
+
+    if not leader:
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _run_across_workers(key, fn, lease_ttl) if shared else fn()
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            _calls.pop(key, None)
+        call.event.set()
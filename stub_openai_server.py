@@ -0,0 +1,113 @@
+"""오프라인 테스트용 OpenAI 호환 스텁 서버 (스트리밍 지원)
+
+사용법:
+    python stub_openai_server.py --port 8001
+    OPENAI_API_KEY=sk-stub OPENAI_BASE_URL=http://localhost:8001/v1 python app.py
+"""
+import argparse
+import json
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_REPORT = """1. **기업 개요 및 사업 특성**
+스텁 서버가 생성한 테스트 보고서입니다.
+
+2. **재무 상태 종합 평가**
+매출 규모와 수익성, 재무 안정성을 요약합니다.
+
+3. **업종 대비 경쟁력 분석**
+업종 평균 대비 강점과 약점을 설명합니다.
+
+4. **투자 관점에서의 평가**
+주요 투자 포인트를 정리합니다.
+
+5. **리스크 요인 및 주의사항**
+재무 지표상 잠재적 위험 요소를 점검합니다.
+"""
+
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    """/v1/models, /v1/chat/completions 만 흉내 내는 핸들러"""
+
+    chunk_delay = 0.05
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip('/').endswith('/models'):
+            self._send_json({'object': 'list', 'data': [
+                {'id': 'gpt-3.5-turbo', 'object': 'model', 'created': 0, 'owned_by': 'stub'}
+            ]})
+        else:
+            self._send_json({'error': {'message': 'not found'}}, 404)
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json({'error': {'message': 'not found'}}, 404)
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length) or b'{}')
+        model = request.get('model', 'gpt-3.5-turbo')
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        usage = {'prompt_tokens': 1000, 'completion_tokens': len(STUB_REPORT), 'total_tokens': 1000 + len(STUB_REPORT)}
+
+        if not request.get('stream'):
+            self._send_json({
+                'id': completion_id, 'object': 'chat.completion', 'created': created, 'model': model,
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': STUB_REPORT}}],
+                'usage': usage
+            })
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+
+        def send_chunk(choices, chunk_usage=None):
+            chunk = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': created,
+                     'model': model, 'choices': choices}
+            if chunk_usage is not None:
+                chunk['usage'] = chunk_usage
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+
+        send_chunk([{'index': 0, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}])
+        for line in STUB_REPORT.splitlines(keepends=True):
+            time.sleep(self.chunk_delay)
+            send_chunk([{'index': 0, 'delta': {'content': line}, 'finish_reason': None}])
+        send_chunk([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}])
+        if (request.get('stream_options') or {}).get('include_usage'):
+            send_chunk([], usage)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        print(f"[stub-openai] {self.address_string()} {format % args}", flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenAI 호환 스텁 서버')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--delay', type=float, default=0.05, help='스트리밍 청크 간격(초)')
+    args = parser.parse_args()
+
+    StubOpenAIHandler.chunk_delay = args.delay
+    server = ThreadingHTTPServer((args.host, args.port), StubOpenAIHandler)
+    print(f"스텁 OpenAI 서버 실행 중: http://{args.host}:{args.port}/v1", flush=True)
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
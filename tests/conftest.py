@@ -0,0 +1,47 @@
+"""테스트 공통 설정: 저장소 루트의 모듈을 import할 수 있게 하고, 테스트마다 임시 DATA_PATH 사용"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# (기업코드, 회사명, 영문 회사명, 종목코드, 수정일)
+COMPANIES = [
+    ('00126380', '삼성전자', 'SAMSUNG ELECTRONICS CO,.LTD', '005930', '20231201'),
+    ('00164779', 'SK하이닉스', 'SK hynix Inc.', '000660', '20231201'),
+    ('00401731', 'LG전자', 'LG Electronics Inc.', '066570', '20231201'),
+    ('00999999', '비상장테스트', 'Unlisted Test', ' ', '20231201'),
+]
+
+
+@pytest.fixture
+def data_path(tmp_path, monkeypatch):
+    """임시 DATA_PATH (모듈별 스키마 준비 상태도 초기화)"""
+    monkeypatch.setenv('DATA_PATH', str(tmp_path))
+    for name in ('dart_cache', 'singleflight', 'financial_store', 'report_cache', 'industry_peers'):
+        module = sys.modules.get(name)
+        if module is not None and hasattr(module, '_schema_ready'):
+            monkeypatch.setattr(module, '_schema_ready', False)
+    return tmp_path
+
+
+@pytest.fixture
+def companies_db(data_path):
+    """COMPANIES를 적재한 임시 companies.db 경로 (앱의 읽기 연결 풀과 회사 캐시도 비움)"""
+    import database
+    from parse_corpcode import create_database, ingest_companies
+
+    path = database.get_db_path()
+    conn = create_database(path)
+    try:
+        ingest_companies(conn, COMPANIES, progress_every=0)
+    finally:
+        conn.close()
+    database.pool.clear()
+    database._company_cache.clear()
+    yield path
+    database.pool.clear()
+    database._company_cache.clear()
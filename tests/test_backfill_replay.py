@@ -0,0 +1,145 @@
+"""재무제표 일괄 적재: 기록된 DART 응답(--replay)으로 저장, 이어서 적재, 데이터 없음(013) 처리 확인"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+import backfill_financials
+import financial_store
+import industry_peers
+from backfill_financials import ResponseRecorder, backfill, fetch_chunk, load_companies
+from dart_client import DartResult
+
+YEAR = '2023'
+REPRT_CODE = '11011'
+SAMSUNG, HYNIX, LG = '00126380', '00164779', '00401731'
+CHUNKS = [[SAMSUNG, HYNIX], [LG]]  # --chunk-size 2 일 때의 묶음 (기업코드 순)
+
+
+def item(account_nm, amount, **fields):
+    return {'bsns_year': YEAR, 'reprt_code': REPRT_CODE, 'rcept_no': '20240312000736',
+            'fs_div': 'CFS', 'sj_div': 'IS', 'account_nm': account_nm,
+            'thstrm_amount': amount, 'frmtrm_amount': '', 'bfefrmtrm_amount': '', **fields}
+
+
+RESPONSES = {
+    # 삼성전자는 corp_code로, SK하이닉스는 stock_code로만 구분되는 항목
+    ','.join(CHUNKS[0]): {'status': '000', 'message': '정상', 'list': [
+        item('매출액', '258,935,494,000,000', corp_code=SAMSUNG, stock_code='005930'),
+        item('당기순이익', '15,487,100,000,000', corp_code=SAMSUNG, stock_code='005930'),
+        item('매출액', '32,765,719,000,000', stock_code='000660'),
+    ]},
+    ','.join(CHUNKS[1]): {'status': '013', 'message': '조회된 데이타가 없습니다.'},
+}
+
+
+class FakeDartClient:
+    """묶음별로 정해진 응답을 돌려주는 DART 클라이언트 (기록용)"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.calls = []
+
+    def get(self, endpoint, params):
+        self.calls.append(params['corp_code'])
+        return DartResult(self.responses[params['corp_code']], 0.0, 1, 200)
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    """--record로 남긴 것과 같은 응답 파일 디렉터리"""
+    directory = str(tmp_path / 'fixtures')
+    recorder = ResponseRecorder(directory, FakeDartClient(RESPONSES))
+    for corp_codes in CHUNKS:
+        fetch_chunk(recorder, corp_codes, YEAR, REPRT_CODE)
+    return directory
+
+
+def fixture_path(directory, corp_codes):
+    return ResponseRecorder(directory)._path(backfill_financials.MULTI_ACCOUNT_ENDPOINT, {
+        'corp_code': ','.join(corp_codes), 'bsns_year': YEAR, 'reprt_code': REPRT_CODE})
+
+
+def progress():
+    conn = sqlite3.connect(financial_store.get_store_path())
+    try:
+        return dict(conn.execute('SELECT corp_code, status FROM backfill_progress WHERE bsns_year = ? AND reprt_code = ?',
+                                 (YEAR, REPRT_CODE)))
+    finally:
+        conn.close()
+
+
+def run(directory, companies):
+    return backfill(ResponseRecorder(directory), companies, YEAR, REPRT_CODE, workers=2, chunk_size=2)
+
+
+def test_replay_main_saves_reports_without_dart(companies_db, fixtures, data_path, monkeypatch, capsys):
+    monkeypatch.delenv('DART_API_KEY', raising=False)
+    monkeypatch.setattr(sys, 'argv', ['backfill_financials.py', '--years', YEAR, '--replay', fixtures,
+                                      '--chunk-size', '2', '--workers', '2'])
+    backfill_financials.main()
+    output = capsys.readouterr().out
+    assert '적재 대상: 3개 회사' in output  # 비상장 회사 제외
+    assert '호출 2회, 저장 2, 데이터 없음 1, 실패 0' in output
+
+    samsung = financial_store.load_report(SAMSUNG, YEAR, REPRT_CODE)
+    assert [(row['account_nm'], row['thstrm_amount']) for row in samsung['list']] == [
+        ('매출액', '258,935,494,000,000'), ('당기순이익', '15,487,100,000,000')]
+    assert samsung['list'][0]['rcept_no'] == '20240312000736'
+    hynix = financial_store.load_report(HYNIX, YEAR, REPRT_CODE)
+    assert [row['thstrm_amount'] for row in hynix['list']] == ['32,765,719,000,000']
+    # 013(데이터 없음)은 저장하지 않고 처리 완료로만 기록
+    assert financial_store.load_report(LG, YEAR, REPRT_CODE) is None
+    assert progress() == {SAMSUNG: 'saved', HYNIX: 'saved', LG: 'nodata'}
+
+
+def test_resume_skips_finished_companies(companies_db, fixtures, data_path):
+    companies = load_companies(companies_db)
+    missing = fixture_path(fixtures, CHUNKS[1])
+    os.rename(missing, missing + '.bak')
+
+    # 기록이 없는 묶음은 실패로 남고 진행 기록도 없음
+    summary = run(fixtures, companies)
+    assert (summary['pending'], summary['calls'], summary['saved'], summary['failed']) == (3, 1, 2, 1)
+    assert progress() == {SAMSUNG: 'saved', HYNIX: 'saved'}
+
+    # 다시 실행하면 남은 회사만 조회
+    os.rename(missing + '.bak', missing)
+    summary = run(fixtures, companies)
+    assert (summary['pending'], summary['calls'], summary['no_data'], summary['failed']) == (1, 1, 1, 0)
+    assert progress()[LG] == 'nodata'
+
+    # 모두 처리했으면 응답 파일 없이도 호출하지 않음
+    for corp_codes in CHUNKS:
+        os.remove(fixture_path(fixtures, corp_codes))
+    summary = run(fixtures, companies)
+    assert (summary['pending'], summary['calls'], summary['failed']) == (0, 0, 0)
+
+
+def test_error_status_is_retried_next_run(companies_db, tmp_path, data_path):
+    companies = load_companies(companies_db)
+    directory = str(tmp_path / 'limited')
+    limited = dict(RESPONSES, **{','.join(CHUNKS[0]): {'status': '020', 'message': '요청 제한을 초과하였습니다.'}})
+    client = FakeDartClient(limited)
+    recorder = ResponseRecorder(directory, client)
+
+    summary = backfill(recorder, companies, YEAR, REPRT_CODE, workers=1, chunk_size=2)
+    assert (summary['calls'], summary['saved'], summary['no_data'], summary['failed']) == (2, 0, 1, 2)
+    assert progress() == {LG: 'nodata'}
+
+    client.responses = RESPONSES
+    client.calls.clear()
+    summary = backfill(recorder, companies, YEAR, REPRT_CODE, workers=1, chunk_size=2)
+    assert client.calls == [','.join(CHUNKS[0])]
+    assert summary['saved'] == 2
+    assert progress() == {SAMSUNG: 'saved', HYNIX: 'saved', LG: 'nodata'}
+
+
+def test_load_companies_uses_is_listed(companies_db):
+    # 업종 백분위·스크리너와 같은 상장사 정의 (is_listed)
+    listed = load_companies(companies_db)
+    assert sorted(listed) == sorted(industry_peers.load_listed_companies(companies_db))
+    assert listed[SAMSUNG] == '005930'
+    assert '00999999' not in listed
+    assert len(load_companies(companies_db, listed_only=False)) == 4
@@ -0,0 +1,38 @@
+"""회사명 자동완성: 넓은 접두어에서도 탐색 한도 뒤의 상장사를 먼저 제안"""
+import sqlite3
+
+import pytest
+
+from company_autocomplete import MAX_RANGE_SCAN, AutocompleteIndex
+
+
+@pytest.fixture
+def index():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE companies (corp_code TEXT, corp_name TEXT, corp_name_eng TEXT, stock_code TEXT)')
+    # 비상장사 키 'abc00000'~가 상장사 키 'abcz'보다 앞에 MAX_RANGE_SCAN개 넘게 정렬됨
+    conn.executemany('INSERT INTO companies VALUES (?, ?, ?, ?)', [
+        (f'9{i:07d}', f'ABC{i:05d}', None, ' ') for i in range(MAX_RANGE_SCAN + 100)
+    ])
+    conn.executemany('INSERT INTO companies VALUES (?, ?, ?, ?)', [
+        ('00000001', 'ABCZ', 'ABC Zeta', '123450'),
+        ('00000002', '가나다', None, '000020'),
+    ])
+    index = AutocompleteIndex()
+    index.build(conn)
+    conn.close()
+    return index
+
+
+def test_listed_company_beyond_scan_limit_ranks_first(index):
+    suggestions = index.suggest('abc', limit=5)
+    assert [s['corp_name'] for s in suggestions][0] == 'ABCZ'
+    assert suggestions[0]['listed'] is True
+    # 상장사가 limit개보다 적으면 나머지는 비상장사로 채움
+    assert len(suggestions) == 5
+    assert not any(s['listed'] for s in suggestions[1:])
+
+
+def test_unlisted_companies_still_suggested(index):
+    assert [s['corp_name'] for s in index.suggest('abc0001', limit=3)] == ['ABC00010', 'ABC00011', 'ABC00012']
+    assert [s['corp_name'] for s in index.suggest('ㄱㄴㄷ')] == ['가나다']
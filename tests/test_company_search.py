@@ -0,0 +1,103 @@
+"""회사 검색: 짧은 검색어의 접두어(인덱스 범위) + 제한된 부분 일치 검색과 LIKE 대체 검색"""
+import sqlite3
+
+import pytest
+
+import company_search
+from company_search import _search_source, search_companies, search_companies_after
+from parse_corpcode import create_database, ingest_companies
+
+COMPANIES = [
+    ('00126380', '삼성전자', 'SAMSUNG ELECTRONICS CO,.LTD', '005930', '20231201'),
+    ('00126362', '삼성SDI', 'SAMSUNG SDI CO., LTD.', '006400', '20231201'),
+    ('00164779', 'SK하이닉스', 'SK hynix Inc.', '000660', '20231201'),
+    ('00401731', 'LG전자', 'LG Electronics Inc.', '066570', '20231201'),
+    ('00105873', '엘지디스플레이', 'lg display co.,ltd', ' ', '20231201'),
+    ('00999999', '한국삼성', 'Korea Samsung', ' ', '20231201'),
+    ('00888888', '에이비씨', 'A@B Trading', ' ', '20231201'),
+]
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(company_search, '_count_cache', {})
+    conn = create_database(str(tmp_path / 'companies.db'))
+    ingest_companies(conn, COMPANIES, progress_every=0)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def names(companies):
+    return [company['corp_name'] for company in companies]
+
+
+@pytest.mark.parametrize('search, expected', [
+    # 회사명 접두어 일치가 먼저, 부분 일치가 뒤에 (같은 순위는 회사명 순)
+    ('삼성', ['삼성SDI', '삼성전자', '한국삼성']),
+    ('삼', ['삼성SDI', '삼성전자', '한국삼성']),
+    ('전자', ['LG전자', '삼성전자']),                     # 부분 일치만
+    ('lg', ['LG전자', '엘지디스플레이']),                  # 대문자 회사명과 영문 회사명(대소문자 무시)
+    ('Sk', ['SK하이닉스']),
+    ('sa', ['삼성SDI', '삼성전자', '한국삼성']),           # 영문 회사명 'SAMSUNG ...', 'Korea Samsung'
+    ('a@', ['에이비씨']),
+    ('66', ['LG전자', 'SK하이닉스']),                     # 종목코드 066570, 000660
+    ('05', ['삼성전자', '엘지디스플레이']),                # 종목코드 005930, 기업코드 00105873
+])
+def test_short_query_matches_prefix_then_substring(conn, search, expected):
+    companies, total = search_companies(conn, search, 20, 0)
+    assert names(companies) == expected
+    assert total == len(expected)
+
+
+def test_short_code_query_matches_codes(conn):
+    companies, total = search_companies(conn, '00', 20, 0)
+    assert len(companies) == total == len(COMPANIES)  # 모든 기업코드가 00으로 시작
+
+
+def test_short_query_prefix_tier_uses_indexes(conn):
+    for search in ('삼성', 'lg', 'a'):
+        source, where, params = _search_source(search, use_fts=True)
+        plan = [row[-1] for row in conn.execute(f'EXPLAIN QUERY PLAN SELECT c.* FROM {source} WHERE {where}', params)]
+        assert any('idx_companies_name ' in step for step in plan), plan
+        assert any('idx_companies_name_eng' in step for step in plan), plan
+
+
+def test_substring_tier_is_bounded(conn, monkeypatch):
+    monkeypatch.setattr(company_search, 'SHORT_QUERY_SCAN_LIMIT', 2)
+    # 기업코드 부분 일치는 7건이지만 2건까지만
+    assert search_companies(conn, '0', 20, 0)[1] == 2
+    # 접두어 일치는 제한과 관계없이 모두 포함되고, 부분 일치는 제한 안에서만 더해짐
+    monkeypatch.setattr(company_search, 'SHORT_QUERY_SCAN_LIMIT', 1)
+    companies, total = search_companies(conn, '삼', 20, 0)
+    assert names(companies) == ['삼성SDI', '삼성전자']
+    assert total == 2
+
+
+def test_exact_name_ranks_first(conn):
+    companies, _ = search_companies(conn, 'LG', 20, 0)
+    assert names(companies) == ['LG전자', '엘지디스플레이']
+
+
+def test_short_query_keyset_pagination(conn):
+    pages = []
+    cursor = None
+    while True:
+        companies, cursor = search_companies_after(conn, 'sa', 1, cursor)
+        pages.extend(names(companies))
+        if cursor is None:
+            break
+    assert pages == ['삼성SDI', '삼성전자', '한국삼성']
+
+
+def test_like_fallback_includes_english_name(conn):
+    # trigram을 지원하지 않는 SQLite의 부분 일치 검색도 영문 회사명을 찾음
+    companies, total = search_companies(conn, 'hynix', 20, 0, use_fts=False)
+    assert names(companies) == ['SK하이닉스']
+    assert total == 1
+    assert names(search_companies(conn, 'hynix', 20, 0, use_fts=True)[0]) == ['SK하이닉스']
+
+
+def test_blank_search_matches_all(conn):
+    companies, total = search_companies(conn, '  ', 20, 0)
+    assert len(companies) == total == len(COMPANIES)
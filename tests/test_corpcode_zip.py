@@ -0,0 +1,119 @@
+"""CORPCODE.zip 스트리밍 적재: 끊긴/손상된 zip은 ZipStreamError로 적재를 취소하고 companies.db를 그대로 둠"""
+import sqlite3
+import sys
+import zipfile
+
+import pytest
+
+import parse_corpcode
+from conftest import COMPANIES
+from corpcode_zip import ZipStreamError, open_corpcode_zip
+from parse_corpcode import ingest_companies, iter_companies
+
+# 기존 DB와 달리 삼성전자 이름 변경, 신규 회사 추가, LG전자 삭제 (적재되면 모두 반영됨)
+UPDATED = [
+    ('00126380', '삼성전자주식회사', 'SAMSUNG ELECTRONICS CO,.LTD', '005930', '20240102'),
+    COMPANIES[1],
+    ('00111111', '신규상장', 'New Listing', '123450', '20240102'),
+    COMPANIES[3],
+]
+
+
+def corpcode_xml(rows):
+    fields = parse_corpcode.COMPANY_FIELDS
+    items = ''.join(
+        '<list>' + ''.join(f'<{field}>{value}</{field}>' for field, value in zip(fields, row)) + '</list>'
+        for row in rows
+    )
+    return f'<?xml version="1.0" encoding="UTF-8"?><result>{items}</result>'.encode('utf-8')
+
+
+def write_zip(path, compression=zipfile.ZIP_DEFLATED):
+    with zipfile.ZipFile(path, 'w', compression) as archive:
+        archive.writestr('CORPCODE.xml', corpcode_xml(UPDATED))
+    return path.read_bytes()
+
+
+def snapshot(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute('''
+        SELECT corp_code, corp_name, corp_name_eng, stock_code, modify_date FROM companies ORDER BY corp_code
+        ''').fetchall()
+    finally:
+        conn.close()
+
+
+def ingest_zip(db_path, zip_path, expected_sha256=None):
+    stream, close = open_corpcode_zip(str(zip_path), expected_sha256=expected_sha256)
+    conn = sqlite3.connect(db_path)
+    try:
+        return stream, ingest_companies(conn, iter_companies(stream), batch_size=2, progress_every=0)
+    finally:
+        conn.close()
+        close()
+
+
+def test_valid_zip_is_ingested(companies_db, tmp_path):
+    zip_path = tmp_path / 'CORPCODE.zip'
+    write_zip(zip_path)
+    stream, result = ingest_zip(companies_db, zip_path)
+    assert (result['added'], result['changed'], result['removed']) == (1, 1, 1)
+    assert snapshot(companies_db) == sorted(UPDATED)
+    assert stream.member_name == 'CORPCODE.xml'
+    assert stream.total_bytes == zip_path.stat().st_size
+
+
+@pytest.mark.parametrize('cut', [0.3, 0.6, 0.95])
+def test_truncated_zip_rolls_back(companies_db, tmp_path, cut):
+    zip_path = tmp_path / 'CORPCODE.zip'
+    data = write_zip(zip_path)
+    zip_path.write_bytes(data[:int(len(data) * cut)])
+    before = snapshot(companies_db)
+
+    with pytest.raises(ZipStreamError, match='끊겼습니다'):
+        ingest_zip(companies_db, zip_path)
+    assert snapshot(companies_db) == before
+
+
+def test_corrupt_member_fails_crc_and_rolls_back(companies_db, tmp_path):
+    # 비압축 항목의 회사명 한 글자만 바꿔 XML은 정상으로 읽히고 마지막 CRC 검증에서만 실패
+    zip_path = tmp_path / 'CORPCODE.zip'
+    data = write_zip(zip_path, zipfile.ZIP_STORED)
+    zip_path.write_bytes(data.replace(b'New Listing', b'New Lasting', 1))
+    before = snapshot(companies_db)
+
+    with pytest.raises(ZipStreamError, match='CRC32'):
+        ingest_zip(companies_db, zip_path)
+    assert snapshot(companies_db) == before
+
+
+def test_sha256_mismatch_rolls_back(companies_db, tmp_path):
+    zip_path = tmp_path / 'CORPCODE.zip'
+    write_zip(zip_path)
+    before = snapshot(companies_db)
+
+    with pytest.raises(ZipStreamError, match='SHA-256'):
+        ingest_zip(companies_db, zip_path, expected_sha256='0' * 64)
+    assert snapshot(companies_db) == before
+
+
+def test_dart_error_response_is_not_zip(companies_db, tmp_path):
+    zip_path = tmp_path / 'CORPCODE.zip'
+    zip_path.write_bytes('<result><status>020</status><message>요청 제한을 초과하였습니다.</message></result>'.encode('utf-8'))
+
+    with pytest.raises(ZipStreamError, match=r'DART 오류 \(020\)'):
+        ingest_zip(companies_db, zip_path)
+    assert snapshot(companies_db) == sorted(COMPANIES)
+
+
+def test_main_reports_zip_error_and_keeps_database(companies_db, tmp_path, monkeypatch, capsys):
+    zip_path = tmp_path / 'CORPCODE.zip'
+    data = write_zip(zip_path)
+    zip_path.write_bytes(data[:len(data) // 2])
+    before = snapshot(companies_db)
+
+    monkeypatch.setattr(sys, 'argv', ['parse_corpcode.py', str(zip_path), '--db', companies_db])
+    parse_corpcode.main()
+    assert 'zip 오류 (적재 취소)' in capsys.readouterr().out
+    assert snapshot(companies_db) == before
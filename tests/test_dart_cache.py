@@ -0,0 +1,80 @@
+"""DART 응답 캐시: 디스크 적중 횟수는 모아 두었다가 주기적으로 기록"""
+import sqlite3
+import time
+from collections import OrderedDict
+
+import pytest
+
+import dart_cache
+
+KEY = ('00126380', '2022', '11011')
+PAYLOAD = {'status': '000', 'message': '정상', 'list': [{'account_nm': '매출액', 'thstrm_amount': '1,000'}]}
+
+
+@pytest.fixture
+def cache(data_path, monkeypatch):
+    monkeypatch.setattr(dart_cache, '_memory', OrderedDict())
+    monkeypatch.setattr(dart_cache, '_pending_hits', {})
+    monkeypatch.setattr(dart_cache, '_hit_state', {'flushed_at': time.time()})
+    monkeypatch.setattr(dart_cache, 'HIT_FLUSH_INTERVAL', 3600)
+    dart_cache.put(*KEY, PAYLOAD)
+    return dart_cache
+
+
+def disk_hits(cache, times):
+    """메모리 LRU를 비워 가며 times번 조회 (모두 디스크 적중)"""
+    for _ in range(times):
+        cache._memory.clear()
+        assert cache.get(*KEY) == PAYLOAD
+
+
+def stored_hit_count():
+    conn = sqlite3.connect(dart_cache.get_cache_path())
+    try:
+        return conn.execute(
+            'SELECT hit_count FROM dart_financial_cache WHERE corp_code = ? AND bsns_year = ? AND reprt_code = ?', KEY
+        ).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_disk_hits_are_not_written_per_lookup(cache):
+    disk_hits(cache, 5)
+    assert stored_hit_count() == 0
+    assert cache._pending_hits == {KEY: 5}
+
+    cache.flush_hits()
+    assert stored_hit_count() == 5
+    assert cache._pending_hits == {}
+
+
+def test_hits_are_flushed_after_interval(cache, monkeypatch):
+    disk_hits(cache, 3)
+    monkeypatch.setattr(dart_cache, 'HIT_FLUSH_INTERVAL', 0)
+    disk_hits(cache, 1)  # 주기가 지난 뒤의 조회가 모아 둔 횟수까지 한 번에 기록
+    assert stored_hit_count() == 4
+
+
+def test_stats_and_entries_include_pending_hits(cache):
+    disk_hits(cache, 2)
+    assert cache.stats()['disk_hit_total'] == 2
+    disk_hits(cache, 1)
+    assert cache.entries()[0]['hit_count'] == 3
+
+
+def test_store_resets_pending_hits(cache):
+    disk_hits(cache, 2)
+    cache.put(*KEY, PAYLOAD)
+    cache.flush_hits()
+    assert stored_hit_count() == 0
+
+
+def test_failed_flush_keeps_hits(cache, monkeypatch):
+    disk_hits(cache, 2)
+
+    def broken_connect():
+        raise sqlite3.OperationalError('database is locked')
+
+    monkeypatch.setattr(dart_cache, '_connect', broken_connect)
+    cache.flush_hits()
+    assert cache._pending_hits == {KEY: 2}
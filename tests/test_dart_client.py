@@ -0,0 +1,83 @@
+"""DART 클라이언트: 요청 오류의 메시지와 로그에 인증키(crtfc_key)가 남지 않음"""
+import logging
+import socket
+import threading
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import app as app_module
+import metrics
+from dart_client import DartClient, redact_api_key
+
+API_KEY = 'SECRETKEY123'
+
+
+def closed_port():
+    """연결이 거부되는 로컬 포트"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def not_found_server():
+    class NotFoundHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), NotFoundHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+    server.server_close()
+
+
+def assert_redacted(error):
+    text = ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+    assert API_KEY not in text
+    assert 'crtfc_key=***' in str(error)
+
+
+def test_connection_error_is_redacted(caplog):
+    client = DartClient(API_KEY, f'http://127.0.0.1:{closed_port()}', max_retries=1)
+    with caplog.at_level(logging.WARNING), pytest.raises(requests.exceptions.ConnectionError) as info:
+        client.get('fnlttSinglAcnt.json', {'corp_code': '00126380'})
+    assert_redacted(info.value)
+    assert 'DART 연결 오류' in caplog.text
+    assert API_KEY not in caplog.text
+
+
+def test_http_error_is_redacted(not_found_server):
+    client = DartClient(API_KEY, not_found_server, max_retries=0)
+    with pytest.raises(requests.exceptions.HTTPError) as info:
+        client.get('fnlttSinglAcnt.json', {'corp_code': '00126380'})
+    assert_redacted(info.value)
+    assert info.value.response.status_code == 404
+
+
+def test_redact_api_key():
+    url = 'https://opendart.fss.or.kr/api/company.json?crtfc_key=abc123&corp_code=00126380'
+    assert redact_api_key(url) == 'https://opendart.fss.or.kr/api/company.json?crtfc_key=***&corp_code=00126380'
+    assert redact_api_key(f"key '{API_KEY}'", API_KEY) == "key '***'"
+
+
+def test_app_log_does_not_contain_key(data_path, monkeypatch, caplog):
+    monkeypatch.setattr(app_module, 'DART_API_KEY', API_KEY)
+    monkeypatch.setattr(app_module, 'dart_client',
+                        DartClient(API_KEY, f'http://127.0.0.1:{closed_port()}', max_retries=0))
+    monkeypatch.setattr(metrics, 'flush', lambda: None)
+
+    with caplog.at_level(logging.WARNING):
+        result = app_module.get_financial_data('00126380', '2023', '11011')
+    metrics._pending.clear()
+    assert result['status'] == 'error'
+    assert 'DART API 요청 오류' in caplog.text
+    assert API_KEY not in caplog.text
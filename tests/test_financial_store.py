@@ -0,0 +1,71 @@
+"""재무제표 저장소: 같은 계정명이 중복된 항목 보존, 이전 기본 키 테이블 이전"""
+import sqlite3
+
+import numpy as np
+
+import financial_store
+import ratio_engine
+from financial_statements import FinancialStatements
+
+CORP_CODE = '00126380'
+
+
+def item(account_nm, amount, **fields):
+    return {'bsns_year': '2023', 'reprt_code': '11011', 'rcept_no': '20240312000736', 'fs_div': 'CFS',
+            'sj_div': 'BS', 'account_nm': account_nm, 'thstrm_amount': amount, 'frmtrm_amount': '',
+            'bfefrmtrm_amount': '', **fields}
+
+
+# 같은 재무제표에 같은 계정명이 ord, account_id만 다르게 두 번 나옴
+REPORT = {'status': '000', 'list': [
+    item('자본총계', '363,677,865,000,000', ord='27', account_id='ifrs-full_Equity'),
+    item('자본총계', '1,000', ord='31', account_id='dart_OtherEquity'),
+    item('당기순이익', '15,487,100,000,000', sj_div='IS', ord='25'),
+]}
+
+
+def test_duplicate_account_names_are_kept(data_path):
+    assert financial_store.save_report(CORP_CODE, '2023', '11011', REPORT) == 3
+    items = financial_store.load_report(CORP_CODE, '2023', '11011')['list']
+    assert [(i['account_nm'], i['ord'], i['thstrm_amount']) for i in items] == [
+        ('자본총계', '27', '363,677,865,000,000'),
+        ('자본총계', '31', '1,000'),
+        ('당기순이익', '25', '15,487,100,000,000'),
+    ]
+    # 다시 저장해도 행이 늘지 않음
+    financial_store.save_report(CORP_CODE, '2023', '11011', REPORT)
+    assert len(financial_store.load_report(CORP_CODE, '2023', '11011')['list']) == 3
+
+    # 조회할 때는 DART 목록에서 먼저 나온 항목이 우선 (개별 조회와 전체 회사 배열이 같음)
+    assert FinancialStatements(items).amounts('자본총계')['current'] == 363677865000000
+    companies, amounts = ratio_engine.load_amounts('2023', '11011')
+    assert companies == [CORP_CODE]
+    assert amounts['자본총계'][0, 0] == 363677865000000
+    assert not np.isnan(amounts['당기순이익'][0, 0])
+
+
+def test_old_primary_key_is_migrated(data_path):
+    conn = sqlite3.connect(financial_store.get_store_path())
+    conn.execute('''
+    CREATE TABLE financial_items (
+        corp_code TEXT NOT NULL, bsns_year TEXT NOT NULL, reprt_code TEXT NOT NULL, fs_div TEXT NOT NULL,
+        sj_div TEXT NOT NULL, account_nm TEXT NOT NULL, period TEXT NOT NULL, account_id TEXT, amount INTEGER,
+        seq INTEGER NOT NULL, ord TEXT, currency TEXT,
+        PRIMARY KEY (corp_code, bsns_year, reprt_code, fs_div, sj_div, account_nm, period)
+    ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX idx_financial_items_lookup ON financial_items(bsns_year, account_nm)')
+    conn.execute("INSERT INTO financial_items VALUES (?, '2023', '11011', 'CFS', 'BS', '자본총계', 'current', "
+                 "NULL, 1000, 0, NULL, NULL)", (CORP_CODE,))
+    conn.commit()
+    conn.close()
+
+    conn = financial_store._connect()
+    try:
+        assert 'seq' in financial_store._items_key(conn)
+        assert conn.execute('SELECT amount FROM financial_items').fetchall()[0][0] == 1000
+        lookup = conn.execute("PRAGMA index_info('idx_financial_items_lookup')").fetchall()
+        assert [row[2] for row in lookup][-1] == 'seq'  # 새 테이블에 인덱스를 다시 생성
+    finally:
+        conn.close()
+    assert financial_store.save_report(CORP_CODE, '2023', '11011', REPORT) == 3
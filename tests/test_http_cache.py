@@ -0,0 +1,107 @@
+"""HTTP 조건부 캐시: If-None-Match/If-Modified-Since 304, 압축된 표현의 ETag 접미사와 재검증, 재무정보 Cache-Control"""
+import gzip
+import json
+
+import pytest
+
+import app as app_module
+import financial_store
+import http_cache
+import http_encoding
+import metrics
+
+URL = '/api/company/00126380'
+
+
+@pytest.fixture
+def client(companies_db, monkeypatch):
+    monkeypatch.setattr(app_module, 'ensure_company_database', lambda: None)
+    monkeypatch.setattr(metrics, 'flush', lambda: None)
+    # 회사 정보 응답은 작아서 기본 설정으로는 압축하지 않으므로 모든 응답을 압축 대상으로
+    monkeypatch.setattr(http_encoding, 'COMPRESS_MIN_SIZE', 0)
+    metrics._pending.clear()
+    yield app_module.app.test_client()
+    metrics._pending.clear()
+
+
+def fetch(client, **headers):
+    return client.get(URL, headers={'Accept-Encoding': 'identity', **headers})
+
+
+def test_response_has_cache_headers(client):
+    response = fetch(client)
+    assert response.status_code == 200
+    etag, weak = response.get_etag()
+    assert etag and not weak
+    assert response.last_modified is not None
+    assert response.headers['Cache-Control'] == 'public, max-age=300'
+    assert 'Accept-Encoding' in response.vary
+    assert response.get_json()['corp_name'] == '삼성전자'
+
+
+def test_if_none_match_returns_304(client):
+    first = fetch(client)
+    response = fetch(client, **{'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == first.headers['ETag']
+    assert response.headers['Cache-Control'] == 'public, max-age=300'
+
+    # 다른 버전의 ETag면 본문을 다시 보냄
+    assert fetch(client, **{'If-None-Match': '"stale"'}).status_code == 200
+
+
+def test_if_modified_since_returns_304(client):
+    first = fetch(client)
+    last_modified = first.headers['Last-Modified']
+    assert fetch(client, **{'If-Modified-Since': last_modified}).status_code == 304
+    assert fetch(client, **{'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'}).status_code == 200
+    # If-None-Match가 있으면 If-Modified-Since는 보지 않음
+    response = fetch(client, **{'If-None-Match': '"stale"', 'If-Modified-Since': last_modified})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('encoding', ['gzip', 'br'])
+def test_compressed_etag_has_suffix_and_revalidates(client, encoding):
+    if encoding == 'br' and http_encoding.brotli is None:
+        pytest.skip('brotli가 설치되지 않음')
+    plain_etag = fetch(client).get_etag()[0]
+
+    response = fetch(client, **{'Accept-Encoding': encoding})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == encoding
+    etag, weak = response.get_etag()
+    assert etag == f'{plain_etag}-{encoding}' and not weak
+    decompress = gzip.decompress if encoding == 'gzip' else http_encoding.brotli.decompress
+    assert json.loads(decompress(response.data))['corp_code'] == '00126380'
+
+    # 압축된 표현의 ETag로 재검증해도 304 (본문을 만들거나 압축하지 않음)
+    revalidated = fetch(client, **{'Accept-Encoding': encoding, 'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert revalidated.get_etag() == (etag, False)
+    assert 'Content-Encoding' not in revalidated.headers
+
+    # 프록시가 다시 압축하며 약한 ETag로 바꾼 경우도 일치
+    assert fetch(client, **{'Accept-Encoding': encoding, 'If-None-Match': f'W/"{etag}"'}).status_code == 304
+
+
+@pytest.mark.parametrize('fields, cache_control', [
+    ('financial_ratios,chart_data,table_data,raw_data', http_cache.CACHE_CONTROL_CLOSED_YEAR),
+    ('', http_cache.CACHE_CONTROL_CURRENT_YEAR),  # 전체 항목 (업종 백분위, AI 보고서 상태 포함)
+    ('financial_ratios,peer_percentiles', http_cache.CACHE_CONTROL_CURRENT_YEAR),
+    ('table_data,ai_report', http_cache.CACHE_CONTROL_CURRENT_YEAR),
+])
+def test_closed_year_is_immutable_only_for_static_fields(client, data_path, fields, cache_control):
+    item = {'bsns_year': '2023', 'reprt_code': '11011', 'rcept_no': '20240312000736', 'fs_div': 'CFS',
+            'sj_div': 'IS', 'account_nm': '매출액', 'thstrm_amount': '258,935,494,000,000',
+            'frmtrm_amount': '', 'bfefrmtrm_amount': ''}
+    financial_store.save_report('00126380', '2023', '11011', {'status': '000', 'list': [item]})
+
+    url = f'/api/financial/00126380?year=2023&fields={fields}'
+    response = client.get(url, headers={'Accept-Encoding': 'identity'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == cache_control
+    revalidated = client.get(url, headers={'Accept-Encoding': 'identity', 'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+    assert revalidated.headers['Cache-Control'] == cache_control
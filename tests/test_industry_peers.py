@@ -0,0 +1,88 @@
+"""업종 백분위: 상장사 목록(is_listed)과 보고서 저장 후 갱신 요청 합치기"""
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import industry_peers
+from conftest import COMPANIES
+
+
+@pytest.fixture
+def refreshes(monkeypatch):
+    """refresh 대신 호출 기록 (calls: [(사업연도, 보고서, 회사 수)]), 실행 중에는 release가 설정될 때까지 대기"""
+    recorded = SimpleNamespace(calls=[], started=threading.Event(), release=threading.Event())
+    recorded.release.set()
+
+    def fake_refresh(bsns_year, reprt_code, companies):
+        recorded.calls.append((bsns_year, reprt_code, len(companies)))
+        recorded.started.set()
+        recorded.release.wait(5)
+
+    monkeypatch.setattr(industry_peers, 'refresh', fake_refresh)
+    monkeypatch.setattr(industry_peers, '_refresh_state', {})
+    return recorded
+
+
+class CountingLoader:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        return {'00126380': {}}
+
+
+def wait_idle(timeout=5):
+    deadline = time.monotonic() + timeout
+    while industry_peers._refresh_state:
+        assert time.monotonic() < deadline, industry_peers._refresh_state
+        time.sleep(0.01)
+
+
+def test_load_listed_companies(companies_db):
+    listed = industry_peers.load_listed_companies(companies_db)
+    assert sorted(listed) == sorted(row[0] for row in COMPANIES if row[3].strip())
+    assert listed['00126380']['corp_name'] == '삼성전자'
+
+
+def test_requests_while_pending_are_coalesced(refreshes):
+    loader = CountingLoader()
+    for _ in range(20):
+        industry_peers.schedule_refresh(2023, '11011', loader, delay=0.1)
+    industry_peers.schedule_refresh('2022', '11011', loader, delay=0.1)
+    assert set(industry_peers._refresh_state.values()) == {'pending'}
+    assert len([t for t in threading.enumerate() if t.name == 'peer-refresh']) == 2  # 요청마다 스레드를 만들지 않음
+    wait_idle()
+
+    # 사업연도·보고서마다 상장사 목록을 한 번만 읽고 한 번만 갱신
+    assert sorted(refreshes.calls) == [('2022', '11011', 1), ('2023', '11011', 1)]
+    assert loader.count == 2
+
+
+def test_request_while_running_reruns_once(refreshes):
+    loader = CountingLoader()
+    refreshes.release.clear()
+    industry_peers.schedule_refresh('2023', '11011', loader, delay=0)
+    assert refreshes.started.wait(5)
+
+    # 갱신 중에 저장된 보고서는 끝난 뒤 한 번 더 갱신해 반영
+    for _ in range(5):
+        industry_peers.schedule_refresh('2023', '11011', loader, delay=0)
+    assert industry_peers._refresh_state[('2023', '11011')] == 'rerun'
+    refreshes.release.set()
+    wait_idle()
+    assert len(refreshes.calls) == 2
+    assert loader.count == 2
+
+
+def test_failed_refresh_does_not_block_next_schedule(monkeypatch):
+    monkeypatch.setattr(industry_peers, '_refresh_state', {})
+
+    def failing_loader():
+        raise RuntimeError('companies.db 없음')
+
+    industry_peers.schedule_refresh('2023', '11011', failing_loader, delay=0)
+    wait_idle()
+    assert industry_peers._refresh_state == {}
@@ -0,0 +1,90 @@
+"""워커 간 공유 DART 호출 제한: 토큰 버킷 소진, 일일 한도, 앱의 429 응답"""
+import threading
+
+import pytest
+
+import app as app_module
+import metrics
+from rate_limiter import RateLimitExceeded, TokenBucket
+
+
+def acquire_concurrently(buckets, count):
+    """여러 버킷(워커)에서 count번 동시에 토큰을 요청하고 (성공 수, 한도 초과 예외 목록) 반환"""
+    barrier = threading.Barrier(count)
+    successes = []
+    errors = []
+
+    def worker(bucket):
+        barrier.wait()
+        try:
+            bucket.acquire()
+            successes.append(bucket)
+        except RateLimitExceeded as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(buckets[i % len(buckets)],)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return len(successes), errors
+
+
+def test_exhausted_bucket_is_shared_across_workers(data_path):
+    # 같은 dart_quota.db를 쓰는 버킷 인스턴스 = 서로 다른 gunicorn 워커
+    buckets = [TokenBucket('dart', rate=0.5, burst=5, max_wait=0) for _ in range(3)]
+    succeeded, errors = acquire_concurrently(buckets, 12)
+    assert succeeded == 5
+    assert len(errors) == 7
+    assert all('잠시 후 다시 시도' in e.message and 0 < e.retry_after <= 2 for e in errors)
+
+    status = buckets[0].status()
+    assert status['available_tokens'] < 1
+    assert status['daily_used'] == 5
+
+
+def test_waits_for_refill_within_max_wait(data_path):
+    bucket = TokenBucket('dart', rate=20, burst=1, max_wait=1)
+    bucket.acquire()
+    bucket.acquire()  # 다음 토큰(0.05초 후)까지 기다렸다가 성공
+    assert bucket.status()['daily_used'] == 2
+
+
+def test_daily_quota_exhausted(data_path):
+    buckets = [TokenBucket('dart', rate=1000, burst=1000, daily_limit=4, max_wait=0) for _ in range(2)]
+    succeeded, errors = acquire_concurrently(buckets, 6)
+    assert succeeded == 4
+    assert len(errors) == 2
+    for e in errors:
+        assert '일일 호출 한도(4회)' in e.message
+        assert 0 < e.retry_after <= 24 * 3600  # 한국 시간 자정까지
+
+    status = buckets[1].status()
+    assert (status['daily_used'], status['daily_remaining']) == (4, 0)
+    # 한도는 이름별로 따로 센다
+    TokenBucket('other', daily_limit=4, max_wait=0).acquire()
+
+
+@pytest.fixture
+def client(companies_db, monkeypatch):
+    monkeypatch.setattr(app_module, 'ensure_company_database', lambda: None)
+    monkeypatch.setattr(app_module, 'DART_API_KEY', 'test-key')
+    monkeypatch.setattr(metrics, 'flush', lambda: None)
+    metrics._pending.clear()
+    yield app_module.app.test_client()
+    metrics._pending.clear()
+
+
+@pytest.mark.parametrize('limits, message', [
+    ({'rate': 0.01, 'burst': 0}, '잠시 후 다시 시도'),
+    ({'daily_limit': 0}, '일일 호출 한도'),
+])
+def test_app_returns_429_when_limited(client, monkeypatch, limits, message):
+    # 토큰을 얻지 못하면 DART 요청을 보내기 전에 한도 초과로 끝남
+    monkeypatch.setattr(app_module.dart_client, 'rate_limiter', TokenBucket('dart', max_wait=0, **limits))
+
+    response = client.get('/api/financial/00126380?year=2023')
+    assert response.status_code == 429
+    body = response.get_json()
+    assert message in body['error']
+    assert int(response.headers['Retry-After']) == body['retry_after'] >= 1
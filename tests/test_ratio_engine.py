@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+import ratio_engine
+from financial_statements import ACCOUNTS, PERIODS
+
+
+def make_table(roe_values):
+    """당기 ROE가 roe_values가 되는 RatioTable (순이익/자본총계로 구성, None은 자본 없음 → NaN)"""
+    count = len(roe_values)
+    amounts = {account: np.full((len(PERIODS), count), np.nan) for account in ACCOUNTS}
+    for i, roe in enumerate(roe_values):
+        if roe is not None:
+            amounts['자본총계'][0, i] = 100.0
+            amounts['당기순이익'][0, i] = roe
+    return ratio_engine.RatioTable([f'{i:08d}' for i in range(count)], amounts)
+
+
+@pytest.mark.parametrize('expression', ['roe!=1', 'roe>0', 'roe>=0', 'roe<10', 'roe<=10', 'roe=5', 'roe==5'])
+def test_nan_fails_every_operator(expression):
+    table = make_table([5.0, None])
+    positions, total = table.screen(ratio_engine.parse_filter(expression))
+    assert positions.tolist() == [0]
+    assert total == 1
+
+
+def test_not_equal_excludes_matching_value():
+    table = make_table([5.0, 1.0, None])
+    positions, total = table.screen(ratio_engine.parse_filter('roe!=1'))
+    assert positions.tolist() == [0]
+    assert total == 1
+
+
+def test_sort_puts_missing_values_last():
+    table = make_table([None, 3.0, 9.0])
+    positions, total = table.screen(sort='-roe')
+    assert positions.tolist() == [2, 1, 0]
+    assert total == 3
+
+
+def test_parse_filter_rejects_unknown_syntax():
+    with pytest.raises(ratio_engine.ScreenerError):
+        ratio_engine.parse_filter('roe>>1')
@@ -0,0 +1,212 @@
+"""AI 보고서 SSE 스트리밍과 작업 큐: 스텁 OpenAI 서버로 이벤트 순서, 캐시, 연결 끊김/업스트림 취소, 생성 중 보고서 조회 확인"""
+import json
+import queue
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+import app as app_module
+import metrics
+import report_jobs
+from report_jobs import ReportJobQueue
+from stub_openai_server import STUB_REPORT, StubOpenAIHandler
+
+COMPANY = {
+    'corp_code': '00126380',
+    'corp_name': '삼성전자',
+    'stock_code': '005930',
+    'industry_classified': 'IT/전자',
+    'peer_percentiles': None
+}
+RATIOS = {'operating_margin': 2.5, 'revenue_formatted': '258.9조원'}
+STREAM_URL = f"/api/financial/{COMPANY['corp_code']}/ai_report/stream?year=2023"
+
+
+@pytest.fixture
+def stub_server():
+    """스텁 OpenAI 서버 (임의 포트), 요청별 결과('completed'/'disconnected')를 outcomes 큐로 알림"""
+    outcomes = queue.Queue()
+
+    class RecordingHandler(StubOpenAIHandler):
+        chunk_delay = 0.02
+        fail_status = None
+
+        def do_POST(self):
+            if self.fail_status:
+                self._send_json({'error': {'message': 'stub failure'}}, self.fail_status)
+                outcomes.put('failed')
+                return
+            try:
+                super().do_POST()
+            except (BrokenPipeError, ConnectionResetError):
+                outcomes.put('disconnected')
+            else:
+                outcomes.put('completed')
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RecordingHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.outcomes = outcomes
+    server.handler = RecordingHandler
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(data_path, stub_server, monkeypatch):
+    """스텁 서버를 가리키는 지연 생성 OpenAI 클라이언트와 테스트 클라이언트"""
+    monkeypatch.setenv('OPENAI_BASE_URL', f'http://127.0.0.1:{stub_server.server_port}/v1')
+    monkeypatch.setattr(app_module, 'OPENAI_API_KEY', 'sk-stub')
+    monkeypatch.setattr(app_module, '_openai', {'client': None, 'error': None})
+    monkeypatch.setattr(app_module, 'ensure_company_database', lambda: None)
+    monkeypatch.setattr(app_module, 'load_report_inputs',
+                        lambda corp_code, year, report_type: ((dict(COMPANY), None, dict(RATIOS)), None))
+    # 지표는 메모리에서만 확인 (metrics.db에 기록하지 않음)
+    monkeypatch.setattr(metrics, 'flush', lambda: None)
+    metrics._pending.clear()
+    yield app_module.app.test_client()
+    metrics._pending.clear()
+
+
+def parse_sse(body):
+    """SSE 본문을 [(이벤트, 데이터)]로 변환"""
+    events = []
+    for message in body.strip().split('\n\n'):
+        fields = dict(line.split(': ', 1) for line in message.splitlines())
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+def openai_outcomes():
+    """기록된 OpenAI 스트리밍 결과 {outcome: 횟수}"""
+    counts = {}
+    for (name, labels), values in metrics._pending.items():
+        if name == 'openai_request_duration_seconds':
+            label_map = dict(json.loads(labels))
+            if label_map['mode'] == 'stream':
+                counts[label_map['outcome']] = counts.get(label_map['outcome'], 0) + values[-1]
+    return counts
+
+
+def test_stream_event_sequence_and_cached_replay(client, stub_server):
+    response = client.get(STREAM_URL + '&refresh=1')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+    events = parse_sse(response.get_data(as_text=True))
+    names = [name for name, _ in events]
+    assert names[:2] == ['status', 'status']
+    assert names[-1] == 'done'
+    assert set(names[2:-1]) == {'token'}
+    assert ''.join(data['text'] for name, data in events if name == 'token') == STUB_REPORT
+    assert events[-1][1]['cached'] is False
+    assert stub_server.outcomes.get(timeout=5) == 'completed'
+    assert openai_outcomes() == {'success': 1}
+
+    # 끝까지 받은 보고서는 저장되어 다음 요청은 OpenAI 없이 한 번에 재생
+    events = parse_sse(client.get(STREAM_URL).get_data(as_text=True))
+    assert [name for name, _ in events] == ['status', 'status', 'token', 'done']
+    assert events[2][1]['text'] == STUB_REPORT
+    assert events[3][1]['cached'] is True
+    assert stub_server.outcomes.empty()
+
+
+def test_client_disconnect_cancels_upstream_stream(client, stub_server):
+    response = client.get(STREAM_URL + '&refresh=1', buffered=False)
+    chunks = iter(response.response)
+    received = []
+    while len([chunk for chunk in received if b'event: token' in chunk]) < 2:
+        received.append(next(chunks))
+    response.close()  # 브라우저가 연결을 끊은 경우와 같음 (생성기 종료)
+
+    # 업스트림 OpenAI 연결도 닫혀 스텁이 나머지 청크를 보내지 못함
+    assert stub_server.outcomes.get(timeout=5) == 'disconnected'
+    assert openai_outcomes() == {'cancelled': 1}
+
+    # 중간에 끊긴 보고서는 저장하지 않으므로 다음 요청은 다시 생성
+    events = parse_sse(client.get(STREAM_URL).get_data(as_text=True))
+    assert events[-1] == ('done', {'cached': False, 'generated_at': events[-1][1]['generated_at']})
+    assert stub_server.outcomes.get(timeout=5) == 'completed'
+
+
+def test_upstream_error_becomes_error_event(client, stub_server):
+    stub_server.handler.fail_status = 400  # 재시도하지 않는 오류
+    events = parse_sse(client.get(STREAM_URL + '&refresh=1').get_data(as_text=True))
+    assert [name for name, _ in events] == ['status', 'status', 'error']
+    assert 'AI 보고서 생성 중 오류' in events[-1][1]['message']
+    assert stub_server.outcomes.get(timeout=5) == 'failed'
+    assert openai_outcomes() == {'error': 1}
+
+
+def test_missing_openai_key_reports_error(client, monkeypatch):
+    monkeypatch.setattr(app_module, 'OPENAI_API_KEY', None)
+    events = parse_sse(client.get(STREAM_URL + '&refresh=1').get_data(as_text=True))
+    assert [name for name, _ in events] == ['status', 'status', 'error']
+    assert 'OpenAI API 키' in events[-1][1]['message']
+
+
+
+def wait_job(client, poll_url, timeout=10):
+    """작업이 끝날 때까지 조회하고 (마지막 상태, 생성 중에 받은 partial 목록) 반환"""
+    partials = []
+    deadline = time.monotonic() + timeout
+    while True:
+        job = client.get(poll_url).get_json()
+        if job['status'] not in report_jobs.ACTIVE_STATES:
+            return job, partials
+        if job.get('partial'):
+            partials.append(job['partial'])
+        assert time.monotonic() < deadline, job
+        time.sleep(0.01)
+
+
+def test_job_exposes_partial_report_while_running(client, stub_server, monkeypatch):
+    monkeypatch.setattr(report_jobs, 'PROGRESS_INTERVAL', 0)
+    monkeypatch.setattr(app_module, 'report_job_queue', ReportJobQueue(app_module.run_report_job))
+
+    response = client.post(f"/api/financial/{COMPANY['corp_code']}/ai_report", json={'year': 2023, 'refresh': True})
+    assert response.status_code == 202
+    job, partials = wait_job(client, response.get_json()['poll_url'])
+
+    assert job['status'] == 'done'
+    assert job['result']['report'] == STUB_REPORT
+    assert job['result']['cached'] is False
+    assert 'partial' not in job
+    # 완료 전에 보고서 앞부분부터 점점 길어지며 보임
+    assert partials and all(STUB_REPORT.startswith(text) for text in partials)
+    assert len(partials[0]) < len(STUB_REPORT)
+    assert stub_server.outcomes.get(timeout=5) == 'completed'
+
+
+def test_concurrent_submit_creates_one_job(data_path):
+    """여러 워커(큐 인스턴스)에 같은 요청이 동시에 들어와도 작업은 하나"""
+    release = threading.Event()
+
+    def runner(corp_code, bsns_year, reprt_code, refresh, progress):
+        release.wait(5)
+        return {'status': 'success', 'report': '보고서'}
+
+    queues = [ReportJobQueue(runner) for _ in range(4)]
+    barrier = threading.Barrier(8)
+    job_ids = []
+
+    def submit(queue):
+        barrier.wait()
+        job_ids.append(queue.submit('00126380', '2023', '11011')['job_id'])
+
+    threads = [threading.Thread(target=submit, args=(queues[i % len(queues)],)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    release.set()
+
+    assert len(job_ids) == 8
+    assert len(set(job_ids)) == 1
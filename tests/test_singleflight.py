@@ -0,0 +1,116 @@
+"""single-flight: 동시에 들어온 같은 호출은 한 번만 실행 (워커 내 스레드, 워커 간 SQLite 임대)"""
+import threading
+import time
+
+import pytest
+
+import singleflight
+
+THREADS = 8
+
+
+@pytest.fixture(autouse=True)
+def fast_poll(data_path, monkeypatch):
+    monkeypatch.setattr(singleflight, 'POLL_INTERVAL', 0.01)
+    monkeypatch.setattr(singleflight, '_calls', {})
+
+
+def run_concurrently(target, count=THREADS):
+    """count개 스레드에서 target을 동시에 시작하고 (결과, 예외) 목록 반환"""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(index):
+        barrier.wait()
+        try:
+            results[index] = (target(), None)
+        except Exception as e:
+            results[index] = (None, e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+class SlowCall:
+    """느린 DART 호출 대역 (실행 횟수 기록)"""
+
+    def __init__(self, delay=0.2, error=None):
+        self.delay = delay
+        self.error = error
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.count += 1
+            count = self.count
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return {'status': '000', 'call': count}
+
+
+@pytest.mark.parametrize('shared', [True, False])
+def test_concurrent_identical_calls_run_once(shared):
+    call = SlowCall()
+    results = run_concurrently(lambda: singleflight.do('dart:fnlttSinglAcnt:00126380:2023:11011', call, shared=shared))
+    assert call.count == 1
+    assert results == [({'status': '000', 'call': 1}, None)] * THREADS
+
+
+def test_different_keys_are_not_coalesced():
+    call = SlowCall(delay=0.05)
+    keys = iter(f'dart:fnlttSinglAcnt:{i:08d}:2023:11011' for i in range(THREADS))
+    lock = threading.Lock()
+
+    def target():
+        with lock:
+            key = next(keys)
+        return singleflight.do(key, call)
+
+    run_concurrently(target)
+    assert call.count == THREADS
+
+
+def test_error_is_shared_and_next_call_retries():
+    call = SlowCall(error=RuntimeError('DART 연결 실패'))
+    results = run_concurrently(lambda: singleflight.do('dart:error', call))
+    assert call.count == 1
+    assert all(result is None and str(error) == 'DART 연결 실패' for result, error in results)
+
+    # 실패한 호출은 공유 결과를 남기지 않아 다음 요청에서 다시 실행
+    call.error = None
+    assert singleflight.do('dart:error', call) == {'status': '000', 'call': 2}
+
+
+def test_lease_coalesces_across_workers():
+    # 워커마다 _calls가 따로 있으므로 임대 단계만 동시에 호출해 다른 워커의 요청을 흉내냄
+    call = SlowCall()
+    results = run_concurrently(
+        lambda: singleflight._run_across_workers('openai:report', call, singleflight.LEASE_TTL))
+    assert call.count == 1
+    assert results == [({'status': '000', 'call': 1}, None)] * THREADS
+
+
+def test_finished_result_is_not_reused_by_later_calls():
+    call = SlowCall(delay=0)
+    assert singleflight.do('dart:later', call) == {'status': '000', 'call': 1}
+    # 끝난 뒤 들어온 요청은 (캐시가 아니므로) 보관된 결과 대신 새로 실행
+    assert singleflight.do('dart:later', call) == {'status': '000', 'call': 2}
+
+
+def test_expired_lease_is_taken_over():
+    # 임대를 잡은 워커가 죽으면 임대 만료 후 다른 워커가 실행
+    conn = singleflight._connect()
+    try:
+        assert singleflight._try_acquire(conn, 'dart:dead', 'dead-worker', 0.1, time.time())[0] == 'acquired'
+    finally:
+        conn.close()
+    call = SlowCall(delay=0)
+    started = time.monotonic()
+    assert singleflight.do('dart:dead', call) == {'status': '000', 'call': 1}
+    assert 0.05 < time.monotonic() - started < 5